@@ -0,0 +1,174 @@
+# backend/admission.py
+# 요청 수락 제어 (ASGI 미들웨어): 사용자 / IP 별 token bucket + 외부 호출 엔드포인트 동시 처리 상한
+#
+# - 라우트 템플릿(/route, /predict/physical-age ...)마다 예산(초당 rate, 최대 burst)을 두고
+#   호출자(토큰의 user_id, 없으면 클라이언트 IP) 단위 token bucket 으로 초과분은 바로 429
+# - 네이버 / Supabase 를 부르는 엔드포인트는 전체 동시 처리 수가 상한에 닿으면 threadpool 에 줄 세우지 않고 바로 503
+#   (둘 다 Retry-After 헤더 포함, 본문은 HTTPException 과 같은 {"detail": ...})
+# - bucket 은 라우트별 LRU(OrderedDict)로 max_keys 개까지만 유지 → 호출자가 아무리 많아도 메모리 상한.
+#   밀려난 호출자는 다음 요청에서 가득 찬 bucket 으로 다시 시작 (조금 관대해질 뿐 막아야 할 요청을 막지는 않음)
+# - 상태는 이벤트 루프 스레드에서만 바뀌므로 lock 없이 갱신 (워커 프로세스마다 따로 센다)
+
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import applog
+import metrics
+from http_metrics import route_template
+
+log = applog.get_logger("admission")
+
+ADMISSION_SHED = metrics.counter(
+    "admission_shed_total", "수락 제어로 거절한 요청 수 (reason: rate_limit / concurrency)", ("route", "reason")
+)
+ADMISSION_UPSTREAM_IN_FLIGHT = metrics.gauge(
+    "admission_upstream_in_flight", "외부 호출 엔드포인트에서 처리 중인 요청 수"
+)
+ADMISSION_TRACKED_KEYS = metrics.gauge(
+    "admission_tracked_keys", "token bucket 을 들고 있는 (라우트, 호출자) 수"
+)
+
+
+def parse_budgets(text: str) -> Dict[str, Tuple[float, float]]:
+    """"/route=1:10,/facilities/near=2:20" → {라우트: (초당 rate, burst)}. burst 를 빼면 rate 의 1배 (최소 1)."""
+    budgets = {}
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        route, sep, spec = item.rpartition("=")
+        if not sep:
+            raise ValueError(f"수락 제어 예산 형식이 올바르지 않습니다: {item}")
+        rate, _, burst = spec.partition(":")
+        budgets[route.strip()] = (float(rate), float(burst) if burst else max(1.0, float(rate)))
+    return budgets
+
+
+class RateLimiter:
+    """호출자별 token bucket (초당 rate 개 충전, 최대 burst 개)."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 50000, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        # key → [남은 토큰, 마지막 갱신 시각]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: str) -> float:
+        """토큰 1개 사용. 성공하면 0, 부족하면 다음 토큰까지 기다려야 하는 초."""
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return 0.0
+        return (1.0 - bucket[0]) / self.rate if self.rate > 0 else math.inf
+
+
+async def _reject(send, status: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(max(1, math.ceil(min(retry_after, 3600)))).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    def __init__(
+        self,
+        app,
+        budgets: Dict[str, Tuple[float, float]],
+        upstream_routes: Iterable[str] = (),
+        max_upstream: int = 0,
+        max_keys: int = 50000,
+        identify: Optional[Callable[[dict], Optional[str]]] = None,
+        trust_forwarded: bool = False,
+    ):
+        """
+        budgets         : 라우트 템플릿 → (초당 rate, burst). 없는 라우트는 제한 없음
+        upstream_routes : 동시 처리 상한을 같이 쓰는 라우트 템플릿들 (max_upstream <= 0 이면 상한 없음)
+        identify(scope) : 호출자 user_id (없거나 확인할 수 없으면 None → 클라이언트 IP)
+        trust_forwarded : 프록시 뒤라면 X-Forwarded-For 첫 주소를 클라이언트 IP 로 사용
+        """
+        self.app = app
+        self.limiters = {
+            route: RateLimiter(rate, burst, max_keys) for route, (rate, burst) in budgets.items()
+        }
+        self.upstream_routes = frozenset(upstream_routes)
+        self.max_upstream = max_upstream
+        self.identify = identify
+        self.trust_forwarded = trust_forwarded
+        self._upstream_in_flight = 0
+        log.info(
+            "수락 제어: rate limit 라우트 %d개, 외부 호출 라우트 %d개 (동시 상한 %s)",
+            len(self.limiters), len(self.upstream_routes), max_upstream if max_upstream > 0 else "없음",
+        )
+        ADMISSION_TRACKED_KEYS.set_function(lambda: sum(len(l) for l in self.limiters.values()))
+
+    def _caller(self, scope) -> str:
+        if self.identify is not None:
+            try:
+                user_id = self.identify(scope)
+            except Exception as e:
+                # 호출자 식별 실패로 요청 전체가 500 이 되지 않도록 IP 기준으로 넘어간다
+                log.warning("수락 제어 호출자 식별 실패, IP 기준으로 처리: %s", e)
+                user_id = None
+            if user_id:
+                return f"user:{user_id}"
+        if self.trust_forwarded:
+            for name, value in scope.get("headers") or ():
+                if name == b"x-forwarded-for":
+                    return "ip:" + value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return f"ip:{client[0]}" if client else "ip:unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            # CORS preflight 는 예산을 쓰지 않음
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope)
+        limiter = self.limiters.get(route)
+        if limiter is not None:
+            wait = limiter.acquire(self._caller(scope))
+            if wait > 0:
+                ADMISSION_SHED.inc(route=route, reason="rate_limit")
+                await _reject(send, 429, "요청이 너무 많습니다. 잠시 후 다시 시도해 주세요.", wait)
+                return
+
+        if self.max_upstream <= 0 or route not in self.upstream_routes:
+            await self.app(scope, receive, send)
+            return
+
+        if self._upstream_in_flight >= self.max_upstream:
+            ADMISSION_SHED.inc(route=route, reason="concurrency")
+            await _reject(send, 503, "요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해 주세요.", 1)
+            return
+        self._upstream_in_flight += 1
+        ADMISSION_UPSTREAM_IN_FLIGHT.set(self._upstream_in_flight)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._upstream_in_flight -= 1
+            ADMISSION_UPSTREAM_IN_FLIGHT.set(self._upstream_in_flight)
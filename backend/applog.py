@@ -0,0 +1,52 @@
+# backend/applog.py
+# 레벨 / 샘플링 로깅 (print 대체)
+#
+#   log = applog.get_logger("facilities")
+#   log.info("시설 스냅샷 교체: %s", version)        # 포맷은 레벨이 켜졌을 때만 수행
+#
+#   _near_debug = applog.sampler()   # LOG_SAMPLE_EVERY 번에 1번
+#   if log.isEnabledFor(logging.DEBUG) and _near_debug():
+#       log.debug("lat range: %s ~ %s", df["lat"].min(), df["lat"].max())
+#
+# hot path 의 비싼 인자 계산(min/max 등)은 isEnabledFor 로 감싸서 DEBUG 가 꺼져 있으면
+# 비교 한 번으로 끝나게 한다.
+#
+# 환경변수
+#   LOG_LEVEL         DEBUG / INFO / WARNING / ERROR (기본 INFO)
+#   LOG_SAMPLE_EVERY  sampler() 로 감싼 로그를 N 번에 1번만 남김 (기본 100, 1 이면 매번)
+
+import itertools
+import logging
+import os
+import sys
+from typing import Callable, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_EVERY = max(1, int(os.getenv("LOG_SAMPLE_EVERY", "100")))
+
+ROOT_LOGGER = "fitness100"
+
+_root = logging.getLogger(ROOT_LOGGER)
+if not _root.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
+    _root.addHandler(_handler)
+    _root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    # uvicorn 루트 로거 설정과 상관없이 한 번만 출력
+    _root.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    return _root.getChild(name)
+
+
+def sampler(every: Optional[int] = None) -> Callable[[], bool]:
+    """
+    호출할 때마다 True/False 를 돌려주는 샘플러. every 번에 한 번 True (첫 호출 포함).
+    itertools.count 의 next() 는 GIL 아래에서 원자적이라 락이 필요 없다.
+    """
+    n = every or LOG_SAMPLE_EVERY
+    counter = itertools.count()
+    if n <= 1:
+        return lambda: True
+    return lambda: next(counter) % n == 0
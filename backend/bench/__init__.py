@@ -0,0 +1,2 @@
+# backend/bench
+# 성능 측정용 스크립트 모음 (backend/ 에서 `python -m bench.<모듈>` 로 실행)
@@ -0,0 +1,147 @@
+# backend/bench/bench_compression.py
+# 응답 압축 trade-off: 인코딩 / 레벨별 전송 바이트 vs 압축·해제 CPU 시간
+#
+#   python -m bench.bench_compression [--facilities 100000] [--radius-km 1 2 5] [--repeat 20]
+#
+# /facilities/near, /recommend/facilities 와 같은 모양의 JSON(합성 시설)과
+# /route 경로 JSON 을 만들어 gzip(1/6/9), brotli(1/4/11, 설치 시) 로 압축해 본다.
+# 결과는 측정 항목마다 JSON 한 줄. 서버 기본값은 http_cache 의 COMPRESS_* 환경변수.
+
+import argparse
+import gzip
+import json
+import math
+import random
+import statistics
+import time
+from typing import Callable, List, Tuple
+
+from bench.synthetic import synthetic_facilities
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+LAT, LON = 37.5665, 126.9780
+# main.infer_category 와 같은 우선순위
+CATEGORY_FLAGS = (
+    ("is_cardio", "심폐지구력"),
+    ("is_muscular_endurance", "근지구력"),
+    ("is_flexibility", "유연성"),
+)
+
+
+def _distance_km(lat1, lon1, lat2, lon2) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+def facility_payload(rows: List[dict], radius_km: float, recommend: bool) -> bytes:
+    """FacilityOut / RecommendedFacility 리스트와 같은 키 구성의 JSON."""
+    items = []
+    for r in rows:
+        d = _distance_km(LAT, LON, r["lat"], r["lon"])
+        if d > radius_km:
+            continue
+        category = next((name for col, name in CATEGORY_FLAGS if r[col]), "기타")
+        item = {
+            "id": r["id"],
+            "name": r["name"],
+            "lat": r["lat"],
+            "lon": r["lon"],
+            "address": r["address"],
+            "mission": r["detail_equip"] or f"{category} 운동",
+            "category": category,
+        }
+        if recommend:
+            item["distance_km"] = round(d, 3)
+            item["match_category"] = category == "심폐지구력"
+        items.append(item)
+    return json.dumps(items, ensure_ascii=False).encode("utf-8")
+
+
+def route_payload(points: int, seed: int = 0) -> bytes:
+    """/route 응답 ({"path": [[lon, lat], ...]}) — 도로를 따라가는 random walk."""
+    rng = random.Random(seed)
+    lon, lat, heading = LON, LAT, rng.uniform(0, 2 * math.pi)
+    path = []
+    for _ in range(points):
+        heading += rng.gauss(0, 0.15)
+        lon += math.cos(heading) * 0.0002
+        lat += math.sin(heading) * 0.0002
+        path.append([round(lon, 7), round(lat, 7)])
+    return json.dumps({"path": path}).encode("utf-8")
+
+
+def _codecs() -> List[Tuple[str, Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    codecs = [
+        (f"gzip-{level}", lambda b, level=level: gzip.compress(b, compresslevel=level, mtime=0), gzip.decompress)
+        for level in (1, 6, 9)
+    ]
+    if brotli is not None:
+        codecs += [
+            (f"br-{q}", lambda b, q=q: brotli.compress(b, quality=q), brotli.decompress)
+            for q in (1, 4, 11)
+        ]
+    return codecs
+
+
+def _median_ms(fn: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return round(statistics.median(times) * 1000, 3)
+
+
+def bench_payload(name: str, body: bytes, repeat: int) -> List[dict]:
+    rows = []
+    for codec, comp, decomp in _codecs():
+        packed = comp(body)
+        compress_ms = _median_ms(lambda: comp(body), repeat)
+        rows.append(
+            {
+                "payload": name,
+                "codec": codec,
+                "original_bytes": len(body),
+                "compressed_bytes": len(packed),
+                "ratio": round(len(packed) / len(body), 4),
+                "compress_ms": compress_ms,
+                "decompress_ms": _median_ms(lambda: decomp(packed), repeat),
+                # 원본 1MB 당 압축 CPU 시간 (응답 크기가 달라도 비교할 수 있게)
+                "compress_ms_per_mb": round(compress_ms / (len(body) / 1e6), 3),
+            }
+        )
+    return rows
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="응답 압축 trade-off")
+    parser.add_argument("--facilities", type=int, default=100000)
+    parser.add_argument("--radius-km", type=float, nargs="+", default=[1.0, 2.0, 5.0])
+    parser.add_argument("--route-points", type=int, nargs="+", default=[300, 3000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if brotli is None:
+        print(json.dumps({"note": "brotli 미설치 — gzip 만 측정"}, ensure_ascii=False))
+
+    rows = synthetic_facilities(args.facilities)
+    payloads = []
+    for radius in args.radius_km:
+        payloads.append((f"near_r{radius:g}km", facility_payload(rows, radius, recommend=False)))
+        payloads.append((f"recommend_r{radius:g}km", facility_payload(rows, radius, recommend=True)))
+    for points in args.route_points:
+        payloads.append((f"route_{points}pts", route_payload(points)))
+
+    for name, body in payloads:
+        for row in bench_payload(name, body, args.repeat):
+            print(json.dumps(row, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,277 @@
+# backend/bench/bench_http.py
+# HTTP 부하 시나리오: 처리량 / p50 / p90 / p99 를 JSON 으로 출력 (실행 간 비교용)
+#
+#   python -m bench.bench_http [--duration 30] [--concurrency 32] [--workers 2]
+#                              [--facilities 100000] [--latency-ms 20] [--mix near=4,recommend=3,predict=2,history=1]
+#
+# --target 을 주지 않으면 로컬 PostgREST 대역(bench.fake_postgrest)을 띄우고
+# 그걸 바라보는 uvicorn 을 --workers 개로 실행한 뒤 측정한다.
+# 엔진 파일(models/model.pkl)이 없으면 predict 시나리오는 500 으로 집계된다.
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from bench.fake_postgrest import start_fake_postgrest
+from bench.synthetic import CITIES
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_MIX = "near=4,recommend=3,predict=2,history=1,favorites=1"
+USER_POOL = [f"00000000-0000-4000-8000-{i:012d}" for i in range(200)]
+
+
+# =========================
+# 시나리오 (매 호출마다 (method, path, body) 생성)
+# =========================
+def _point(rng: random.Random) -> Tuple[float, float]:
+    _, lat, lon, _, spread = rng.choice(CITIES)
+    return round(rng.gauss(lat, spread / 2), 5), round(rng.gauss(lon, spread / 2), 5)
+
+
+def scenario_near(rng):
+    lat, lon = _point(rng)
+    return "GET", "/facilities/near?" + urlencode({"lat": lat, "lon": lon, "radius_km": 2.0}), None
+
+
+def scenario_recommend(rng):
+    lat, lon = _point(rng)
+    weak = rng.choice(["cardio_endurance", "sit_ups", "flexibility", "jump_power"])
+    q = urlencode({"lat": lat, "lon": lon, "radius_km": 2.0, "weak_point": weak})
+    return "GET", "/recommend/facilities?" + q, None
+
+
+def scenario_predict(rng):
+    body = {
+        "user_id": rng.choice(USER_POOL),
+        "sex": rng.choice(["M", "F"]),
+        "flexibility": round(rng.gauss(12, 7), 1),
+        "jump_power": round(rng.gauss(190, 35), 1),
+        "cardio_endurance": round(rng.gauss(390, 70), 1),
+        "sit_ups": round(rng.gauss(36, 11), 1),
+    }
+    return "POST", "/predict/physical-age", body
+
+
+def scenario_history(rng):
+    return "GET", f"/users/{rng.choice(USER_POOL)}/physical-age/history?limit=20", None
+
+
+def scenario_favorites(rng):
+    return "GET", "/favorites/by-user?" + urlencode({"user_id": rng.choice(USER_POOL)}), None
+
+
+SCENARIOS = {
+    "near": scenario_near,
+    "recommend": scenario_recommend,
+    "predict": scenario_predict,
+    "history": scenario_history,
+    "favorites": scenario_favorites,
+}
+
+
+def parse_mix(text: str) -> List[Tuple[str, float]]:
+    mix = []
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"알 수 없는 시나리오: {name} (가능: {', '.join(SCENARIOS)})")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+# =========================
+# 부하 생성
+# =========================
+def _client(base: str, mix, seed: int, deadline: float, out: List[tuple]) -> None:
+    parts = urlsplit(base)
+    rng = random.Random(seed)
+    names = [m[0] for m in mix]
+    weights = [m[1] for m in mix]
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights=weights)[0]
+        method, path, body = SCENARIOS[name](rng)
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload else {}
+        t0 = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            status = resp.status
+        except (OSError, http.client.HTTPException):
+            status = 0
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        out.append((name, status, time.perf_counter() - t0))
+    conn.close()
+
+
+def _percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, int(round(p / 100.0 * len(sorted_values))) - 1))
+    return round(sorted_values[idx] * 1000, 3)
+
+
+def summarize(name: str, samples: List[tuple], duration: float) -> dict:
+    latencies = sorted(s[2] for s in samples)
+    statuses: Dict[str, int] = {}
+    for s in samples:
+        statuses[str(s[1])] = statuses.get(str(s[1]), 0) + 1
+    errors = sum(1 for s in samples if s[1] == 0 or s[1] >= 500)
+    return {
+        "scenario": name,
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / duration, 2) if duration > 0 else None,
+        "errors": errors,
+        "statuses": statuses,
+        "p50_ms": _percentile(latencies, 50),
+        "p90_ms": _percentile(latencies, 90),
+        "p99_ms": _percentile(latencies, 99),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+    }
+
+
+def run_load(base: str, mix, duration: float, concurrency: int, seed: int) -> List[dict]:
+    per_thread: List[List[tuple]] = [[] for _ in range(concurrency)]
+    started = time.perf_counter()
+    deadline = started + duration
+    threads = [
+        threading.Thread(target=_client, args=(base, mix, seed + i, deadline, per_thread[i]), daemon=True)
+        for i in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    samples = [s for chunk in per_thread for s in chunk]
+    rows = [summarize("all", samples, elapsed)]
+    for name, _ in mix:
+        rows.append(summarize(name, [s for s in samples if s[0] == name], elapsed))
+    return rows
+
+
+# =========================
+# 대상 서버 준비
+# =========================
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _status(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=2) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def _wait_ready(base: str, timeout: float) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        code = _status(base + "/ready")
+        if code == 200 or (code == 404 and _status(base + "/health") == 200):
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP 부하 시나리오")
+    parser.add_argument("--target", help="이미 떠 있는 서버 (예: http://127.0.0.1:8000). 없으면 로컬로 띄움")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=3.0, help="측정 전에 버리는 구간 (초)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="로컬 uvicorn 워커 수")
+    parser.add_argument("--facilities", type=int, default=100000, help="로컬 PostgREST 대역 시설 수")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="로컬 PostgREST 대역 응답 지연")
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    fake = proc = None
+    base = args.target
+    tmp = tempfile.TemporaryDirectory(prefix="bench-http-")
+    try:
+        if base is None:
+            fake = start_fake_postgrest(args.facilities, 0, args.latency_ms, args.jitter_ms, seed=args.seed)
+            port = _free_port()
+            env = {
+                **os.environ,
+                "SUPABASE_URL": fake.url,
+                "SUPABASE_SERVICE_ROLE_KEY": "bench",
+                "SHARED_DATA_DIR": str(Path(tmp.name) / "shared"),
+                "WRITE_SPOOL_PATH": str(Path(tmp.name) / "spool.sqlite3"),
+                "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+            }
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                 "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+                cwd=BACKEND_DIR, env=env,
+            )
+            base = f"http://127.0.0.1:{port}"
+        ready = _wait_ready(base, args.ready_timeout)
+
+        if args.warmup > 0:
+            run_load(base, mix, args.warmup, args.concurrency, args.seed + 10_000)
+        rows = run_load(base, mix, args.duration, args.concurrency, args.seed)
+
+        config = {
+            "git_rev": _git_rev(),
+            "target": args.target or "local",
+            "ready": ready,
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "workers": None if args.target else args.workers,
+            "facilities": None if args.target else args.facilities,
+            "upstream_latency_ms": None if args.target else args.latency_ms,
+        }
+        for row in rows:
+            print(json.dumps({**config, **row}, ensure_ascii=False))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if fake is not None:
+            fake.shutdown()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# backend/bench/bench_micro.py
+# 서버 핵심 경로 micro-benchmark (네트워크 / Supabase 없이 main 의 함수를 직접 호출)
+#
+#   python -m bench.bench_micro [--facilities 10000 100000] [--repeat 20]
+#
+# - quantile 엔진   : compute_physical_age_quantiles / predict_physical_age (합성 엔진)
+# - 거리 / 추천     : get_near_facilities / recommend_facilities (합성 시설 DataFrame)
+# - 직렬화          : FacilityOut 리스트 → JSON (FastAPI 응답 경로와 같은 jsonable_encoder + json.dumps)
+# 결과는 측정 항목마다 JSON 한 줄.
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+# main import 전에: 공유 스냅샷 / spool 파일을 건드리지 않도록
+_tmp = Path(tempfile.mkdtemp(prefix="bench-micro-"))
+os.environ["SHARED_DATA_DIR"] = ""
+os.environ.setdefault("WRITE_SPOOL_PATH", str(_tmp / "spool.sqlite3"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pandas as pd  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+import main  # noqa: E402
+from bench.synthetic import synthetic_engine, synthetic_facilities  # noqa: E402
+
+# 서울 시청 / 반경 2km (기본 요청과 같은 조건)
+LAT, LON, RADIUS_KM = 37.5665, 126.9780, 2.0
+
+
+def timeit(fn: Callable[[], object], repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+    times: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return {
+        "repeat": repeat,
+        "median_ms": round(statistics.median(times) * 1000, 4),
+        "p90_ms": round(times[min(len(times) - 1, int(len(times) * 0.9))] * 1000, 4),
+        "min_ms": round(times[0] * 1000, 4),
+    }
+
+
+def bench_engine(repeat: int) -> List[dict]:
+    main._engine_cache = synthetic_engine()
+    req = main.PhysicalAgeRequest(sex="M", flexibility=10, jump_power=210, cardio_endurance=370, sit_ups=40)
+    return [
+        {"bench": "quantile_engine", **timeit(lambda: main.compute_physical_age_quantiles(req), repeat * 50)},
+        # user_id 없음 → Supabase 저장 없이 계산 + 응답 모델 생성만
+        {"bench": "predict_physical_age", **timeit(lambda: main.predict_physical_age(req), repeat * 50)},
+        {"bench": "haversine_km", **timeit(lambda: main.haversine_km(LAT, LON, 37.57, 126.98), repeat * 1000)},
+    ]
+
+
+def bench_facilities(n: int, repeat: int) -> List[dict]:
+    df = pd.DataFrame(synthetic_facilities(n))
+    main._facilities_df = df
+
+    near = main.get_near_facilities(LAT, LON, RADIUS_KM)
+    results = [
+        {"bench": "facilities_near", "facilities": n, "results": len(near),
+         **timeit(lambda: main.get_near_facilities(LAT, LON, RADIUS_KM), repeat)},
+        {"bench": "recommend_facilities", "facilities": n,
+         **timeit(lambda: main.recommend_facilities(LAT, LON, RADIUS_KM, "cardio_endurance"), repeat)},
+        {"bench": "serialize_facilities", "facilities": n, "items": len(near),
+         "json_bytes": len(json.dumps(jsonable_encoder(near), ensure_ascii=False).encode("utf-8")),
+         **timeit(lambda: json.dumps(jsonable_encoder(near), ensure_ascii=False), repeat * 10)},
+    ]
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="서버 핵심 경로 micro-benchmark")
+    parser.add_argument("--facilities", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    for row in bench_engine(args.repeat):
+        print(json.dumps(row))
+    for n in args.facilities:
+        for row in bench_facilities(n, args.repeat):
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main_cli()
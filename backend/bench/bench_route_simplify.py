@@ -0,0 +1,75 @@
+# backend/bench/bench_route_simplify.py
+# 긴 합성 경로에 대한 Douglas–Peucker 단순화 시간 / 점 감소율 측정
+#
+#   python -m bench.bench_route_simplify [--points 2000 20000 100000] [--repeat 5]
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from route_geometry import encode_polyline, simplify_path, zoom_to_tolerance_m
+
+
+def synthetic_route(n_points: int, seed: int = 0, step_m: float = 8.0) -> list:
+    """
+    서울 시청 근처에서 출발하는 도로 모양의 합성 경로.
+    진행 방향이 천천히 바뀌는 random walk (네이버 path 처럼 수 m 간격의 촘촘한 점).
+    """
+    rng = np.random.default_rng(seed)
+    heading = np.cumsum(rng.normal(0.0, 0.08, n_points))
+    # 가끔 교차로에서 크게 꺾임
+    turns = rng.random(n_points) < 0.01
+    heading += np.cumsum(np.where(turns, rng.choice([-np.pi / 2, np.pi / 2], n_points), 0.0))
+
+    lat0, lon0 = 37.5665, 126.9780
+    dy = np.cos(heading) * step_m
+    dx = np.sin(heading) * step_m
+    lat = lat0 + np.cumsum(dy) / 111_320.0
+    lon = lon0 + np.cumsum(dx) / (111_320.0 * np.cos(np.radians(lat0)))
+    return np.column_stack((lon, lat)).round(7).tolist()
+
+
+def bench(points_list, zooms, repeat: int) -> list:
+    results = []
+    for n in points_list:
+        path = synthetic_route(n)
+        raw_json_bytes = len(json.dumps(path))
+        for zoom in zooms:
+            tol = zoom_to_tolerance_m(zoom, path[0][1])
+            times = []
+            simplified = path
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                simplified = simplify_path(path, tolerance_m=tol)
+                times.append(time.perf_counter() - t0)
+            results.append(
+                {
+                    "points": n,
+                    "zoom": zoom,
+                    "tolerance_m": round(tol, 3),
+                    "kept_points": len(simplified),
+                    "reduction": round(n / max(1, len(simplified)), 1),
+                    "simplify_ms_median": round(float(np.median(times)) * 1000, 3),
+                    "raw_json_bytes": raw_json_bytes,
+                    "simplified_json_bytes": len(json.dumps(simplified)),
+                    "simplified_polyline_bytes": len(encode_polyline(simplified)),
+                }
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="경로 단순화 벤치마크")
+    parser.add_argument("--points", type=int, nargs="+", default=[2000, 20000, 100000])
+    parser.add_argument("--zooms", type=int, nargs="+", default=[12, 14, 16, 18])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for row in bench(args.points, args.zooms, args.repeat):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
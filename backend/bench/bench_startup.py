@@ -0,0 +1,141 @@
+# backend/bench/bench_startup.py
+# 워커 기동 시간 측정: `import main` 시간 + uvicorn 기동 후 준비 완료까지 걸린 시간
+#
+#   python -m bench.bench_startup [--repeat 3] [--old-ref HEAD~1]
+#
+# --old-ref 를 주면 해당 git ref 의 backend/ 를 임시 디렉터리에 풀어 같은 방식으로 측정한다.
+# (이전 버전은 /ready 가 없으므로 /health 가 응답하는 시점까지 = 동기 로딩이 끝난 시점)
+
+import argparse
+import json
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_IMPORT_SNIPPET = (
+    "import time, sys; t0 = time.perf_counter(); import main; "
+    "print(time.perf_counter() - t0); "
+    "print(','.join(m for m in ('numpy', 'pandas', 'joblib', 'sklearn') if m in sys.modules))"
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import(cwd: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SNIPPET],
+        cwd=cwd, capture_output=True, text=True, check=True,
+    ).stdout.strip().splitlines()
+    return {
+        "import_ms": round(float(out[-2]) * 1000, 1),
+        "heavy_modules_loaded": [m for m in out[-1].split(",") if m],
+    }
+
+
+def _status(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def measure_boot(cwd: Path, timeout: float) -> dict:
+    """uvicorn 을 띄우고 /health 첫 응답, /ready 200 (없으면 /health) 까지의 시간 측정."""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    serving = ready = None
+    has_ready = None
+    try:
+        while time.perf_counter() - t0 < timeout and ready is None:
+            if proc.poll() is not None:
+                break
+            if serving is None and _status(base + "/health") == 200:
+                serving = time.perf_counter() - t0
+            if serving is not None:
+                code = _status(base + "/ready")
+                if has_ready is None:
+                    has_ready = code != 404
+                if not has_ready or code == 200:
+                    ready = time.perf_counter() - t0
+                    break
+            time.sleep(0.02)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    return {
+        "serving_ms": round(serving * 1000, 1) if serving is not None else None,
+        "ready_ms": round(ready * 1000, 1) if ready is not None else None,
+        "ready_endpoint": "/ready" if has_ready else "/health",
+    }
+
+
+def _checkout(ref: str, dest: Path) -> Path:
+    archive = subprocess.run(
+        ["git", "archive", ref, "backend"],
+        cwd=BACKEND_DIR.parent, capture_output=True, check=True,
+    ).stdout
+    subprocess.run(["tar", "-x", "-C", str(dest)], input=archive, check=True)
+    backend = dest / "backend"
+    # 엔진 파일 / .env 는 git 에 없을 수 있으므로 현재 작업 트리에서 복사
+    for rel in ("data", ".env"):
+        src = BACKEND_DIR / rel
+        if src.is_dir() and not (backend / rel).exists():
+            shutil.copytree(src, backend / rel)
+        elif src.is_file():
+            shutil.copy2(src, backend / rel)
+    return backend
+
+
+def run(label: str, cwd: Path, repeat: int, timeout: float) -> list:
+    rows = []
+    for i in range(repeat):
+        row = {"version": label, "run": i}
+        row.update(measure_import(cwd))
+        row.update(measure_boot(cwd, timeout))
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워커 기동 시간 벤치마크")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120.0, help="준비 완료까지 최대 대기 (초)")
+    parser.add_argument("--old-ref", help="비교할 이전 git ref (예: HEAD~1)")
+    args = parser.parse_args()
+
+    for row in run("current", BACKEND_DIR, args.repeat, args.timeout):
+        print(json.dumps(row))
+
+    if args.old_ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            old_dir = _checkout(args.old_ref, Path(tmp))
+            for row in run(args.old_ref, old_dir, args.repeat, args.timeout):
+                print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
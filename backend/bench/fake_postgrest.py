@@ -0,0 +1,400 @@
+# backend/bench/fake_postgrest.py
+# 벤치마크용 로컬 PostgREST 대역 (Supabase 없이 서버를 띄워 부하 테스트)
+#
+#   python -m bench.fake_postgrest --port 54321 --facilities 100000 --latency-ms 20
+#   SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_SERVICE_ROLE_KEY=bench uvicorn main:app
+#
+# 지원 테이블: facilities / physical_age_assessments / favorite_facilities / mission_logs
+# 서버가 실제로 쓰는 PostgREST 기능만 구현:
+#   - select, order(col.asc|desc,...), limit / offset, Range 헤더 + Content-Range (Prefer: count=exact)
+#   - 필터 col=eq|neq|lt|lte|gt|gte|in|is.<값>, or=(...) 안의 and(...) 중첩
+#   - POST 단건 / 배열, on_conflict + Prefer: resolution=ignore-duplicates, return=representation
+#   - DELETE + 필터
+# 응답마다 latency ± jitter 만큼 지연하고, error_rate 확률로 503 을 돌려준다.
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from bench.synthetic import synthetic_facilities
+
+# 테이블별 유니크 키 (on_conflict 가 없을 때 중복 insert 는 409)
+UNIQUE_KEYS = {
+    "facilities": [("id",)],
+    "physical_age_assessments": [("id",), ("idempotency_key",)],
+    "favorite_facilities": [("id",), ("user_id", "facility_id")],
+    "mission_logs": [("id",), ("idempotency_key",)],
+}
+# insert 시 채워 주는 기본값
+TIMESTAMP_DEFAULTS = {
+    "physical_age_assessments": "measured_at",
+    "favorite_facilities": "created_at",
+    "mission_logs": "created_at",
+}
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+# =========================
+# 필터 파싱 / 평가
+# =========================
+def _split_top(text: str) -> List[str]:
+    """괄호 / 따옴표 밖의 쉼표로 분리."""
+    parts, depth, quoted, buf = [], 0, False, []
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append("".join(buf))
+            buf = []
+            continue
+        buf.append(ch)
+    if buf:
+        parts.append("".join(buf))
+    return parts
+
+
+def _unquote(v: str) -> str:
+    return v[1:-1] if len(v) >= 2 and v[0] == v[-1] == '"' else v
+
+
+def _coerce(row_value, raw: str):
+    if isinstance(row_value, bool):
+        return raw.lower() == "true"
+    if isinstance(row_value, (int, float)):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+def _compare(op: str, row_value, raw: str) -> bool:
+    if op == "is":
+        return (row_value is None) if raw.lower() == "null" else (row_value == (raw.lower() == "true"))
+    if row_value is None:
+        return False
+    if op == "in":
+        items = [_unquote(x) for x in _split_top(raw.strip("()"))]
+        return any(row_value == _coerce(row_value, x) for x in items)
+    target = _coerce(row_value, _unquote(raw))
+    try:
+        if op == "eq":
+            return row_value == target
+        if op == "neq":
+            return row_value != target
+        if op == "lt":
+            return row_value < target
+        if op == "lte":
+            return row_value <= target
+        if op == "gt":
+            return row_value > target
+        if op == "gte":
+            return row_value >= target
+    except TypeError:
+        return False
+    raise ValueError(f"지원하지 않는 연산자: {op}")
+
+
+Predicate = Callable[[dict], bool]
+
+
+def _parse_condition(cond: str) -> Predicate:
+    """'col.op.value' 또는 'and(...)' / 'or(...)' 하나."""
+    for group in ("and", "or"):
+        if cond.startswith(group + "(") and cond.endswith(")"):
+            return _parse_group(group, cond[len(group) + 1 : -1])
+    col, op, raw = cond.split(".", 2)
+    return lambda row: _compare(op, row.get(col), raw)
+
+
+def _parse_group(kind: str, body: str) -> Predicate:
+    preds = [_parse_condition(c) for c in _split_top(body)]
+    if kind == "and":
+        return lambda row: all(p(row) for p in preds)
+    return lambda row: any(p(row) for p in preds)
+
+
+def parse_filters(params: List[Tuple[str, str]]) -> List[Predicate]:
+    preds = []
+    for key, value in params:
+        if key in RESERVED_PARAMS:
+            continue
+        if key in ("or", "and"):
+            preds.append(_parse_group(key, value.strip()[1:-1]))
+            continue
+        op, _, raw = value.partition(".")
+        preds.append(lambda row, c=key, o=op, r=raw: _compare(o, row.get(c), r))
+    return preds
+
+
+def _sort_key(value):
+    # None 은 항상 뒤로, 타입이 섞여도 비교 가능하도록
+    return (value is None, value if value is not None else 0)
+
+
+# =========================
+# 저장소
+# =========================
+class FakeDatabase:
+    def __init__(self, facilities: Optional[List[dict]] = None):
+        self.tables: Dict[str, List[dict]] = {name: [] for name in UNIQUE_KEYS}
+        self.tables["facilities"] = list(facilities or [])
+        self._next_id = {name: len(rows) + 1 for name, rows in self.tables.items()}
+        self._index: Dict[Tuple[str, tuple], set] = {}
+        for name, rows in self.tables.items():
+            for row in rows:
+                self._index_row(name, row)
+        self.lock = threading.Lock()
+
+    def _index_row(self, table: str, row: dict) -> None:
+        for cols in UNIQUE_KEYS[table]:
+            if all(row.get(c) is not None for c in cols):
+                self._index.setdefault((table, cols), set()).add(tuple(row[c] for c in cols))
+
+    def _conflicts(self, table: str, row: dict, cols: Optional[tuple] = None) -> bool:
+        for key_cols in [cols] if cols else UNIQUE_KEYS[table]:
+            if all(row.get(c) is not None for c in key_cols):
+                if tuple(row[c] for c in key_cols) in self._index.get((table, key_cols), ()):
+                    return True
+        return False
+
+    def select(self, table: str, params: List[Tuple[str, str]]) -> List[dict]:
+        preds = parse_filters(params)
+        with self.lock:
+            rows = [r for r in self.tables[table] if all(p(r) for p in preds)]
+        order = dict(params).get("order")
+        if order:
+            for part in reversed(order.split(",")):
+                col, _, direction = part.partition(".")
+                rows.sort(key=lambda r: _sort_key(r.get(col)), reverse=direction.startswith("desc"))
+        return rows
+
+    def insert(self, table: str, rows: List[dict], on_conflict: Optional[str], ignore_duplicates: bool) -> List[dict]:
+        conflict_cols = tuple(on_conflict.split(",")) if on_conflict else None
+        now = datetime.now(timezone.utc).isoformat()
+        inserted = []
+        with self.lock:
+            for row in rows:
+                row = dict(row)
+                if self._conflicts(table, row, conflict_cols) or (
+                    conflict_cols and self._conflicts(table, row)
+                ):
+                    if ignore_duplicates:
+                        continue
+                    raise KeyError("duplicate key value violates unique constraint")
+                if "id" not in row:
+                    row["id"] = self._next_id[table]
+                    self._next_id[table] += 1
+                ts_col = TIMESTAMP_DEFAULTS.get(table)
+                if ts_col and not row.get(ts_col):
+                    row[ts_col] = now
+                self.tables[table].append(row)
+                self._index_row(table, row)
+                inserted.append(row)
+        return inserted
+
+    def delete(self, table: str, params: List[Tuple[str, str]]) -> int:
+        preds = parse_filters(params)
+        with self.lock:
+            keep, removed = [], []
+            for r in self.tables[table]:
+                (removed if all(p(r) for p in preds) else keep).append(r)
+            self.tables[table] = keep
+            for r in removed:
+                for cols in UNIQUE_KEYS[table]:
+                    self._index.get((table, cols), set()).discard(tuple(r.get(c) for c in cols))
+        return len(removed)
+
+
+# =========================
+# HTTP 서버
+# =========================
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 헤더와 본문을 한 번에 보내도록 버퍼링 (나눠 보내면 delayed ACK 로 ~40ms 씩 밀림)
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    server: "FakePostgrestServer"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _table_and_params(self) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+        parts = urlsplit(self.path)
+        prefix = "/rest/v1/"
+        table = parts.path[len(prefix):] if parts.path.startswith(prefix) else None
+        return table, parse_qsl(parts.query, keep_blank_values=True)
+
+    def _send(self, status: int, body=None, headers: Optional[Dict[str, str]] = None) -> None:
+        payload = b"" if body is None else json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        if body is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _begin(self) -> Optional[Tuple[str, List[Tuple[str, str]]]]:
+        # keep-alive 연결에서 에러 응답을 보내더라도 요청 본문은 먼저 다 읽어야 함
+        length = int(self.headers.get("Content-Length") or 0)
+        self._body = self.rfile.read(length) if length else b""
+        self.server.delay()
+        table, params = self._table_and_params()
+        if table not in UNIQUE_KEYS:
+            self._send(404, {"message": f"relation {table} does not exist"})
+            return None
+        if self.server.should_fail():
+            self._send(503, {"message": "injected failure"})
+            return None
+        return table, params
+
+    def _read_body(self):
+        return json.loads(self._body or b"null")
+
+    def do_GET(self):
+        started = self._begin()
+        if started is None:
+            return
+        table, params = started
+        try:
+            rows = self.server.db.select(table, params)
+        except ValueError as e:
+            self._send(400, {"message": str(e)})
+            return
+
+        total = len(rows)
+        p = dict(params)
+        start, end = int(p.get("offset", 0)), None
+        if "limit" in p:
+            end = start + int(p["limit"]) - 1
+        range_header = self.headers.get("Range")
+        if range_header:
+            lo, _, hi = range_header.partition("-")
+            start, end = int(lo), int(hi) if hi else None
+        page = rows[start : (end + 1) if end is not None else None]
+
+        select = p.get("select", "*")
+        if select != "*":
+            cols = [c.strip() for c in select.split(",")]
+            page = [{c: r.get(c) for c in cols} for r in page]
+
+        headers = {}
+        if "count=exact" in (self.headers.get("Prefer") or "") or range_header:
+            last = start + len(page) - 1
+            span = f"{start}-{last}" if page else "*"
+            headers["Content-Range"] = f"{span}/{total}"
+        self._send(200, page, headers)
+
+    def do_POST(self):
+        started = self._begin()
+        if started is None:
+            return
+        table, params = started
+        body = self._read_body()
+        rows = body if isinstance(body, list) else [body]
+        prefer = self.headers.get("Prefer") or ""
+        try:
+            inserted = self.server.db.insert(
+                table, rows, dict(params).get("on_conflict"), "resolution=ignore-duplicates" in prefer
+            )
+        except KeyError as e:
+            self._send(409, {"code": "23505", "message": str(e)})
+            return
+        if "return=representation" in prefer:
+            self._send(201, inserted)
+        else:
+            self._send(201)
+
+    def do_DELETE(self):
+        started = self._begin()
+        if started is None:
+            return
+        table, params = started
+        self.server.db.delete(table, params)
+        self._send(204)
+
+
+class FakePostgrestServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, db: FakeDatabase, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        super().__init__(address, _Handler)
+        self.db = db
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def delay(self) -> None:
+        if self.latency <= 0 and self.jitter <= 0:
+            return
+        with self._rng_lock:
+            d = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+        if d > 0:
+            time.sleep(d)
+
+    def should_fail(self) -> bool:
+        if self.error_rate <= 0:
+            return False
+        with self._rng_lock:
+            return self._rng.random() < self.error_rate
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_fake_postgrest(
+    facilities: int = 10000,
+    port: int = 0,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = 0,
+) -> FakePostgrestServer:
+    """백그라운드 스레드에서 서버 시작. server.url / server.shutdown() 사용."""
+    db = FakeDatabase(synthetic_facilities(facilities, seed=seed))
+    server = FakePostgrestServer(("127.0.0.1", port), db, latency_ms, jitter_ms, error_rate, seed)
+    threading.Thread(target=server.serve_forever, name="fake-postgrest", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 PostgREST 대역 서버")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--facilities", type=int, default=10000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 을 돌려줄 확률 (0~1)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_fake_postgrest(
+        args.facilities, args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.seed
+    )
+    print(json.dumps({"url": server.url, "facilities": args.facilities}))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# backend/bench/synthetic.py
+# 벤치마크용 합성 데이터 (같은 seed 면 항상 같은 결과)
+#
+# - synthetic_facilities(n): 전국 공공체육시설 모양의 행 (facilities 테이블 컬럼과 동일)
+#   주요 도시 주변에 인구 비율대로 몰리고, 일부는 본토 전체에 흩어진다.
+# - synthetic_engine(): model.pkl 과 같은 형식의 quantile 엔진 (dict[str, DataFrame])
+
+import random
+from typing import Dict, List
+
+# (이름, 위도, 경도, 가중치, 흩어짐 정도(도))
+CITIES = [
+    ("서울특별시", 37.5665, 126.9780, 0.30, 0.08),
+    ("부산광역시", 35.1796, 129.0756, 0.10, 0.07),
+    ("인천광역시", 37.4563, 126.7052, 0.09, 0.07),
+    ("대구광역시", 35.8714, 128.6014, 0.07, 0.06),
+    ("대전광역시", 36.3504, 127.3845, 0.05, 0.05),
+    ("광주광역시", 35.1595, 126.8526, 0.05, 0.05),
+    ("울산광역시", 35.5384, 129.3114, 0.03, 0.05),
+    ("수원시", 37.2636, 127.0286, 0.06, 0.05),
+    ("창원시", 35.2280, 128.6811, 0.03, 0.05),
+    ("제주시", 33.4996, 126.5312, 0.02, 0.08),
+]
+# 도시 밖에 흩어지는 비율 / 본토 대략적인 범위
+RURAL_SHARE = 0.20
+MAINLAND_LAT = (34.6, 38.2)
+MAINLAND_LON = (126.4, 129.3)
+
+FACILITY_TYPES = ["체육관", "운동장", "공원 체력단련장", "수영장", "테니스장", "배드민턴장", "풋살장"]
+EQUIPMENT = ["", "", "철봉, 평행봉", "윗몸일으키기대", "허리돌리기", "러닝머신", "스트레칭 보드", "줄넘기 구역"]
+STREETS = ["중앙로", "시청로", "공원로", "체육로", "한강대로", "해안로", "역전길", "학교길"]
+
+
+def synthetic_facilities(n: int, seed: int = 0) -> List[dict]:
+    """facilities 테이블과 같은 컬럼의 dict 리스트 (id 는 1..n). numpy 없이 동작."""
+    rng = random.Random(seed)
+    weights = [c[3] for c in CITIES]
+    flag_rates = (0.35, 0.25, 0.30, 0.10)
+
+    rows = []
+    for i in range(1, n + 1):
+        if rng.random() < RURAL_SHARE:
+            city = "기타"
+            lat = rng.uniform(*MAINLAND_LAT)
+            lon = rng.uniform(*MAINLAND_LON)
+        else:
+            city, c_lat, c_lon, _, spread = rng.choices(CITIES, weights=weights)[0]
+            lat = rng.gauss(c_lat, spread)
+            lon = rng.gauss(c_lon, spread)
+        ftype = rng.choice(FACILITY_TYPES)
+        flags = [int(rng.random() < r) for r in flag_rates]
+        rows.append(
+            {
+                "id": i,
+                "name": f"{city} {ftype} {i}",
+                "lat": round(lat, 6),
+                "lon": round(lon, 6),
+                "address": f"{city} {rng.choice(STREETS)} {rng.randint(1, 299)}",
+                "detail_equip": rng.choice(EQUIPMENT),
+                "type": ftype,
+                "is_muscular_endurance": flags[0],
+                "is_flexibility": flags[1],
+                "is_cardio": flags[2],
+                "quickness": flags[3],
+            }
+        )
+    return rows
+
+
+# 성별 / 항목별 대략적인 분포 (평균, 표준편차). cardio_endurance 는 낮을수록 좋은 기록(초).
+ENGINE_DISTRIBUTIONS = {
+    "sit_ups": {"Female": (30.0, 10.0), "Male": (42.0, 11.0)},
+    "flexibility": {"Female": (14.0, 7.0), "Male": (9.0, 8.0)},
+    "jump_power": {"Female": (155.0, 22.0), "Male": (215.0, 28.0)},
+    "cardio_endurance": {"Female": (420.0, 70.0), "Male": (360.0, 60.0)},
+}
+
+
+def synthetic_engine(steps: int = 101) -> Dict[str, "object"]:
+    """model.pkl 과 같은 형식: {항목: DataFrame(index=quantile, columns=[Female, Male])}."""
+    import numpy as np
+    import pandas as pd
+    from statistics import NormalDist
+
+    qs = np.linspace(0.0, 1.0, steps)
+    clipped = np.clip(qs, 0.001, 0.999)
+    engine = {}
+    for metric, by_sex in ENGINE_DISTRIBUTIONS.items():
+        cols = {}
+        for sex, (mu, sigma) in by_sex.items():
+            dist = NormalDist(mu, sigma)
+            values = np.array([dist.inv_cdf(float(q)) for q in clipped])
+            # 낮을수록 좋은 항목은 상위 quantile 이 작은 값
+            cols[sex] = values[::-1] if metric == "cardio_endurance" else values
+        engine[metric] = pd.DataFrame(cols, index=qs)
+    return engine
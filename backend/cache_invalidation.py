@@ -0,0 +1,107 @@
+# backend/cache_invalidation.py
+# 워커 간 캐시 무효화 로그 (SQLite WAL)
+#
+# - 사용자별 캐시(즐겨찾기 / 신체나이 기록)는 write-through 가 요청을 처리한 워커에만 반영되므로,
+#   같은 사용자를 다른 워커가 응답하면 TTL 동안 예전 값이 보인다
+# - 값을 바꾼 워커가 publish(scope, key) 로 한 줄 남기고, 모든 워커가 poll() 로 새 줄만 읽어
+#   subscribe 한 콜백(캐시 invalidate)을 부른다. 자기가 남긴 줄은 이미 write-through 했으므로 건너뜀
+# - 같은 디스크를 보는 워커끼리만 유효 (session_tokens 의 폐기 목록과 같은 방식).
+#   파일은 처음 필요할 때 열고, retention 보다 오래된 줄은 publish 때 지운다
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import applog
+import metrics
+
+log = applog.get_logger("cache_invalidation")
+
+INVALIDATIONS = metrics.counter(
+    "cache_invalidations_total", "워커 간 캐시 무효화 수 (op: published / applied)", ("scope", "op")
+)
+
+
+class InvalidationLog:
+    def __init__(self, path: Path, retention: float = 3600.0):
+        self.path = Path(path)
+        self.retention = retention
+        self._origin = f"{os.getpid()}-{time.time_ns():x}"
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._seen_seq: Optional[int] = None
+        self._subscribers: Dict[str, List[Callable[[str], None]]] = {}
+
+    def subscribe(self, scope: str, fn: Callable[[str], None]) -> None:
+        """fn(key): 다른 워커가 scope 의 key 를 바꿨을 때 호출."""
+        self._subscribers.setdefault(scope, []).append(fn)
+
+    def _db(self) -> sqlite3.Connection:
+        """(self._lock 안에서 호출) 처음 부를 때 파일 / 테이블 생성. 그 전에 쌓인 줄은 읽지 않는다."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS invalidations (
+                    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+                    scope      TEXT    NOT NULL,
+                    key        TEXT    NOT NULL,
+                    origin     TEXT    NOT NULL,
+                    created_at REAL    NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS invalidations_created_at ON invalidations (created_at)")
+            self._seen_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM invalidations").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def publish(self, scope: str, key: str) -> None:
+        """scope 의 key 가 바뀌었음을 다른 워커에 알림. 실패해도 요청은 막지 않는다 (TTL 이 안전망)."""
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._db()
+                conn.execute(
+                    "INSERT INTO invalidations (scope, key, origin, created_at) VALUES (?, ?, ?, ?)",
+                    (scope, str(key), self._origin, now),
+                )
+                conn.execute("DELETE FROM invalidations WHERE created_at < ?", (now - self.retention,))
+            except (sqlite3.Error, OSError) as e:
+                log.error("캐시 무효화 기록 실패 (%s): %s", scope, e)
+                return
+        INVALIDATIONS.inc(scope=scope, op="published")
+
+    def poll(self) -> int:
+        """다른 워커가 남긴 새 줄을 읽어 구독자 호출. 적용한 수 반환."""
+        with self._lock:
+            try:
+                conn = self._db()
+                rows = conn.execute(
+                    "SELECT seq, scope, key, origin FROM invalidations WHERE seq > ? ORDER BY seq",
+                    (self._seen_seq,),
+                ).fetchall()
+            except (sqlite3.Error, OSError) as e:
+                log.warning("캐시 무효화 읽기 실패: %s", e)
+                return 0
+            if rows:
+                self._seen_seq = rows[-1][0]
+
+        applied = 0
+        for _, scope, key, origin in rows:
+            if origin == self._origin:
+                continue
+            for fn in self._subscribers.get(scope, ()):
+                try:
+                    fn(key)
+                except Exception as e:
+                    log.error("캐시 무효화 적용 실패 (%s, %s): %s", scope, key, e)
+            INVALIDATIONS.inc(scope=scope, op="applied")
+            applied += 1
+        return applied
@@ -0,0 +1,242 @@
+# backend/cohort_stats.py
+# 앱 사용자 코호트(항목 × 성별 × 연령대)별 측정값 분포 — /cohort/percentile
+#
+# - 코호트마다 TDigest 하나. 측정 1건은 해당 연령대 + "all" 코호트에 같이 들어간다 (연령 미상은 all 만)
+# - 워커별로 자기 관측치(local)만 모아 directory/worker-<pid>-<시작시각>.json 에 주기적으로 저장하고,
+#   refresh() 때 base.json(이력 재구성 결과) + 다른 워커 파일 + 자기 local 을 병합해 조회용 view 를 교체
+# - 이력 재구성(publish_base)은 새 generation 으로 base.json 을 쓰고 워커 파일을 지운다.
+#   워커는 generation 이 바뀐 것을 보면 자기 local 을 비운다 (재구성 결과에 이미 포함되어 있으므로).
+#   재구성이 도는 동안 들어온 측정은 일부 빠지거나 겹칠 수 있다 — 분포 조회용이라 허용하는 오차
+# - 조회는 view 의 TDigest.cdf 한 번 (메모리, 수 µs). sketch 를 바꾸는 연산이라 observe 와 같은 lock 아래에서
+
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import applog
+import metrics
+from quantile_sketch import DEFAULT_COMPRESSION, TDigest
+
+log = applog.get_logger("cohort_stats")
+
+ALL_BAND = "all"
+AGE_BANDS = ("10s", "20s", "30s", "40s", "50s", "60s", "70s+")
+
+COHORT_OBSERVATIONS = metrics.counter(
+    "cohort_observations_total", "코호트 분포에 반영한 측정 수", ("source",)
+)
+COHORT_FLUSHES = metrics.counter(
+    "cohort_stats_flushes_total", "코호트 sketch 저장 / 병합 횟수", ("op",)
+)
+
+Key = Tuple[str, str, str]  # (metric, sex, band)
+
+
+def age_band(age: Optional[float]) -> Optional[str]:
+    """나이 → 연령대 (10대 이하는 10s, 70세 이상은 70s+). 모르면 None."""
+    if age is None:
+        return None
+    decade = int(age) // 10
+    if decade <= 1:
+        return AGE_BANDS[0]
+    if decade >= 7:
+        return AGE_BANDS[-1]
+    return AGE_BANDS[decade - 1]
+
+
+def _key_str(key: Key) -> str:
+    return "|".join(key)
+
+
+def _parse_key(text: str) -> Key:
+    metric, sex, band = text.split("|")
+    return metric, sex, band
+
+
+def _write_json(path: Path, doc: dict) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(doc, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.warning("코호트 파일 읽기 실패 (%s): %s", path.name, e)
+        return None
+
+
+def _load_sketches(doc: dict) -> Dict[Key, TDigest]:
+    return {_parse_key(k): TDigest.from_dict(v) for k, v in doc.get("sketches", {}).items()}
+
+
+def _dump_sketches(sketches: Dict[Key, TDigest]) -> Dict[str, dict]:
+    return {_key_str(k): d.to_dict() for k, d in sketches.items()}
+
+
+class CohortStats:
+    def __init__(self, directory: Optional[Path], compression: float = DEFAULT_COMPRESSION):
+        """directory 가 None 이면 파일 저장 / 워커 간 병합 없이 이 프로세스 관측치만 사용."""
+        self.directory = Path(directory) if directory else None
+        self.compression = compression
+        self._worker_file = f"worker-{os.getpid()}-{time.time_ns():x}.json"
+        self._lock = threading.Lock()
+        self._generation: Optional[str] = None
+        self._local: Dict[Key, TDigest] = {}
+        self._dirty = False
+        # 조회용 (base + 다른 워커 + 자기 local)
+        self._view: Dict[Key, TDigest] = {}
+
+    # ---------- 입력 ----------
+    def _keys(self, metric: str, sex: str, age: Optional[float]) -> Iterable[Key]:
+        yield metric, sex, ALL_BAND
+        band = age_band(age)
+        if band is not None:
+            yield metric, sex, band
+
+    def observe(self, sex: str, age: Optional[float], values: Dict[str, float], source: str = "live") -> None:
+        """측정 1건 반영 (항목별 값). view 에도 바로 반영해 다음 조회부터 보인다."""
+        with self._lock:
+            for metric, value in values.items():
+                if value is None:
+                    continue
+                for key in self._keys(metric, sex, age):
+                    for target in (self._local, self._view):
+                        d = target.get(key)
+                        if d is None:
+                            d = target[key] = TDigest(self.compression)
+                        d.add(value)
+            self._dirty = True
+        COHORT_OBSERVATIONS.inc(source=source)
+
+    # ---------- 조회 ----------
+    def cdf(self, metric: str, sex: str, band: str, value: float) -> Optional[Tuple[float, float]]:
+        """코호트에서 value 보다 작은 비율과 표본 수. 코호트가 없거나 비어 있으면 None.
+
+        TDigest.cdf 는 버퍼를 압축하며 sketch 를 바꾸므로 observe 와 같은 lock 아래에서 계산한다.
+        """
+        with self._lock:
+            d = self._view.get((metric, sex, band))
+            if d is None or d.count <= 0:
+                return None
+            return d.cdf(value), d.count
+
+    def counts(self) -> Dict[str, float]:
+        view = self._view
+        return {_key_str(k): d.count for k, d in sorted(view.items())}
+
+    # ---------- 저장 / 병합 ----------
+    def flush(self) -> None:
+        """자기 local 을 워커 파일로 저장 (바뀐 게 있을 때만)."""
+        if self.directory is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            doc = {
+                "generation": self._generation,
+                "updated_at": time.time(),
+                "sketches": _dump_sketches(self._local),
+            }
+            self._dirty = False
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_json(self.directory / self._worker_file, doc)
+        COHORT_FLUSHES.inc(op="flush")
+
+    def refresh(self) -> None:
+        """base + 다른 워커 파일 + 자기 local 을 병합해 조회용 view 교체."""
+        if self.directory is None:
+            return
+        base = _read_json(self.directory / "base.json") or {}
+        generation = base.get("generation")
+        merged = _load_sketches(base)
+
+        for path in self.directory.glob("worker-*.json"):
+            if path.name == self._worker_file:
+                continue
+            doc = _read_json(path)
+            if doc is None or doc.get("generation") != generation:
+                continue
+            for key, d in _load_sketches(doc).items():
+                if key in merged:
+                    merged[key].merge(d)
+                else:
+                    merged[key] = d
+
+        with self._lock:
+            if generation != self._generation:
+                if self._generation is not None or self._local:
+                    log.info("코호트 분포 재구성 반영: generation=%s", generation)
+                self._generation = generation
+                self._local = {}
+                self._dirty = True
+            for key, d in self._local.items():
+                if key in merged:
+                    merged[key].merge(d)
+                else:
+                    merged[key] = d.copy()
+            self._view = merged
+        COHORT_FLUSHES.inc(op="refresh")
+
+    def sync(self) -> None:
+        try:
+            self.flush()
+            self.refresh()
+        except OSError as e:
+            log.error("코호트 분포 저장 / 병합 실패: %s", e)
+
+    def publish_base(self, sketches: Dict[Key, TDigest], rows: int) -> str:
+        """이력 재구성 결과를 새 generation 으로 공개하고 워커 파일 정리. generation 반환."""
+        generation = uuid.uuid4().hex
+        if self.directory is None:
+            with self._lock:
+                self._generation = generation
+                self._local = {}
+                self._view = sketches
+            return generation
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_json(
+            self.directory / "base.json",
+            {"generation": generation, "built_at": time.time(), "rows": rows, "sketches": _dump_sketches(sketches)},
+        )
+        for path in self.directory.glob("worker-*.json"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        self.refresh()
+        return generation
+
+    def new_builder(self) -> "CohortBuilder":
+        return CohortBuilder(self)
+
+
+class CohortBuilder:
+    """이력 재구성용: 조회용 view 와 분리된 sketch 묶음에 chunk 단위로 쌓은 뒤 publish."""
+
+    def __init__(self, stats: CohortStats):
+        self._stats = stats
+        self.sketches: Dict[Key, TDigest] = {}
+        self.rows = 0
+
+    def add(self, sex: str, age: Optional[float], values: Dict[str, float]) -> None:
+        for metric, value in values.items():
+            if value is None:
+                continue
+            for key in self._stats._keys(metric, sex, age):
+                d = self.sketches.get(key)
+                if d is None:
+                    d = self.sketches[key] = TDigest(self._stats.compression)
+                d.add(value)
+        self.rows += 1
+
+    def publish(self) -> str:
+        COHORT_OBSERVATIONS.inc(self.rows, source="rebuild")
+        return self._stats.publish_base(self.sketches, self.rows)
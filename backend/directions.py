@@ -0,0 +1,249 @@
+# backend/directions.py
+# 네이버 Directions V1 Driving API 호출 + 경로 캐시
+# (main.py /route 와 routers/naver_directions.py 가 함께 사용)
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import requests
+
+import metrics
+import upstream
+from route_cache import RouteCache
+from route_geometry import simplify_path
+from singleflight import SingleFlight
+
+NAVER_CLIENT_ID = os.getenv("NAVER_CLIENT_ID")          # X-NCP-APIGW-API-KEY-ID
+NAVER_CLIENT_SECRET = os.getenv("NAVER_CLIENT_SECRET")  # X-NCP-APIGW-API-KEY
+
+BASE_URL = "https://maps.apigw.ntruss.com/map-direction/v1/driving"
+
+# 캐시 키용 좌표 반올림 자릿수 (4자리 ≒ 11m)
+ROUTE_CACHE_PRECISION = int(os.getenv("ROUTE_CACHE_PRECISION", "4"))
+_route_cache_path = os.getenv("ROUTE_CACHE_PATH")  # 지정하면 디스크에도 저장
+
+route_cache = RouteCache(
+    max_entries=int(os.getenv("ROUTE_CACHE_MAX_ENTRIES", "5000")),
+    ttl=float(os.getenv("ROUTE_CACHE_TTL", str(6 * 3600))),
+    path=Path(_route_cache_path) if _route_cache_path else None,
+    max_disk_entries=int(os.getenv("ROUTE_CACHE_DISK_MAX_ENTRIES", "50000")),
+)
+_route_flight = SingleFlight("naver_directions")
+
+NAVER_UPSTREAM_CALLS = metrics.counter(
+    "naver_directions_upstream_calls_total", "네이버 Directions 실제 호출 수", ("status",)
+)
+ROUTE_MATRIX_RESULTS = metrics.counter(
+    "route_matrix_results_total", "/route/matrix 항목별 결과 수", ("status",)
+)
+
+# /route/matrix 가 네이버로 동시에 내보낼 수 있는 최대 호출 수 (전체 요청 공유)
+ROUTE_MATRIX_CONCURRENCY = int(os.getenv("ROUTE_MATRIX_CONCURRENCY", "8"))
+_matrix_pool = ThreadPoolExecutor(max_workers=ROUTE_MATRIX_CONCURRENCY, thread_name_prefix="route-matrix")
+
+
+class DirectionsError(Exception):
+    """네이버 Directions 호출 실패. status_code / detail 은 HTTPException 으로 그대로 옮길 수 있는 값."""
+
+    def __init__(self, status_code: int, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class DirectionsConfigError(DirectionsError):
+    """NAVER_CLIENT_ID / NAVER_CLIENT_SECRET 미설정."""
+
+
+class NoRouteError(DirectionsError):
+    """네이버가 경로를 줄 수 없다고 응답 (출발 = 도착, 도로 주변이 아닌 좌표, 경로 없음 등)."""
+
+
+# 네이버 응답 JSON code 중 "경로 없음" 으로 볼 것 (1: 출발지 = 도착지, 2: 출발 / 도착지가 도로 주변이 아님,
+# 3: 자동차 길찾기 결과 제공 불가, 4: 경유지가 도로 주변이 아님, 5: 경로가 너무 김)
+NAVER_NO_ROUTE_CODES = frozenset({1, 2, 3, 4, 5})
+
+
+def parse_lonlat(text: str) -> Tuple[float, float]:
+    """'경도,위도' 문자열 → (lon, lat)."""
+    lon_s, lat_s = text.split(",", 1)
+    return float(lon_s), float(lat_s)
+
+
+def route_key(start: Tuple[float, float], goal: Tuple[float, float], option: str) -> tuple:
+    p = ROUTE_CACHE_PRECISION
+    return (
+        round(start[0], p), round(start[1], p),
+        round(goal[0], p), round(goal[1], p),
+        option,
+    )
+
+
+def _fetch_upstream(key: tuple, timeout: float) -> dict:
+    if not NAVER_CLIENT_ID or not NAVER_CLIENT_SECRET:
+        raise DirectionsConfigError(
+            500, "NAVER_CLIENT_ID / NAVER_CLIENT_SECRET 환경변수가 설정되지 않았습니다."
+        )
+
+    start_lon, start_lat, goal_lon, goal_lat, option = key
+    headers = {
+        "X-NCP-APIGW-API-KEY-ID": NAVER_CLIENT_ID,
+        "X-NCP-APIGW-API-KEY": NAVER_CLIENT_SECRET,
+    }
+    # 네이버는 "경도,위도" 순서! (캐시 키와 같은 반올림 좌표로 요청)
+    params = {
+        "start": f"{start_lon},{start_lat}",
+        "goal": f"{goal_lon},{goal_lat}",
+        "option": option,
+    }
+
+    try:
+        resp = upstream.request("naver", "directions", "GET", BASE_URL, headers=headers, params=params, timeout=timeout)
+    except requests.RequestException as e:
+        NAVER_UPSTREAM_CALLS.inc(status="error")
+        raise DirectionsError(502, f"Naver Directions 호출 실패: {e}")
+
+    NAVER_UPSTREAM_CALLS.inc(status=str(resp.status_code))
+    if resp.status_code != 200:
+        raise DirectionsError(resp.status_code, f"Naver API error: {resp.text}")
+
+    data = resp.json()
+
+    # 네이버 JSON 내부 code 체크 (0이 정상)
+    if isinstance(data, dict) and data.get("code") != 0:
+        error = NoRouteError if data.get("code") in NAVER_NO_ROUTE_CODES else DirectionsError
+        raise error(400, {"naver_code": data.get("code"), "naver_message": data.get("message")})
+
+    route_cache.put(key, data)
+    return data
+
+
+def get_driving_route(
+    start: Tuple[float, float],
+    goal: Tuple[float, float],
+    option: str = "traoptimal",
+    timeout: float = 10.0,
+) -> dict:
+    """
+    start/goal = (lon, lat). 네이버 Directions 원본 JSON 반환.
+    - 반올림 좌표 + option 기준으로 캐시에서 먼저 찾고
+    - 없으면 같은 키의 동시 요청을 하나로 합쳐 네이버에 한 번만 요청
+    실패 시 DirectionsError (키 미설정은 DirectionsConfigError, 경로 없음은 NoRouteError).
+    """
+    key = route_key(start, goal, option)
+    cached = route_cache.get(key)
+    if cached is not None:
+        return cached
+    return _route_flight.do(key, lambda: _fetch_upstream(key, timeout))
+
+
+def first_route_path(data: dict, option: str = "traoptimal") -> Optional[list]:
+    """네이버 응답에서 첫 번째 경로의 path([[lon, lat], ...]) 추출. 없으면 None."""
+    routes = (data.get("route") or {}).get(option)
+    if not routes:
+        return None
+    return routes[0].get("path", [])
+
+
+def get_route_path(
+    start: Tuple[float, float],
+    goal: Tuple[float, float],
+    option: str = "traoptimal",
+    tolerance_m: Optional[float] = None,
+    timeout: float = 10.0,
+) -> Optional[list]:
+    """
+    첫 번째 경로 path 반환. tolerance_m 이 주어지면 단순화한 path.
+    단순화 결과도 원본 경로와 같은 캐시에 (원본 키 + 허용오차) 로 저장해
+    같은 경로/허용오차 조합은 한 번만 계산한다.
+    """
+    if tolerance_m is None or tolerance_m <= 0:
+        return first_route_path(get_driving_route(start, goal, option, timeout), option)
+
+    key = route_key(start, goal, option) + ("dp", round(float(tolerance_m), 2))
+    cached = route_cache.get(key)
+    if cached is not None:
+        return cached
+
+    path = first_route_path(get_driving_route(start, goal, option, timeout), option)
+    if not path:
+        return path
+    simplified = simplify_path(path, tolerance_m=round(float(tolerance_m), 2))
+    route_cache.put(key, simplified)
+    return simplified
+
+
+def route_summary(data: dict, option: str = "traoptimal") -> Optional[dict]:
+    """네이버 응답에서 첫 번째 경로의 소요 시간(분) / 거리(km) 추출."""
+    routes = (data.get("route") or {}).get(option)
+    if not routes:
+        return None
+    summary = routes[0].get("summary") or {}
+    duration_ms = summary.get("duration")
+    distance_m = summary.get("distance")
+    return {
+        "duration_min": round(duration_ms / 60000.0, 1) if duration_ms is not None else None,
+        "distance_km": round(distance_m / 1000.0, 3) if distance_m is not None else None,
+    }
+
+
+def route_matrix(
+    origin: Tuple[float, float],
+    goals: List[Tuple[int, Tuple[float, float]]],
+    option: str = "traoptimal",
+    call_timeout: float = 3.0,
+    deadline: float = 5.0,
+) -> List[dict]:
+    """
+    origin(lon, lat) → 여러 목적지(goal_id, (lon, lat)) 까지의 소요 시간/거리.
+    - 캐시에 있는 경로는 바로 채우고, 나머지는 공용 풀(최대 ROUTE_MATRIX_CONCURRENCY)로 병렬 요청
+    - 각 호출은 call_timeout, 전체는 deadline 초 안에 끝난 것만 결과에 반영
+    - 시간 안에 못 끝났거나 실패한 항목은 status 로 표시 (전체를 실패시키지 않음)
+    결과는 goals 순서 그대로: {"id", "status", "duration_min", "distance_km"}
+    """
+    started = time.monotonic()
+    results: List[dict] = [{"id": goal_id, "status": "pending"} for goal_id, _ in goals]
+    futures = {}
+
+    for i, (goal_id, goal) in enumerate(goals):
+        cached = route_cache.get(route_key(origin, goal, option))
+        if cached is not None:
+            results[i] = {"id": goal_id, **_matrix_entry(cached, option)}
+            continue
+        fut = _matrix_pool.submit(get_driving_route, origin, goal, option, call_timeout)
+        futures[fut] = i
+
+    if futures:
+        remaining = max(0.0, deadline - (time.monotonic() - started))
+        wait(list(futures), timeout=remaining)
+
+    for fut, i in futures.items():
+        goal_id = goals[i][0]
+        if not fut.done():
+            # 아직 시작 안 한 호출은 취소, 진행 중인 호출은 끝나면 캐시만 채우고 버려짐
+            fut.cancel()
+            results[i] = {"id": goal_id, "status": "timeout"}
+            continue
+        try:
+            results[i] = {"id": goal_id, **_matrix_entry(fut.result(), option)}
+        except NoRouteError:
+            # 네이버가 경로 없음으로 답한 것은 실패가 아니라 결과 (partial 로 보지 않음)
+            results[i] = {"id": goal_id, "status": "no_route"}
+        except DirectionsError as e:
+            results[i] = {"id": goal_id, "status": "error", "error": str(e.detail)}
+        except Exception as e:
+            results[i] = {"id": goal_id, "status": "error", "error": str(e)}
+
+    for r in results:
+        ROUTE_MATRIX_RESULTS.inc(status=r["status"])
+    return results
+
+
+def _matrix_entry(data: dict, option: str) -> dict:
+    summary = route_summary(data, option)
+    if summary is None:
+        return {"status": "no_route"}
+    return {"status": "ok", **summary}
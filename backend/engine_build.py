@@ -0,0 +1,419 @@
+# backend/engine_build.py
+# 원본 체력측정 기록(CSV / Parquet)으로 quantile 엔진(models/model.pkl)을 다시 만드는 오프라인 파이프라인
+#
+#   python engine_build.py data/raw/*.csv.gz --output models/model.new.pkl --report build_report.json
+#   python engine_build.py data/raw/*.parquet --estimator sketch --workers 8 \
+#       --sex-column 성별 --column sit_ups=윗몸일으키기 --column cardio_endurance=왕복오래달리기
+#
+# - 입력은 chunk 단위로 읽고(메인 프로세스), chunk 별 누적은 프로세스 풀에서 → 동시에 떠 있는 chunk 는 workers * 2 개까지
+# - (항목, 성별)마다 병합 가능한 누적기 하나
+#     exact  : 값(소수 --decimals 자리로 반올림)별 개수. 측정값 해상도가 정해져 있어 서로 다른 값 수 = 메모리 상한,
+#              quantile 은 전체 데이터에 np.quantile(linear) 한 것과 같다
+#     sketch : quantile_sketch.TDigest (메모리 = compression 에 비례, 꼬리 quantile 오차 작음)
+# - 출력은 load_engine 과 같은 형식 {항목: DataFrame(index=quantile, columns=[Female, Male])}.
+#   index 는 "상위일수록 큰" quantile 이라 낮을수록 좋은 항목(cardio_endurance 등)은 값이 내림차순
+# - 현재 엔진과 비교한 리포트: 같은 quantile 의 값 차이, 새 기준값을 현재 엔진에 넣었을 때의 quantile / 등급 이동
+# - 서버는 model.pkl 의 mtime / 크기가 바뀌면 공유 스냅샷을 다시 만들므로, 리포트 확인 후 파일을 교체하면 된다
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import applog
+from lazy_imports import lazy_import
+from quantile_sketch import DEFAULT_COMPRESSION, TDigest
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+joblib = lazy_import("joblib")
+
+log = applog.get_logger("engine_build")
+
+ENGINE_METRICS = ["sit_ups", "flexibility", "jump_power", "cardio_endurance"]
+ENGINE_SEXES = ("Female", "Male")
+# 현재 엔진이 없을 때 낮을수록 좋은 항목으로 보는 기본값
+DEFAULT_LOWER_IS_BETTER = ("cardio_endurance",)
+# 등급 수 (main.AGE_GRADES 와 같아야 함) — 리포트의 등급 이동 계산용
+N_GRADES = 17
+
+SEX_ALIASES = {
+    "f": "Female", "female": "Female", "여": "Female", "여자": "Female", "woman": "Female", "girl": "Female",
+    "m": "Male", "male": "Male", "남": "Male", "남자": "Male", "man": "Male", "boy": "Male",
+}
+
+Key = Tuple[str, str]  # (metric, sex)
+
+
+# =========================
+# 엔진 형식
+# =========================
+def validate_engine(obj) -> Dict[str, "pd.DataFrame"]:
+    """load_engine 이 받아들이는 형식인지 확인 (dict, 4개 항목 키, 값은 DataFrame)."""
+    if not isinstance(obj, dict):
+        raise TypeError("엔진 파일 내용이 dict 형식이 아닙니다.")
+    for key in ENGINE_METRICS:
+        if key not in obj:
+            raise KeyError(f"엔진에 '{key}' 키가 없습니다.")
+        if not isinstance(obj[key], pd.DataFrame):
+            raise TypeError(f"엔진의 '{key}' 값이 DataFrame 이 아닙니다.")
+    return obj
+
+
+def higher_is_better(table: "pd.DataFrame", sex: str) -> bool:
+    v = table[sex].to_numpy(dtype=float)
+    return bool(v[-1] >= v[0])
+
+
+# =========================
+# 누적기
+# =========================
+class ExactCounts:
+    """반올림한 값별 개수 (정렬된 values / counts 배열)."""
+
+    __slots__ = ("values", "counts")
+
+    def __init__(self, values=None, counts=None):
+        self.values = values if values is not None else np.empty(0, dtype=float)
+        self.counts = counts if counts is not None else np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def from_array(cls, x, decimals: int) -> "ExactCounts":
+        values, counts = np.unique(np.round(x, decimals), return_counts=True)
+        return cls(values, counts.astype(np.int64))
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def merge(self, other: "ExactCounts") -> "ExactCounts":
+        values, inverse = np.unique(np.concatenate([self.values, other.values]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([self.counts, other.counts]), minlength=len(values))
+        self.values, self.counts = values, counts.astype(np.int64)
+        return self
+
+    def quantiles(self, qs) -> "np.ndarray":
+        """np.quantile(method="linear") 와 같은 값 (h = q * (n - 1) 번째 순서통계량 사이 보간)."""
+        cum = np.cumsum(self.counts)
+        h = np.asarray(qs, dtype=float) * (cum[-1] - 1)
+        lo = np.floor(h)
+        # k 번째(0부터) 순서통계량 = cum > k 인 첫 값
+        v_lo = self.values[np.searchsorted(cum, lo, side="right")]
+        v_hi = self.values[np.minimum(np.searchsorted(cum, lo + 1, side="right"), len(self.values) - 1)]
+        return v_lo + (v_hi - v_lo) * (h - lo)
+
+
+class SketchCounts:
+    """TDigest 래퍼 (ExactCounts 와 같은 인터페이스)."""
+
+    __slots__ = ("digest",)
+
+    def __init__(self, digest: TDigest):
+        self.digest = digest
+
+    @classmethod
+    def from_array(cls, x, compression: float) -> "SketchCounts":
+        d = TDigest(compression)
+        for v in np.sort(x).tolist():
+            d.add(v)
+        return cls(d)
+
+    @property
+    def count(self) -> int:
+        return int(self.digest.count)
+
+    def merge(self, other: "SketchCounts") -> "SketchCounts":
+        self.digest.merge(other.digest)
+        return self
+
+    def quantiles(self, qs) -> "np.ndarray":
+        return np.array([self.digest.quantile(float(q)) for q in qs])
+
+
+def _accumulate(columns: Dict[str, "np.ndarray"], estimator: str, decimals: int, compression: float) -> dict:
+    """
+    chunk 하나 → {(항목, 성별): 누적기}. 프로세스 풀에서 실행.
+    columns: "sex" (Female / Male 문자열 배열) + 항목별 float 배열
+    """
+    sex = columns["sex"]
+    out = {}
+    for metric in ENGINE_METRICS:
+        x = columns.get(metric)
+        if x is None:
+            continue
+        for label in ENGINE_SEXES:
+            sel = x[(sex == label) & np.isfinite(x)]
+            if not len(sel):
+                continue
+            if estimator == "exact":
+                out[(metric, label)] = ExactCounts.from_array(sel, decimals)
+            else:
+                out[(metric, label)] = SketchCounts.from_array(sel, compression)
+    return out
+
+
+# =========================
+# 입력
+# =========================
+def _iter_frames(path: Path, usecols: List[str], chunksize: int) -> Iterator["pd.DataFrame"]:
+    name = path.name.lower()
+    if name.endswith(".parquet") or name.endswith(".pq"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet 입력에는 pyarrow 가 필요합니다: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=usecols):
+            yield batch.to_pandas()
+    else:
+        # .csv / .csv.gz 등 (압축은 확장자로 판단)
+        yield from pd.read_csv(path, usecols=usecols, chunksize=chunksize, low_memory=False)
+
+
+def _normalize_sex(s: "pd.Series") -> "np.ndarray":
+    """성별 표기 → Female / Male (모르는 값은 빈 문자열 → 어느 성별에도 안 들어감)."""
+    return s.astype(str).str.strip().str.lower().map(SEX_ALIASES).fillna("").to_numpy(dtype=str)
+
+
+def iter_chunks(
+    paths: Sequence[Path],
+    sex_column: str,
+    columns: Dict[str, str],
+    chunksize: int,
+) -> Iterator[Dict[str, "np.ndarray"]]:
+    """입력 파일들을 chunk 단위로 읽어 {"sex": ..., 항목: float 배열} 로 변환."""
+    usecols = [sex_column] + list(columns.values())
+    for path in paths:
+        rows = 0
+        for frame in _iter_frames(path, usecols, chunksize):
+            chunk = {"sex": _normalize_sex(frame[sex_column])}
+            for metric, col in columns.items():
+                chunk[metric] = pd.to_numeric(frame[col], errors="coerce").to_numpy(dtype=float)
+            rows += len(frame)
+            yield chunk
+        log.info("입력 읽기 완료: %s (%d행)", path, rows)
+
+
+# =========================
+# 빌드
+# =========================
+def accumulate(
+    chunks: Iterable[Dict[str, "np.ndarray"]],
+    estimator: str = "exact",
+    workers: int = 1,
+    decimals: int = 1,
+    compression: float = DEFAULT_COMPRESSION,
+) -> Dict[Key, object]:
+    """chunk 들을 (workers > 1 이면 프로세스 풀에서) 누적해 병합한 {(항목, 성별): 누적기}."""
+    totals: Dict[Key, object] = {}
+
+    def merge(part: dict) -> None:
+        for key, acc in part.items():
+            if key in totals:
+                totals[key].merge(acc)
+            else:
+                totals[key] = acc
+
+    if workers <= 1:
+        for chunk in chunks:
+            merge(_accumulate(chunk, estimator, decimals, compression))
+        return totals
+
+    # 읽기가 누적보다 빠르면 chunk 가 메모리에 쌓이므로 진행 중인 작업 수를 workers * 2 로 제한
+    max_pending = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in chunks:
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    merge(fut.result())
+            pending.add(pool.submit(_accumulate, chunk, estimator, decimals, compression))
+        for fut in pending:
+            merge(fut.result())
+    return totals
+
+
+def build_tables(
+    totals: Dict[Key, object],
+    grid: Sequence[float],
+    lower_is_better: Set[str],
+    min_count: int = 1,
+) -> Dict[str, "pd.DataFrame"]:
+    """누적 결과 → 엔진 형식. 낮을수록 좋은 항목은 상위 quantile q 에 하위 (1 - q) 값을 둔다."""
+    qs = np.asarray(grid, dtype=float)
+    engine = {}
+    for metric in ENGINE_METRICS:
+        cols = {}
+        for sex in ENGINE_SEXES:
+            acc = totals.get((metric, sex))
+            n = acc.count if acc is not None else 0
+            if acc is None or n < min_count:
+                raise ValueError(f"{metric}/{sex} 표본이 부족합니다: {n}건 (최소 {min_count}건)")
+            cols[sex] = acc.quantiles(1.0 - qs if metric in lower_is_better else qs)
+        engine[metric] = pd.DataFrame(cols, index=pd.Index(qs))
+    return validate_engine(engine)
+
+
+# =========================
+# 비교 리포트
+# =========================
+def _forward_quantile(table: "pd.DataFrame", sex: str, values) -> "np.ndarray":
+    """main.get_quantile_from_table 과 같은 보간 (값 → quantile)."""
+    q = table.index.to_numpy(dtype=float)
+    v = table[sex].to_numpy(dtype=float)
+    order = np.argsort(v)
+    return np.interp(values, v[order], q[order], left=0.0, right=1.0)
+
+
+def diff_report(new: Dict[str, "pd.DataFrame"], old: Optional[Dict[str, "pd.DataFrame"]]) -> dict:
+    """
+    (항목, 성별)마다
+      value_*       : 같은 quantile 에서 새 값 - 현재 값
+      quantile_*    : 새 기준의 q 지점 값을 현재 엔진에 넣었을 때 나오는 quantile - q (같은 기록의 평가가 얼마나 바뀌는지)
+      grade_shift_* : 위 quantile 이동을 등급 수로 환산
+    """
+    report = {}
+    for metric in ENGINE_METRICS:
+        for sex in ENGINE_SEXES:
+            table = new[metric]
+            entry = {
+                "min": float(table[sex].min()),
+                "median": float(np.interp(0.5, table.index.to_numpy(dtype=float), table[sex].to_numpy(dtype=float))),
+                "max": float(table[sex].max()),
+            }
+            cur = old.get(metric) if old else None
+            if cur is not None and sex in cur.columns:
+                qs = table.index.to_numpy(dtype=float)
+                old_at = np.interp(qs, cur.index.to_numpy(dtype=float), cur[sex].to_numpy(dtype=float))
+                dv = table[sex].to_numpy(dtype=float) - old_at
+                dq = _forward_quantile(cur, sex, table[sex].to_numpy(dtype=float)) - qs
+                # 양 끝(q=0, 1)은 보간 범위 밖으로 잘려 항상 크게 나오므로 제외
+                inner = (qs > 0.0) & (qs < 1.0)
+                dq = dq[inner] if inner.any() else dq
+                entry.update(
+                    value_mean_abs=round(float(np.abs(dv).mean()), 4),
+                    value_max_abs=round(float(np.abs(dv).max()), 4),
+                    quantile_mean_abs=round(float(np.abs(dq).mean()), 4),
+                    quantile_max_abs=round(float(np.abs(dq).max()), 4),
+                    grade_shift_max=round(float(np.abs(dq).max() * N_GRADES), 2),
+                    direction_changed=higher_is_better(table, sex) != higher_is_better(cur, sex),
+                )
+            report[f"{metric}/{sex}"] = entry
+    return report
+
+
+# =========================
+# CLI
+# =========================
+def _load_current(path: Path) -> Optional[Dict[str, "pd.DataFrame"]]:
+    if not path.exists():
+        return None
+    try:
+        return validate_engine(joblib.load(str(path)))
+    except Exception as e:
+        log.warning("현재 엔진을 읽지 못해 비교를 건너뜁니다 (%s): %s", path, e)
+        return None
+
+
+def _write_engine(engine: Dict[str, "pd.DataFrame"], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    joblib.dump(engine, str(tmp))
+    # 다시 읽어서 서버와 같은 검증을 통과하는지 확인한 뒤 교체
+    validate_engine(joblib.load(str(tmp)))
+    os.replace(tmp, path)
+
+
+def _parse_columns(items: Sequence[str]) -> Dict[str, str]:
+    columns = {m: m for m in ENGINE_METRICS}
+    for item in items:
+        metric, sep, col = item.partition("=")
+        if not sep or metric not in ENGINE_METRICS:
+            raise SystemExit(f"--column 은 항목=컬럼명 형식이어야 합니다 (항목: {ENGINE_METRICS}): {item}")
+        columns[metric] = col
+    return columns
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    base_dir = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description="원본 체력측정 기록으로 quantile 엔진(model.pkl) 재생성")
+    parser.add_argument("inputs", nargs="+", type=Path, help="CSV(.csv, .csv.gz) / Parquet 파일")
+    parser.add_argument("--output", type=Path, default=base_dir / "models" / "model.new.pkl")
+    parser.add_argument("--current", type=Path, default=base_dir / "models" / "model.pkl", help="비교할 현재 엔진")
+    parser.add_argument("--report", type=Path, help="비교 리포트 JSON 저장 경로 (없으면 stdout)")
+    parser.add_argument("--estimator", choices=("exact", "sketch"), default="exact")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    parser.add_argument("--decimals", type=int, default=1, help="exact: 값을 반올림할 소수 자릿수")
+    parser.add_argument("--compression", type=float, default=DEFAULT_COMPRESSION, help="sketch: t-digest compression")
+    parser.add_argument("--steps", type=int, help="quantile 격자 점 수 (없으면 현재 엔진의 격자, 그것도 없으면 101)")
+    parser.add_argument("--min-count", type=int, default=100, help="(항목, 성별)별 최소 표본 수")
+    parser.add_argument("--sex-column", default="sex")
+    parser.add_argument("--column", action="append", default=[], metavar="항목=컬럼명")
+    parser.add_argument(
+        "--lower-is-better", help="낮을수록 좋은 항목 (쉼표 구분). 없으면 현재 엔진의 방향을 따름"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="리포트만 만들고 엔진 파일은 쓰지 않음")
+    args = parser.parse_args(argv)
+
+    missing = [p for p in args.inputs if not p.exists()]
+    if missing:
+        raise SystemExit(f"입력 파일이 없습니다: {', '.join(map(str, missing))}")
+    columns = _parse_columns(args.column)
+    current = _load_current(args.current)
+
+    if args.steps:
+        grid = np.linspace(0.0, 1.0, args.steps)
+    elif current is not None:
+        grid = current[ENGINE_METRICS[0]].index.to_numpy(dtype=float)
+    else:
+        grid = np.linspace(0.0, 1.0, 101)
+
+    if args.lower_is_better is not None:
+        lower = {m.strip() for m in args.lower_is_better.split(",") if m.strip()}
+    elif current is not None:
+        lower = {m for m in ENGINE_METRICS if not higher_is_better(current[m], ENGINE_SEXES[1])}
+    else:
+        lower = set(DEFAULT_LOWER_IS_BETTER)
+
+    log.info(
+        "엔진 재생성 시작: 입력 %d개, estimator=%s, workers=%d, 낮을수록 좋은 항목=%s",
+        len(args.inputs), args.estimator, args.workers, sorted(lower),
+    )
+    totals = accumulate(
+        iter_chunks(args.inputs, args.sex_column, columns, args.chunksize),
+        estimator=args.estimator,
+        workers=args.workers,
+        decimals=args.decimals,
+        compression=args.compression,
+    )
+    engine = build_tables(totals, grid, lower, min_count=args.min_count)
+
+    report = {
+        "estimator": args.estimator,
+        "grid_points": len(grid),
+        "lower_is_better": sorted(lower),
+        "counts": {f"{m}/{s}": acc.count for (m, s), acc in sorted(totals.items())},
+        "compared_with": str(args.current) if current is not None else None,
+        "tables": diff_report(engine, current),
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.report:
+        args.report.write_text(text, encoding="utf-8")
+        log.info("비교 리포트 저장: %s", args.report)
+    else:
+        print(text)
+
+    if not args.dry_run:
+        _write_engine(engine, args.output)
+        log.info("엔진 저장: %s", args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+# backend/facility_sync.py
+# 클라이언트 오프라인 조회용 시설 데이터 동기화 (/facilities/snapshot, /facilities/delta)
+#
+# - 스냅샷: 클라이언트에 필요한 컬럼만 컬럼 단위 JSON
+#     {"version", "count", "columns": {"id": [...], "name": [...], ...}}
+#   행마다 키를 반복하지 않아 작고, 버전마다 한 번만 만들어 인코딩별 압축본까지 캐시
+# - 델타: 두 버전의 (id, 행 해시) 를 비교해 추가 / 변경된 행과 삭제된 id 만 전달
+#   공유 스냅샷에는 버전별 행 해시(HASH_KEY)를 같이 저장해 두므로 어느 워커든 이전 버전과 비교 가능.
+#   비교할 이전 버전이 남아 있지 않으면 None → 엔드포인트에서 410 (스냅샷을 다시 받도록)
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from lazy_imports import lazy_import
+import http_cache
+import metrics
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# FacilityOut 과 같은 컬럼 (클라이언트가 반경 검색 / 목록 표시에 쓰는 값만)
+SYNC_COLUMNS = ("id", "name", "lat", "lon", "address", "mission", "category")
+# 공유 스냅샷에 같이 저장하는 버전별 행 해시 배열 이름
+HASH_KEY = "_sync_hash"
+
+FACILITY_SYNC_REQUESTS = metrics.counter(
+    "facility_sync_requests_total", "시설 동기화 요청 수", ("kind", "result")
+)
+
+# version → (정렬된 id, 같은 순서의 행 해시)
+VersionIndex = Tuple["np.ndarray", "np.ndarray"]
+
+
+def row_hashes(frame: "pd.DataFrame") -> "np.ndarray":
+    """동기화 컬럼 기준 행 해시 (uint64). 값이 하나라도 바뀌면 해시가 바뀐다."""
+    return pd.util.hash_pandas_object(frame[list(SYNC_COLUMNS)], index=False).to_numpy(dtype=np.uint64)
+
+
+def _sorted_index(ids, hashes) -> VersionIndex:
+    ids = np.asarray(ids, dtype=np.int64)
+    order = np.argsort(ids, kind="stable")
+    return ids[order], np.asarray(hashes, dtype=np.uint64)[order]
+
+
+def diff(old: VersionIndex, new_ids, new_hashes) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    old(정렬된 id / 해시) 대비 new 의 변경분.
+    반환: (new 에서 추가 / 변경된 행 위치, 삭제된 id)
+    """
+    old_ids, old_hashes = old
+    new_ids = np.asarray(new_ids, dtype=np.int64)
+    if len(old_ids) == 0:
+        return np.arange(len(new_ids)), old_ids
+    pos = np.minimum(np.searchsorted(old_ids, new_ids), len(old_ids) - 1)
+    unchanged = (old_ids[pos] == new_ids) & (old_hashes[pos] == np.asarray(new_hashes, dtype=np.uint64))
+    deleted = np.setdiff1d(old_ids, new_ids, assume_unique=True)
+    return np.flatnonzero(~unchanged), deleted
+
+
+def columns_payload(frame: "pd.DataFrame") -> Dict[str, list]:
+    return {col: frame[col].tolist() for col in SYNC_COLUMNS}
+
+
+class Payload:
+    """직렬화한 응답 본문 + 인코딩별 압축본 (처음 요청될 때 한 번만 압축)."""
+
+    def __init__(self, doc: dict):
+        self.body = json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        if encoding is None or len(self.body) < http_cache.COMPRESS_MIN_BYTES:
+            return self.body, None
+        with self._lock:
+            data = self._encoded.get(encoding)
+            if data is None:
+                data = self._encoded[encoding] = http_cache.compress(self.body, encoding)
+        return data, encoding
+
+
+class FacilitySync:
+    def __init__(
+        self,
+        make_frame: Callable[["pd.DataFrame"], "pd.DataFrame"],
+        load_version: Callable[[str], Optional[VersionIndex]],
+        max_payloads: int = 16,
+        max_versions: int = 8,
+    ):
+        """
+        make_frame(df)         : 시설 DataFrame → SYNC_COLUMNS 컬럼 DataFrame
+        load_version(version)  : 현재가 아닌 이전 버전의 (id, 행 해시). 없으면 None
+        """
+        self._make_frame = make_frame
+        self._load_version = load_version
+        self.max_payloads = max_payloads
+        self.max_versions = max_versions
+
+        self._lock = threading.Lock()
+        # 현재 버전의 동기화용 컬럼 / 해시 (버전이 바뀔 때만 다시 만듦)
+        self._current: Optional[Tuple[str, "pd.DataFrame", "np.ndarray"]] = None
+        self._versions: "OrderedDict[str, VersionIndex]" = OrderedDict()
+        self._payloads: "OrderedDict[tuple, Payload]" = OrderedDict()
+
+    def _frame(self, version: str, df: "pd.DataFrame") -> Tuple["pd.DataFrame", "np.ndarray"]:
+        with self._lock:
+            cur = self._current
+            if cur is not None and cur[0] == version:
+                return cur[1], cur[2]
+            frame = self._make_frame(df)
+            hashes = row_hashes(frame)
+            self._current = (version, frame, hashes)
+            self._remember(version, _sorted_index(frame["id"].to_numpy(), hashes))
+            return frame, hashes
+
+    def _remember(self, version: str, index: VersionIndex) -> None:
+        self._versions[version] = index
+        self._versions.move_to_end(version)
+        while len(self._versions) > self.max_versions:
+            self._versions.popitem(last=False)
+
+    def _version_index(self, version: str) -> Optional[VersionIndex]:
+        with self._lock:
+            index = self._versions.get(version)
+            if index is not None:
+                self._versions.move_to_end(version)
+                return index
+        loaded = self._load_version(version)
+        if loaded is None:
+            return None
+        index = _sorted_index(*loaded)
+        with self._lock:
+            self._remember(version, index)
+        return index
+
+    def _cached(self, key: tuple, build: Callable[[], dict]) -> Payload:
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+                return payload
+        payload = Payload(build())
+        with self._lock:
+            self._payloads[key] = payload
+            while len(self._payloads) > self.max_payloads:
+                self._payloads.popitem(last=False)
+        return payload
+
+    def snapshot(self, version: str, df: "pd.DataFrame") -> Payload:
+        frame, _ = self._frame(version, df)
+        FACILITY_SYNC_REQUESTS.inc(kind="snapshot", result="full")
+        return self._cached(
+            ("snapshot", version),
+            lambda: {"version": version, "count": len(frame), "columns": columns_payload(frame)},
+        )
+
+    def delta(self, since: str, version: str, df: "pd.DataFrame") -> Optional[Payload]:
+        """since → version 변경분. since 버전을 더 이상 알 수 없으면 None."""
+        frame, hashes = self._frame(version, df)
+        if since == version:
+            FACILITY_SYNC_REQUESTS.inc(kind="delta", result="unchanged")
+            return self._cached(("delta", since, version), lambda: _delta_doc(since, version, frame.iloc[:0], []))
+
+        old = self._version_index(since)
+        if old is None:
+            FACILITY_SYNC_REQUESTS.inc(kind="delta", result="gone")
+            return None
+
+        def build() -> dict:
+            changed, deleted = diff(old, frame["id"].to_numpy(), hashes)
+            return _delta_doc(since, version, frame.iloc[changed], deleted.tolist())
+
+        FACILITY_SYNC_REQUESTS.inc(kind="delta", result="delta")
+        return self._cached(("delta", since, version), build)
+
+
+def _delta_doc(since: str, version: str, upserts: "pd.DataFrame", deleted: List[int]) -> dict:
+    return {
+        "since": since,
+        "version": version,
+        "upserts": {"count": len(upserts), "columns": columns_payload(upserts)},
+        "deleted": deleted,
+    }
@@ -0,0 +1,109 @@
+# backend/favorites_cache.py
+# 사용자별 즐겨찾기 캐시
+#
+# - 사용자별 facility_id 집합을 처음 한 번만 Supabase 에서 읽어 옴
+# - /favorites/toggle, /favorites/bulk 가 성공하면 집합을 바로 갱신 (write-through).
+#   다른 워커의 캐시는 cache_invalidation 으로 무효화 (main.py)
+# - 응답용 시설 리스트는 집합이 바뀔 때만 다시 만들고, 그 외에는 만들어 둔 것을 그대로 반환
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Set
+
+import metrics
+from singleflight import SingleFlight
+
+FAVORITES_CACHE_REQUESTS = metrics.counter(
+    "favorites_cache_requests_total", "즐겨찾기 캐시 조회 수 (hit / miss)", ("result",)
+)
+
+
+class _Entry:
+    __slots__ = ("loaded_at", "ids", "materialized")
+
+    def __init__(self, loaded_at: float, ids: Set[int]):
+        self.loaded_at = loaded_at
+        self.ids = ids
+        self.materialized: Optional[list] = None
+
+
+class FavoritesCache:
+    def __init__(
+        self,
+        loader: Callable[[str], Iterable[int]],
+        materialize: Callable[[Set[int]], list],
+        ttl: float = 600.0,
+        max_users: int = 10000,
+    ):
+        """
+        loader(user_id)      : 해당 사용자의 facility_id 목록
+        materialize(ids)     : facility_id 집합 → 응답용 시설 리스트
+        """
+        self._loader = loader
+        self._materialize = materialize
+        self.ttl = ttl
+        self.max_users = max_users
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight("favorites")
+
+    def _entry(self, user_id: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry.loaded_at < self.ttl:
+                self._entries.move_to_end(user_id)
+                FAVORITES_CACHE_REQUESTS.inc(result="hit")
+                return entry
+
+        FAVORITES_CACHE_REQUESTS.inc(result="miss")
+        return self._flight.do(user_id, lambda: self._load(user_id))
+
+    def _load(self, user_id: str) -> _Entry:
+        ids = {int(i) for i in self._loader(user_id)}
+        entry = _Entry(time.monotonic(), ids)
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_ids(self, user_id: str) -> Set[int]:
+        return set(self._entry(user_id).ids)
+
+    def get_facilities(self, user_id: str) -> list:
+        entry = self._entry(user_id)
+        with self._lock:
+            if entry.materialized is not None:
+                return entry.materialized
+            ids = set(entry.ids)
+        materialized = self._materialize(ids)
+        with self._lock:
+            # 만드는 사이에 집합이 바뀌지 않았을 때만 저장
+            if entry.ids == ids:
+                entry.materialized = materialized
+        return materialized
+
+    def apply(self, user_id: str, added: Iterable[int] = (), removed: Iterable[int] = ()) -> None:
+        """Supabase 반영이 끝난 변경분을 캐시에 write-through."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            new_ids = (entry.ids | {int(i) for i in added}) - {int(i) for i in removed}
+            if new_ids != entry.ids:
+                entry.ids = new_ids
+                entry.materialized = None
+
+    def invalidate(self, user_id: str) -> None:
+        """다른 워커에서 바뀐 사용자 → 다음 조회 때 Supabase 에서 다시 읽음."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def reset_materialized(self) -> None:
+        """시설 데이터가 다시 로드됐을 때 만들어 둔 리스트를 모두 폐기."""
+        with self._lock:
+            for entry in self._entries.values():
+                entry.materialized = None
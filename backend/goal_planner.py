@@ -0,0 +1,176 @@
+# backend/goal_planner.py
+# 목표 등급까지 항목별로 얼마나 더 해야 하는지 (/predict/physical-age/goals)
+#
+# - 등급은 4개 항목 quantile 평균 avg 로 정해진다 (main.quantile_to_grade: level = int(avg * n_grades))
+#   → level k 이상이 되려면 avg >= t_k. 한 항목 m 만 올린다면 그 항목 quantile 이
+#       r[m, k] = t_k * M - (나머지 항목 quantile 합)
+#     이 되어야 하고, 엔진 표를 거꾸로(quantile → 값) 읽으면 필요한 기록이 나온다
+# - 역방향 표는 엔진을 읽을 때 한 번 만든다 (성별마다 항목 4개를 quantile 축에 2 씩 띄워 이어 붙인 배열).
+#   요청마다 np.interp 한 번으로 (항목 × 목표 등급) 전체를 계산
+# - 정방향은 main.get_quantile_from_table 과 같은 보간(값 정렬 후 np.interp, 범위 밖 0 / 1).
+#   역방향은 그 보간이 q 에 도달하는 "가장 덜 좋은" 값 → 계산한 기록을 측정 단위로 올림한 뒤
+#   정방향으로 다시 넣어 목표 등급이 나오는지 확인 (부동소수점 경계에서 한 단위 더)
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+# 항목별 기록 단위 (소수 자릿수). 필요한 기록은 이 단위로 "좋은 쪽" 으로 올림
+METRIC_DECIMALS = {"sit_ups": 0, "flexibility": 1, "jump_power": 1, "cardio_endurance": 1}
+# 역방향 표를 이어 붙일 때 항목 사이 간격 (quantile 은 0~1 이라 2 면 겹치지 않음)
+_SPAN = 2.0
+
+
+def level_thresholds(n_grades: int) -> List[float]:
+    """level k (1..n-1) 가 되는 최소 평균 quantile: int(t * n) >= k 인 가장 작은 t."""
+    out = []
+    for k in range(1, n_grades):
+        t = k / n_grades
+        while int(t * n_grades) < k:
+            t = float(np.nextafter(t, 2.0))
+        out.append(t)
+    return out
+
+
+@dataclass
+class _SexTables:
+    metrics: List[str]
+    better: "np.ndarray"        # 항목별 +1 (클수록 좋음) / -1 (작을수록 좋음)
+    q_max: "np.ndarray"         # 항목별 도달 가능한 최대 quantile
+    q_min: "np.ndarray"
+    steps: "np.ndarray"         # 항목별 기록 단위
+    inv_q: "np.ndarray"         # 역방향: 항목 i 는 quantile + i * _SPAN
+    inv_v: "np.ndarray"
+    forward: Dict[str, tuple]   # 항목 → (정렬된 값, 그 값의 quantile)
+
+
+class GoalTables:
+    def __init__(self, engine: Dict[str, "object"], metrics: Sequence[str], n_grades: int):
+        """engine: load_engine() 결과 {항목: DataFrame(index=quantile, columns=[Female, Male])}."""
+        self.metrics = list(metrics)
+        self.n_grades = n_grades
+        self.thresholds = np.array(level_thresholds(n_grades))
+        sexes = set.intersection(*(set(engine[m].columns) for m in self.metrics))
+        self._by_sex = {sex: self._build(engine, sex) for sex in sorted(sexes)}
+
+    def _build(self, engine, sex: str) -> _SexTables:
+        better, q_max, q_min, steps, inv_q, inv_v, forward = [], [], [], [], [], [], {}
+        for i, metric in enumerate(self.metrics):
+            df = engine[metric]
+            q = df.index.to_numpy(dtype=float)
+            v = df[sex].to_numpy(dtype=float)
+            # get_quantile_from_table 과 같은 정렬
+            order = np.argsort(v)
+            v_sorted, q_sorted = v[order], q[order]
+            forward[metric] = (v_sorted, q_sorted)
+
+            sign = 1.0 if v[-1] >= v[0] else -1.0
+            # quantile 이 커지는 방향으로 세운 뒤, 같은 quantile 은 처음(덜 좋은 값) 것만 남긴다
+            qo, vo = (q_sorted, v_sorted) if sign > 0 else (q_sorted[::-1], v_sorted[::-1])
+            qo = np.maximum.accumulate(qo)
+            qo, first = np.unique(qo, return_index=True)
+            vo = vo[first]
+
+            better.append(sign)
+            q_max.append(qo[-1])
+            q_min.append(qo[0])
+            steps.append(10.0 ** -METRIC_DECIMALS.get(metric, 1))
+            inv_q.append(qo + i * _SPAN)
+            inv_v.append(vo)
+        return _SexTables(
+            metrics=self.metrics,
+            better=np.array(better),
+            q_max=np.array(q_max),
+            q_min=np.array(q_min),
+            steps=np.array(steps),
+            inv_q=np.concatenate(inv_q),
+            inv_v=np.concatenate(inv_v),
+            forward=forward,
+        )
+
+    def has_sex(self, sex: str) -> bool:
+        return sex in self._by_sex
+
+    def _forward(self, t: _SexTables, values: "np.ndarray") -> "np.ndarray":
+        """values[i, :] (항목 i 의 기록들) → quantile. get_quantile_from_table 과 같은 계산."""
+        out = np.empty_like(values)
+        for i, metric in enumerate(t.metrics):
+            v_sorted, q_sorted = t.forward[metric]
+            out[i] = np.interp(values[i], v_sorted, q_sorted, left=0.0, right=1.0)
+        return out
+
+    def plan(self, sex: str, values: Dict[str, float], quantiles: Dict[str, float]) -> dict:
+        """
+        현재 기록 / quantile(compute_physical_age_quantiles 결과) → 목표 level 별 항목별 필요 기록.
+        반환:
+          level        : 현재 level (int(avg * n_grades), 최대 n-1)
+          targets      : 목표 level 배열 (level+1 .. n-1)
+          required_avg : 목표별 최소 평균 quantile
+          required_q   : (항목 × 목표) 필요한 항목 quantile
+          value        : (항목 × 목표) 필요한 기록 (도달 불가면 nan)
+        """
+        t = self._by_sex[sex]
+        M = len(t.metrics)
+        cur_v = np.array([float(values[m]) for m in t.metrics])
+        cur_q = np.array([float(quantiles[m]) for m in t.metrics])
+        avg = float(np.mean(cur_q))
+        level = min(int(float(np.clip(avg, 0.0, 1.0)) * self.n_grades), self.n_grades - 1)
+
+        targets = np.arange(level + 1, self.n_grades)
+        required_avg = self.thresholds[targets - 1]
+        others = cur_q.sum() - cur_q                                   # (M,)
+        required_q = required_avg[None, :] * M - others[:, None]      # (M, K)
+        reachable = required_q <= t.q_max[:, None]
+
+        # 역방향 보간 한 번으로 (항목 × 목표) 전체
+        offsets = (np.arange(M) * _SPAN)[:, None]
+        query = np.clip(required_q, t.q_min[:, None], t.q_max[:, None]) + offsets
+        need = np.interp(query, t.inv_q, t.inv_v)
+
+        # 측정 단위로 좋은 쪽 올림 (현재 기록보다 나빠지지는 않게)
+        sign, step = t.better[:, None], t.steps[:, None]
+        need = sign * np.ceil(np.round(sign * need / step, 6)) * step
+        need = sign * np.maximum(sign * need, sign * cur_v[:, None])
+
+        # 정방향으로 다시 넣어 목표 level 이 되는지 확인, 부동소수점 경계면 한 단위 더
+        for attempt in range(3):
+            new_avg = (others[:, None] + self._forward(t, need)) / M
+            ok = (new_avg * self.n_grades).astype(int) >= targets[None, :]
+            if (ok | ~reachable).all() or attempt == 2:
+                break
+            need = np.where(ok, need, need + sign * step)
+        reachable &= ok
+
+        return {
+            "level": level,
+            "targets": targets,
+            "required_avg": required_avg,
+            "required_q": required_q,
+            "value": np.where(reachable, need, np.nan),
+            "current_value": cur_v,
+            "better": t.better,
+        }
+
+
+def metric_goals(plan: dict, metrics: Sequence[str], k: int) -> List[dict]:
+    """plan() 결과의 목표 k 번째 열 → 항목별 dict (도달 불가 항목은 required_value=None)."""
+    out = []
+    for i, metric in enumerate(metrics):
+        v = plan["value"][i, k]
+        reachable = not np.isnan(v)
+        decimals = METRIC_DECIMALS.get(metric, 1)
+        out.append({
+            "metric": metric,
+            "current_value": float(plan["current_value"][i]),
+            "required_quantile": round(float(min(plan["required_q"][i, k], 1.0)), 4),
+            "required_value": round(float(v), decimals) if reachable else None,
+            "improvement": (
+                round(float(plan["better"][i] * (v - plan["current_value"][i])), decimals) if reachable else None
+            ),
+        })
+    return out
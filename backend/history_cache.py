@@ -0,0 +1,115 @@
+# backend/history_cache.py
+# 사용자별 최근 신체나이 기록 read-through 캐시
+#
+# - 사용자마다 measured_at 내림차순 최근 depth 건을 보관
+# - /latest 는 리스트의 첫 원소, /history?limit=N (N <= depth) 은 앞 N 건
+# - 새 assessment 가 저장되면(write-through) 캐시 리스트 앞에 끼워 넣음
+# - TTL 은 다른 경로(직접 DB 수정 등)로 바뀐 데이터를 위한 안전망
+# - 같은 사용자의 캐시 미스가 몰려도 Supabase 조회는 한 번만 (single-flight)
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+import metrics
+from singleflight import SingleFlight
+
+CACHE_REQUESTS = metrics.counter(
+    "physical_age_cache_requests_total",
+    "신체나이 기록 캐시 조회 수 (hit / miss / bypass)",
+    ("result",),
+)
+CACHE_USERS = metrics.gauge("physical_age_cache_users", "캐시에 올라와 있는 사용자 수")
+
+
+def _sort_key(row: dict) -> Tuple[str, int]:
+    return (str(row.get("measured_at") or ""), int(row.get("id") or 0))
+
+
+class UserHistoryCache:
+    def __init__(
+        self,
+        loader: Callable[[str, int], List[dict]],
+        depth: int = 50,
+        ttl: float = 300.0,
+        max_users: int = 10000,
+    ):
+        """loader(user_id, limit) 는 measured_at 내림차순 row 리스트를 반환해야 한다."""
+        self._loader = loader
+        self.depth = depth
+        self.ttl = ttl
+        self.max_users = max_users
+
+        # user_id -> (loaded_at, rows)
+        self._entries: "OrderedDict[str, Tuple[float, List[dict]]]" = OrderedDict()
+        # 로딩 중에 write-through 로 들어온 row (로딩 결과에 합쳐야 함)
+        self._late_rows: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight("physical_age_history")
+
+        CACHE_USERS.set_function(lambda: len(self._entries))
+
+    def get(self, user_id: str, limit: int) -> List[dict]:
+        if limit > self.depth:
+            # 캐시 깊이보다 많이 달라는 요청은 그대로 통과
+            CACHE_REQUESTS.inc(result="bypass")
+            return self._flight.do(("bypass", user_id, limit), lambda: self._loader(user_id, limit))
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(user_id)
+                CACHE_REQUESTS.inc(result="hit")
+                return list(entry[1][:limit])
+
+        CACHE_REQUESTS.inc(result="miss")
+        rows = self._flight.do(user_id, lambda: self._load(user_id))
+        return list(rows[:limit])
+
+    def _load(self, user_id: str) -> List[dict]:
+        with self._lock:
+            self._late_rows[user_id] = []
+        try:
+            rows = list(self._loader(user_id, self.depth))
+        except Exception:
+            with self._lock:
+                self._late_rows.pop(user_id, None)
+            raise
+
+        with self._lock:
+            late = self._late_rows.pop(user_id, [])
+            rows = self._merge(rows, late)
+            self._entries[user_id] = (time.monotonic(), rows)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return rows
+
+    def _merge(self, rows: List[dict], new_rows: List[dict]) -> List[dict]:
+        if not new_rows:
+            return rows
+        known_ids = {r.get("id") for r in rows}
+        merged = rows + [r for r in new_rows if r.get("id") not in known_ids]
+        merged.sort(key=_sort_key, reverse=True)
+        return merged[: self.depth]
+
+    def push(self, user_id: str, row: dict) -> None:
+        """
+        새로 저장된 row 를 캐시에 반영 (write-through).
+        캐시에 없는 사용자는 다음 조회 때 DB 에서 읽어 오므로 무시.
+        """
+        if not isinstance(row, dict) or row.get("id") is None:
+            return
+        with self._lock:
+            if user_id in self._late_rows:
+                self._late_rows[user_id].append(row)
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            loaded_at, rows = entry
+            self._entries[user_id] = (loaded_at, self._merge(rows, [row]))
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
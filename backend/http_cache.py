@@ -0,0 +1,231 @@
+# backend/http_cache.py
+# 응답 압축(br / gzip 협상) + ETag / 조건부 GET(304)
+#
+# - CompressionMiddleware: 지정한 경로의 JSON 응답이 minimum_size 이상이고 클라이언트가 받을 수 있으면
+#   br(brotli 설치 시) > gzip 순으로 압축. ETag 가 있으면 인코딩별로 구분되게 "-br" / "-gzip" 을 붙인다.
+# - ContentETagMiddleware: 지정한 경로의 200 응답 본문 해시로 strong ETag 를 만들고,
+#   If-None-Match 가 맞으면 본문 없이 304. (계산은 하지만 전송량을 줄임 — 경로 응답용)
+# - make_etag / etag_matches: 데이터 버전 + 쿼리로 계산 전에 ETag 를 만드는 엔드포인트용 (시설 응답)
+
+import gzip
+import hashlib
+import os
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli 가 없으면 gzip 만 협상
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+# 동적 응답이라 압축률보다 속도 (11 은 정적 파일용)
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+COMPRESSED_RESPONSES = metrics.counter(
+    "http_compressed_responses_total", "압축 여부별 응답 수", ("encoding",)
+)
+COMPRESSION_BYTES = metrics.counter(
+    "http_compression_bytes_total", "압축 전 / 후 응답 바이트", ("stage",)
+)
+NOT_MODIFIED = metrics.counter(
+    "http_not_modified_total", "If-None-Match 일치로 304 를 돌려준 수", ("route",)
+)
+
+_ENCODING_SUFFIXES = ("-br", "-gzip")
+
+
+# =========================
+# ETag
+# =========================
+def make_etag(*parts: object) -> str:
+    """버전 / 경로 / 정규화한 쿼리 등으로 strong ETag 생성."""
+    h = hashlib.sha1()
+    for p in parts:
+        h.update(str(p).encode("utf-8"))
+        h.update(b"\x00")
+    return f'"{h.hexdigest()[:32]}"'
+
+
+def normalized_query(items: Iterable[Tuple[str, str]]) -> str:
+    return "&".join(f"{k}={v}" for k, v in sorted(items))
+
+
+def _strip(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for suffix in _ENCODING_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)]
+    return tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 비교 (weak 비교, 압축 인코딩 접미사는 무시)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = _strip(etag)
+    return any(_strip(t) == target for t in if_none_match.split(","))
+
+
+# =========================
+# ASGI 공통
+# =========================
+def _header(scope, name: bytes) -> Optional[str]:
+    for k, v in scope["headers"]:
+        if k == name:
+            return v.decode("latin-1")
+    return None
+
+
+def _path_matches(path: str, prefixes: Sequence[str]) -> bool:
+    return any(path == p or path.startswith(p.rstrip("/") + "/") or path.startswith(p + "?") for p in prefixes)
+
+
+async def _buffer_response(app, scope, receive) -> Tuple[dict, bytes, list]:
+    """응답을 끝까지 받아 (start 메시지, 본문, trailing 메시지들) 로 반환."""
+    start: dict = {}
+    chunks: List[bytes] = []
+    extra: list = []
+
+    async def send(message):
+        nonlocal start
+        if message["type"] == "http.response.start":
+            start = message
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+        else:
+            extra.append(message)
+
+    await app(scope, receive, send)
+    return start, b"".join(chunks), extra
+
+
+def _set_header(headers: list, name: bytes, value: bytes) -> list:
+    out = [(k, v) for k, v in headers if k.lower() != name]
+    out.append((name, value))
+    return out
+
+
+def _get_header(headers: list, name: bytes) -> Optional[bytes]:
+    for k, v in headers:
+        if k.lower() == name:
+            return v
+    return None
+
+
+def choose_encoding(accept: Optional[str]) -> Optional[str]:
+    if not accept:
+        return None
+    offered = {}
+    for part in accept.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[token.strip().lower()] = q
+    for enc in ("br", "gzip"):
+        if enc == "br" and brotli is None:
+            continue
+        if offered.get(enc, offered.get("*", 0.0)) > 0:
+            return enc
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+# =========================
+# 미들웨어
+# =========================
+class CompressionMiddleware:
+    def __init__(self, app, paths: Sequence[str], minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.paths = tuple(paths)
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _path_matches(scope["path"], self.paths):
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(_header(scope, b"accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start, body, extra = await _buffer_response(self.app, scope, receive)
+        headers = list(start.get("headers", []))
+        headers = _set_header(headers, b"vary", b"Accept-Encoding")
+        content_type = (_get_header(headers, b"content-type") or b"").lower()
+        compressible = (
+            start.get("status") == 200
+            and len(body) >= self.minimum_size
+            and _get_header(headers, b"content-encoding") is None
+            and (b"json" in content_type or content_type.startswith(b"text/"))
+        )
+        if compressible:
+            compressed = compress(body, encoding)
+            COMPRESSION_BYTES.inc(len(body), stage="original")
+            COMPRESSION_BYTES.inc(len(compressed), stage="compressed")
+            COMPRESSED_RESPONSES.inc(encoding=encoding)
+            body = compressed
+            headers = _set_header(headers, b"content-encoding", encoding.encode("ascii"))
+            headers = _set_header(headers, b"content-length", str(len(body)).encode("ascii"))
+            etag = _get_header(headers, b"etag")
+            if etag is not None and etag.endswith(b'"'):
+                headers = _set_header(headers, b"etag", etag[:-1] + f"-{encoding}".encode("ascii") + b'"')
+        else:
+            COMPRESSED_RESPONSES.inc(encoding="identity")
+
+        await send({**start, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+        for message in extra:
+            await send(message)
+
+
+class ContentETagMiddleware:
+    """본문 해시 ETag + If-None-Match 304 (GET 200 응답만)."""
+
+    def __init__(self, app, paths: Sequence[str]):
+        self.app = app
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not _path_matches(scope["path"], self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        start, body, extra = await _buffer_response(self.app, scope, receive)
+        headers = list(start.get("headers", []))
+        if start.get("status") == 200 and _get_header(headers, b"etag") is None:
+            etag = f'"{hashlib.sha1(body).hexdigest()[:32]}"'
+            headers = _set_header(headers, b"etag", etag.encode("ascii"))
+            if etag_matches(_header(scope, b"if-none-match"), etag):
+                route = getattr(scope.get("route"), "path", scope["path"])
+                NOT_MODIFIED.inc(route=route)
+                headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"content-type")]
+                await send({"type": "http.response.start", "status": 304, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        await send({**start, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+        for message in extra:
+            await send(message)
@@ -0,0 +1,92 @@
+# backend/http_metrics.py
+# 엔드포인트별 지연 시간 히스토그램 / 처리 중 요청 수 (ASGI 미들웨어)
+#
+# 라벨의 route 는 실제 경로가 아니라 라우트 템플릿(/users/{user_id}/...)이라
+# 사용자 id 등으로 시계열이 늘어나지 않는다. 매칭되는 라우트가 없으면 "unmatched".
+# include_router 로 붙인 라우터는 FastAPI 버전에 따라 path 없는 라우트 하나로 들어 있으므로
+# 안쪽 라우트(prefix 가 붙은 경로)까지 따라 들어가 찾는다.
+
+import time
+from typing import Optional
+
+from starlette.routing import Match
+
+import metrics
+
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "엔드포인트별 응답 시간", ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = metrics.gauge(
+    "http_requests_in_flight", "엔드포인트별 처리 중인 요청 수", ("route",)
+)
+
+
+def route_template(scope) -> str:
+    """요청 scope 의 라우트 템플릿 (미들웨어 여러 개가 부르므로 scope 에 한 번만 계산해 둔다)."""
+    cached = scope.get("route_template")
+    if cached is None:
+        cached = scope["route_template"] = _match_route(scope)
+    return cached
+
+
+def _match_route(scope) -> str:
+    router = getattr(scope.get("app"), "router", None)
+    if router is None:
+        return "unmatched"
+    return _match_routes(router.routes, scope) or "unmatched"
+
+
+def _match_routes(routes, scope) -> Optional[str]:
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.NONE:
+            continue
+        path = getattr(route, "path", None)
+        if path is None:
+            # include_router 로 붙은 라우터 (path 없음) → prefix 가 붙은 안쪽 라우트에서 다시 매칭
+            path = _match_routes(_included_routes(route), scope)
+        if match == Match.FULL and path is not None:
+            return path
+        if partial is None:
+            partial = path   # 경로는 맞고 메서드만 다른 경우 (405)
+    return partial
+
+
+def _included_routes(route) -> list:
+    contexts = getattr(route, "effective_route_contexts", None)
+    if contexts is not None:
+        return list(contexts())
+    return getattr(route, "routes", None) or getattr(getattr(route, "router", None), "routes", None) or []
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope)
+        status = "500"   # 응답 시작 전에 예외가 나면 500 으로 기록
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(route=route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(route=route)
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=route,
+                status=status,
+            )
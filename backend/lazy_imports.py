@@ -0,0 +1,44 @@
+# backend/lazy_imports.py
+# 무거운 모듈(pandas / numpy / joblib)을 처음 실제로 쓸 때 import 하기 위한 프록시
+#
+#   pd = lazy_import("pandas")   # 여기서는 import 하지 않음
+#   pd.DataFrame(...)            # 첫 속성 접근 시 import
+#
+# 타입 힌트에 pd.DataFrame 등을 쓰는 모듈은 `from __future__ import annotations` 로
+# 어노테이션 평가를 미뤄야 import 시점에 로딩되지 않는다.
+
+import importlib
+import threading
+from types import ModuleType
+
+
+class LazyModule:
+    def __init__(self, name: str):
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_lazy_name"])
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__["_lazy_module"] is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<lazy module {self.__dict__['_lazy_name']!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
@@ -0,0 +1,239 @@
+# backend/leaderboard.py
+# 크루 리더보드 (routers/crew.py)
+#
+# - 크루 × 보드(improvement / missions)마다 SortedList[(-점수, user_id)] 하나
+#   점수 변경 = remove + add (O(log n)), 순위 = bisect (O(log n)), top-K = 앞에서 K개 (O(log n + K))
+#   요청마다 크루원 전체를 정렬하지 않는다
+# - 점수는 사용자 단위로 한 벌만 들고 있고, 사용자가 속한 모든 크루의 보드에 같은 값으로 반영
+#     improvement : 첫 측정 대비 신체나이(lo_age_value) 감소량 (사용자 요약 갱신 시)
+#     missions    : 완료(status=completed) 미션 수 (/mission/complete 시 +1)
+# - rebuild(): Supabase 에서 읽은 멤버십 / 점수로 새 구조를 만든 뒤 통째로 교체.
+#   만드는 동안 들어온 갱신은 모아 두었다가 교체 직후 다시 적용. 재구성끼리는 겹치지 않음 (_rebuild_lock)
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sortedcontainers import SortedList
+
+import applog
+import metrics
+
+log = applog.get_logger("leaderboard")
+
+BOARDS = ("improvement", "missions")
+
+LEADERBOARD_UPDATES = metrics.counter(
+    "crew_leaderboard_updates_total", "크루 리더보드 점수 갱신 수", ("board",)
+)
+LEADERBOARD_MEMBERS = metrics.gauge("crew_leaderboard_members", "리더보드에 올라와 있는 (크루, 사용자) 수")
+
+
+def improvement_from_summary(summary: Optional[dict]) -> Optional[float]:
+    """사용자 요약 → 첫 측정 대비 신체나이 감소량 (클수록 좋아짐). 계산할 수 없으면 None."""
+    if not summary:
+        return None
+    first = (summary.get("first") or {}).get("lo_age_value")
+    latest = (summary.get("latest") or {}).get("lo_age_value")
+    if first is None or latest is None:
+        return None
+    return float(first) - float(latest)
+
+
+class Leaderboard:
+    """보드 하나: user_id → 점수, 점수 내림차순 정렬 목록."""
+
+    __slots__ = ("_scores", "_order")
+
+    def __init__(self):
+        self._scores: Dict[str, float] = {}
+        self._order = SortedList()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def set(self, user_id: str, score: float) -> None:
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self._order.remove((-old, user_id))
+        self._scores[user_id] = score
+        self._order.add((-score, user_id))
+
+    def remove(self, user_id: str) -> None:
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            self._order.remove((-old, user_id))
+
+    def users(self) -> Iterable[str]:
+        return self._scores.keys()
+
+    def score(self, user_id: str) -> Optional[float]:
+        return self._scores.get(user_id)
+
+    def rank_of_score(self, score: float) -> int:
+        """점수가 더 높은 사람 수 + 1 (동점은 같은 순위)."""
+        return self._order.bisect_left((-score, "")) + 1
+
+    def rank(self, user_id: str) -> Optional[int]:
+        score = self._scores.get(user_id)
+        return None if score is None else self.rank_of_score(score)
+
+    def top(self, k: int) -> List[Tuple[int, str, float]]:
+        return [(self.rank_of_score(-neg), user_id, -neg) for neg, user_id in self._order.islice(0, k)]
+
+
+def _add_member(
+    boards: Dict[int, Dict[str, Leaderboard]],
+    user_crews: Dict[str, Set[int]],
+    scores: Dict[str, Dict[str, float]],
+    crew_id: int,
+    user_id: str,
+) -> None:
+    crew = boards.get(crew_id)
+    if crew is None:
+        crew = boards[crew_id] = {b: Leaderboard() for b in BOARDS}
+    user_crews.setdefault(user_id, set()).add(crew_id)
+    for b in BOARDS:
+        crew[b].set(user_id, scores[b].get(user_id, 0.0))
+
+
+class CrewLeaderboards:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 재구성은 한 번에 하나만 (_replay 를 둘이 같이 쓰면 갱신이 사라짐)
+        self._rebuild_lock = threading.Lock()
+        self._boards: Dict[int, Dict[str, Leaderboard]] = {}    # crew_id → board → Leaderboard
+        self._user_crews: Dict[str, Set[int]] = {}               # user_id → crew_id 집합
+        self._scores: Dict[str, Dict[str, float]] = {b: {} for b in BOARDS}
+        # rebuild 중에 들어온 갱신 (교체 직후 다시 적용)
+        self._replay: Optional[List[Tuple[Callable, tuple]]] = None
+        LEADERBOARD_MEMBERS.set_function(lambda: sum(len(c) for c in self._user_crews.values()))
+
+    # ---------- 멤버십 ----------
+    def join(self, crew_id: int, user_id: str) -> None:
+        with self._lock:
+            self._join(crew_id, user_id)
+            self._defer(self._join, crew_id, user_id)
+
+    def _join(self, crew_id: int, user_id: str) -> None:
+        _add_member(self._boards, self._user_crews, self._scores, crew_id, user_id)
+
+    def leave(self, crew_id: int, user_id: str) -> None:
+        with self._lock:
+            self._leave(crew_id, user_id)
+            self._defer(self._leave, crew_id, user_id)
+
+    def _leave(self, crew_id: int, user_id: str) -> None:
+        boards = self._boards.get(crew_id)
+        if boards is not None:
+            for board in boards.values():
+                board.remove(user_id)
+            if not len(boards[BOARDS[0]]):
+                del self._boards[crew_id]
+        crews = self._user_crews.get(user_id)
+        if crews is not None:
+            crews.discard(crew_id)
+            if not crews:
+                del self._user_crews[user_id]
+
+    def members(self, crew_id: int) -> Optional[List[str]]:
+        with self._lock:
+            boards = self._boards.get(crew_id)
+            if boards is None:
+                return None
+            return sorted(boards[BOARDS[0]].users())
+
+    def crews_of(self, user_id: str) -> List[int]:
+        with self._lock:
+            return sorted(self._user_crews.get(user_id, ()))
+
+    # ---------- 점수 ----------
+    def set_score(self, board: str, user_id: str, score: float) -> None:
+        with self._lock:
+            self._set_score(board, user_id, score)
+            self._defer(self._set_score, board, user_id, score)
+        LEADERBOARD_UPDATES.inc(board=board)
+
+    def add_score(self, board: str, user_id: str, delta: float = 1.0) -> None:
+        with self._lock:
+            self._set_score(board, user_id, self._scores[board].get(user_id, 0.0) + delta)
+            self._defer(self._add_score, board, user_id, delta)
+        LEADERBOARD_UPDATES.inc(board=board)
+
+    def _add_score(self, board: str, user_id: str, delta: float) -> None:
+        self._set_score(board, user_id, self._scores[board].get(user_id, 0.0) + delta)
+
+    def _set_score(self, board: str, user_id: str, score: float) -> None:
+        self._scores[board][user_id] = score
+        for crew_id in self._user_crews.get(user_id, ()):
+            self._boards[crew_id][board].set(user_id, score)
+
+    def on_summary(self, user_id: str, summary: dict) -> None:
+        """사용자 요약이 갱신될 때 (UserSummaryStore listener)."""
+        value = improvement_from_summary(summary)
+        if value is not None:
+            self.set_score("improvement", user_id, value)
+
+    # ---------- 조회 (O(log n)) ----------
+    def _board(self, crew_id: int, board: str) -> Optional[Leaderboard]:
+        boards = self._boards.get(crew_id)
+        return None if boards is None else boards[board]
+
+    def top(self, crew_id: int, board: str, k: int) -> Optional[Tuple[int, List[Tuple[int, str, float]]]]:
+        """(크루원 수, [(순위, user_id, 점수)]). 없는 크루면 None."""
+        with self._lock:
+            lb = self._board(crew_id, board)
+            return None if lb is None else (len(lb), lb.top(k))
+
+    def rank(self, crew_id: int, board: str, user_id: str) -> Optional[Tuple[int, int, float]]:
+        """(순위, 크루원 수, 점수). 크루원이 아니면 None."""
+        with self._lock:
+            lb = self._board(crew_id, board)
+            if lb is None:
+                return None
+            rank = lb.rank(user_id)
+            return None if rank is None else (rank, len(lb), lb.score(user_id))
+
+    # ---------- 재구성 ----------
+    def _defer(self, fn: Callable, *args) -> None:
+        if self._replay is not None:
+            self._replay.append((fn, args))
+
+    def rebuild(
+        self,
+        load_members: Callable[[], Iterable[Tuple[int, str]]],
+        load_scores: Callable[[Set[str]], Dict[str, Dict[str, float]]],
+    ) -> int:
+        """
+        load_members()        : (crew_id, user_id) 전체
+        load_scores(user_ids) : {board: {user_id: 점수}}
+        새 구조를 만든 뒤 교체. 멤버십 수 반환. 다른 재구성이 진행 중이면 끝날 때까지 기다린다.
+        """
+        with self._rebuild_lock:
+            return self._rebuild(load_members, load_scores)
+
+    def _rebuild(self, load_members, load_scores) -> int:
+        with self._lock:
+            self._replay = []
+        try:
+            members = list(load_members())
+            scores = load_scores({user_id for _, user_id in members})
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+
+        boards: Dict[int, Dict[str, Leaderboard]] = {}
+        user_crews: Dict[str, Set[int]] = {}
+        fresh_scores = {b: dict(scores.get(b, {})) for b in BOARDS}
+        for crew_id, user_id in members:
+            _add_member(boards, user_crews, fresh_scores, crew_id, user_id)
+
+        with self._lock:
+            self._boards, self._user_crews, self._scores = boards, user_crews, fresh_scores
+            replay, self._replay = self._replay, None
+            for fn, args in replay:
+                fn(*args)
+        log.info("크루 리더보드 재구성: 크루 %d개, 멤버십 %d건", len(self._boards), len(members))
+        return len(members)
@@ -1,18 +1,33 @@
+from __future__ import annotations  # pd.DataFrame 등 어노테이션이 pandas import 를 일으키지 않도록
+
 from typing import Optional, Dict, List
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel, field_validator
 
-import numpy as np
-import pandas as pd
-import joblib
+from lazy_imports import lazy_import
 from pathlib import Path
+import base64
+import json
+import logging
 import math
+import mmap
 import os
+import re
+import threading
+import time
+import uuid
 import requests
-from datetime import datetime
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 
+# 무거운 라이브러리는 처음 쓰일 때 import (워커 기동 시간 단축)
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+joblib = lazy_import("joblib")
+
 # =========================================
 # 환경변수 로드
 # =========================================
@@ -21,15 +36,57 @@ load_dotenv()  # 기본 .env 로드
 BASE_DIR = Path(__file__).resolve().parent
 load_dotenv(dotenv_path=BASE_DIR / ".env")
 
+# 아래 내부 모듈들은 import 시점에 환경변수를 읽으므로 .env 로드 뒤에 import
+import applog
+import metrics
+import upstream
+from admission import AdmissionMiddleware, parse_budgets
+from cache_invalidation import InvalidationLog
+from cohort_stats import ALL_BAND, CohortStats, age_band
+from directions import DirectionsConfigError, DirectionsError, NoRouteError, get_route_path, route_matrix
+from engine_build import ENGINE_METRICS, SEX_ALIASES, validate_engine
+from facility_sync import HASH_KEY, FacilitySync, row_hashes
+from goal_planner import GoalTables, metric_goals
+from favorites_cache import FavoritesCache
+from http_cache import (
+    NOT_MODIFIED,
+    CompressionMiddleware,
+    ContentETagMiddleware,
+    choose_encoding,
+    etag_matches,
+    make_etag,
+    normalized_query,
+)
+from http_metrics import MetricsMiddleware
+from history_cache import UserHistoryCache
+from route_geometry import encode_polyline, zoom_to_tolerance_m
+import profiling
+from popularity import STATUSES, WINDOWS, PopularityCounters
+from routers import admin, auth, crew
+from routers.auth import (
+    ADMIN_TOKEN,
+    authorize_user,
+    current_user_id,
+    is_admin_token,
+    peek_user_id,
+    require_admin,
+)
+from shared_snapshot import SnapshotStore
+from singleflight import SingleFlight
+from spool import WriteSpool
+import user_summary
+from user_summary import UserSummaryStore
+from warmup import WarmupTracker
+from write_behind import WriteBehindQueue, QueueFullError
+
+log = applog.get_logger("api")
+
 # =========================================
 # Supabase 연동 헬퍼
 # =========================================
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-print("[DEBUG] SUPABASE_URL:", SUPABASE_URL)
-print("[DEBUG] SUPABASE_KEY 시작 10글자:", SUPABASE_SERVICE_ROLE_KEY[:10] if SUPABASE_SERVICE_ROLE_KEY else None)
-
 def _sb_json_headers(prefer_return: bool = False) -> Dict[str, str]:
   """Supabase REST 호출용 공통 헤더"""
   if not SUPABASE_SERVICE_ROLE_KEY:
@@ -43,53 +100,467 @@ def _sb_json_headers(prefer_return: bool = False) -> Dict[str, str]:
       headers["Prefer"] = "return=representation"
   return headers
 
+def _sb_request(method: str, table: str, url: str, **kwargs) -> requests.Response:
+  """Supabase REST 호출 (테이블 / 상태 코드별 소요 시간을 /metrics 에 기록)"""
+  return upstream.request("supabase", table, method, url, **kwargs)
+
 def _sb_table_url(table: str) -> str:
   if not SUPABASE_URL:
       raise RuntimeError("SUPABASE_URL 이 설정되지 않았습니다.")
   return f"{SUPABASE_URL}/rest/v1/{table}"
 
 # =========================================
-# Naver Directions API 키 사용안함! 없어도 되는 부분
+# Supabase insert / select 함수 (physical_age_assessments)
 # =========================================
-NAVER_CLIENT_ID = os.getenv("NAVER_CLIENT_ID")      # X-NCP-APIGW-API-KEY-ID
+def enqueue_physical_age_assessment(row: dict, wait: bool = False) -> Optional[dict]:
+    """
+    physical_age_assessments row 를 write-behind 큐에 넣는다.
+    - wait=False : 바로 None 반환 (저장은 백그라운드 flush 에서)
+    - wait=True  : 이 row 가 포함된 flush 가 끝날 때까지 기다려 삽입 row 반환
+    큐가 가득 찼거나 Supabase 장애로 flush 가 실패하면 spool 에 보관되고 None 반환.
+    """
+    if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
+        log.warning("Supabase 환경변수가 없어 insert를 건너뜁니다.")
+        return None
 
-print("[DEBUG] NAVER_CLIENT_ID:", NAVER_CLIENT_ID)
+    # 측정 시각은 요청을 받은 시점으로 고정 (spool 재전송 때 DB 기본값(now())이 들어가지 않도록)
+    row = {**row, "measured_at": row.get("measured_at") or datetime.now(timezone.utc).isoformat()}
+    fut = submit_write("physical_age_assessments", row)
+    if fut is None:
+        return None
+    # flush 가 끝나면(id 가 생긴 뒤) 히스토리 캐시에 반영
+    fut.add_done_callback(_cache_flushed_assessment)
+    if not wait:
+        return None
+
+    try:
+        return fut.result(timeout=WRITE_BEHIND_WAIT_TIMEOUT)
+    except FutureTimeoutError:
+        log.warning("assessment flush 대기 시간 초과, id 없이 응답합니다.")
+        return None
+    except Exception as e:
+        log.error("Supabase insert 실패: %s", e)
+        return None
+
+
+def _sb_bulk_insert(table: str, rows: List[dict]) -> List[dict]:
+    """
+    PostgREST 배열 insert 로 rows 를 한 번에 저장하고
+    삽입된 row 리스트(입력 순서와 동일)를 반환.
+    실패 시 requests 예외를 그대로 던져 호출 측(write-behind)이 재시도 여부를 판단.
+
+    row 에 idempotency_key 가 있으면 on_conflict 로 중복을 무시하므로
+    같은 row 를 여러 번 보내도(재시도 / spool 재전송) 한 번만 저장된다.
+    """
+    headers = _sb_json_headers(prefer_return=True)
+    params = {}
+    if rows and "idempotency_key" in rows[0]:
+        headers["Prefer"] = "return=representation,resolution=ignore-duplicates"
+        params["on_conflict"] = "idempotency_key"
+
+    resp = _sb_request(
+        "POST",
+        table,
+        _sb_table_url(table),
+        headers=headers,
+        params=params,
+        json=rows,
+        timeout=10,
+    )
+    if resp.status_code >= 400:
+        log.error("Supabase bulk insert 응답: %s %s %s", table, resp.status_code, resp.text)
+        resp.raise_for_status()
+    data = resp.json()
+    return data if isinstance(data, list) else [data]
 
 
 # =========================================
-# Supabase insert / select 함수 (physical_age_assessments)
+# Write-behind 큐 + 로컬 spool (physical_age_assessments / mission_logs)
 # =========================================
-def insert_physical_age_assessment(row: dict) -> Optional[dict]:
+WRITE_BEHIND_WAIT_TIMEOUT = float(os.getenv("WRITE_BEHIND_WAIT_TIMEOUT", "5"))
+WRITE_SPOOL_PATH = Path(os.getenv("WRITE_SPOOL_PATH", str(BASE_DIR / "data" / "write_spool.sqlite3")))
+
+# 재전송이 4xx 로 영구 실패해 격리된 row 를 보관하는 기간 (초, 0 이면 지우지 않음).
+# 그 전에 /admin/spool/dead 로 확인하고 requeue / 삭제할 수 있다
+WRITE_SPOOL_DEAD_RETENTION = float(os.getenv("WRITE_SPOOL_DEAD_RETENTION", str(30 * 24 * 3600)))
+
+# Supabase 가 느리거나 죽어 있을 때 쓰기를 받아 두는 곳
+write_spool = WriteSpool(
+    WRITE_SPOOL_PATH,
+    post_batch=_sb_bulk_insert,
+    dead_retention=WRITE_SPOOL_DEAD_RETENTION or None,
+)
+
+
+def _spool_rows(table: str, rows: List[dict]) -> bool:
+    write_spool.append(table, rows)
+    return True
+
+
+write_queue = WriteBehindQueue(
+    post_batch=_sb_bulk_insert,
+    max_batch=int(os.getenv("WRITE_BEHIND_MAX_BATCH", "200")),
+    flush_interval=float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.2")),
+    max_pending=int(os.getenv("WRITE_BEHIND_MAX_PENDING", "5000")),
+    key_field="idempotency_key",
+    on_failure=_spool_rows,
+)
+
+
+def submit_write(table: str, row: dict):
     """
-    Supabase physical_age_assessments 테이블에 1건 insert 후
-    삽입된 row를 반환 (또는 None).
+    write-behind 큐에 row 를 넣고 Future 반환.
+    큐가 가득 차면 요청을 막지 않고 spool 에 바로 적재한 뒤 None 반환.
     """
-    if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
-        print("[WARN] Supabase 환경변수가 없어 insert를 건너뜁니다.")
+    try:
+        return write_queue.submit(table, row)
+    except QueueFullError as e:
+        log.warning("%s → spool 에 적재", e)
+        write_spool.append(table, [{**row, "idempotency_key": str(uuid.uuid4())}])
         return None
 
-    try:
-        url = f"{SUPABASE_URL}/rest/v1/physical_age_assessments"
-        headers = _sb_json_headers(prefer_return=True)
-        resp = requests.post(url, headers=headers, json=row, timeout=5)
 
-        if resp.status_code >= 400:
-            print("[ERROR] Supabase 응답:", resp.status_code, resp.text)
-            resp.raise_for_status()
+# =========================================
+# 워커 간 사용자 캐시 무효화 (즐겨찾기 / 신체나이 기록)
+# =========================================
+# write-through 는 요청을 처리한 워커에만 반영되므로 다른 워커에는 무효화를 알린다 (같은 디스크의 워커끼리).
+# 빈 값이면 끄고 각 캐시 TTL 에만 의존 (단일 워커 배포)
+CACHE_INVALIDATION_PATH = os.getenv(
+    "CACHE_INVALIDATION_PATH", str(BASE_DIR / "data" / "cache_invalidations.sqlite3")
+)
+CACHE_INVALIDATION_INTERVAL = float(os.getenv("CACHE_INVALIDATION_INTERVAL", "1"))
+cache_invalidations = InvalidationLog(Path(CACHE_INVALIDATION_PATH)) if CACHE_INVALIDATION_PATH else None
+_cache_invalidation_stop = threading.Event()
+
+
+def _publish_invalidation(scope: str, user_id: str) -> None:
+    if cache_invalidations is not None:
+        cache_invalidations.publish(scope, user_id)
+
+
+def _cache_invalidation_loop() -> None:
+    """CACHE_INVALIDATION_INTERVAL 마다 다른 워커가 바꾼 사용자 캐시를 비운다."""
+    cache_invalidations.poll()   # 기동 시점부터 읽도록 바로 연결
+    while not _cache_invalidation_stop.wait(CACHE_INVALIDATION_INTERVAL):
+        cache_invalidations.poll()
+
+
+# =========================================
+# 사용자별 신체나이 기록 캐시 (/latest, /history)
+# =========================================
+physical_age_cache = UserHistoryCache(
+    loader=lambda user_id, limit: query_physical_age_assessments(user_id, limit=limit),
+    depth=int(os.getenv("PHYSICAL_AGE_CACHE_DEPTH", "50")),
+    ttl=float(os.getenv("PHYSICAL_AGE_CACHE_TTL", "300")),
+    max_users=int(os.getenv("PHYSICAL_AGE_CACHE_MAX_USERS", "10000")),
+)
+if cache_invalidations is not None:
+    cache_invalidations.subscribe("physical_age", physical_age_cache.invalidate)
+
+
+def _cache_saved_assessment(saved: Optional[dict]) -> None:
+    """Supabase 에 저장 완료된 assessment row 를 캐시에 write-through + 사용자 요약 갱신."""
+    if isinstance(saved, dict) and saved.get("user_id"):
+        physical_age_cache.push(str(saved["user_id"]), saved)
+        _publish_invalidation("physical_age", str(saved["user_id"]))
+        user_summaries.submit(saved)
+
+
+def _cache_flushed_assessment(fut) -> None:
+    if fut.exception() is None:
+        _cache_saved_assessment(fut.result())
+
+
+def _on_spool_replayed(table: str, saved_rows: List[dict]) -> None:
+    if table == "physical_age_assessments":
+        for saved in saved_rows:
+            _cache_saved_assessment(saved)
 
+
+write_spool.add_replay_listener(_on_spool_replayed)
+
+
+# =========================================
+# 시설 인기도 (/mission/complete → /facilities/popular)
+# =========================================
+POPULARITY_TABLE = "facility_popularity"
+POPULARITY_FLUSH_INTERVAL = float(os.getenv("POPULARITY_FLUSH_INTERVAL", "30"))
+POPULARITY_RELOAD_INTERVAL = float(os.getenv("POPULARITY_RELOAD_INTERVAL", "300"))
+
+
+def _merge_popularity(rows: List[dict]) -> None:
+    """변화량을 DB 함수로 병합 (감쇠 + 덧셈을 DB 에서 원자적으로)."""
+    resp = _sb_request(
+        "POST",
+        POPULARITY_TABLE,
+        _sb_table_url("rpc/merge_facility_popularity"),
+        headers=_sb_json_headers(),
+        json={"deltas": rows},
+        timeout=10,
+    )
+    resp.raise_for_status()
+
+
+def _load_popularity_rows() -> List[dict]:
+    url = _sb_table_url(POPULARITY_TABLE)
+    page_size = 1000
+    start = 0
+    rows: List[dict] = []
+    while True:
+        headers = {**_sb_json_headers(), "Range-Unit": "items", "Range": f"{start}-{start + page_size - 1}"}
+        params = {"select": "*", "order": "facility_id.asc,status.asc"}
+        resp = _sb_request("GET", POPULARITY_TABLE, url, headers=headers, params=params, timeout=30)
+        resp.raise_for_status()
         data = resp.json()
-        if isinstance(data, list) and data:
-            return data[0]
-        return data
-    except Exception as e:
-        print(f"[ERROR] Supabase insert 실패: {e}")
+        rows.extend(data)
+        if len(data) < page_size:
+            return rows
+        start += page_size
+
+
+_popularity_enabled = bool(SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY)
+facility_popularity = PopularityCounters(
+    merge=_merge_popularity if _popularity_enabled else None,
+    load=_load_popularity_rows if _popularity_enabled else None,
+)
+_popularity_stop = threading.Event()
+
+
+def _popularity_loop() -> None:
+    """기동 시 스냅샷 복원 후 POPULARITY_FLUSH_INTERVAL 마다 변화량 병합, RELOAD_INTERVAL 마다 다시 읽기."""
+    next_reload = 0.0
+    while True:
+        if time.monotonic() >= next_reload:
+            try:
+                n = facility_popularity.reload()
+                log.info("시설 인기도 스냅샷 로딩: %d건", n)
+                next_reload = time.monotonic() + POPULARITY_RELOAD_INTERVAL
+            except Exception as e:
+                log.error("시설 인기도 스냅샷 로딩 실패: %s", e)
+        if _popularity_stop.wait(POPULARITY_FLUSH_INTERVAL):
+            return
+        try:
+            facility_popularity.flush()
+        except Exception as e:
+            log.error("시설 인기도 병합 실패 (다음 주기에 재시도): %s", e)
+
+
+# =========================================
+# 사용자별 진행 요약 (/users/{user_id}/physical-age/summary)
+# =========================================
+USER_SUMMARY_TABLE = "physical_age_user_summaries"
+USER_SUMMARY_BACKFILL_PAGE_SIZE = int(os.getenv("USER_SUMMARY_BACKFILL_PAGE_SIZE", "1000"))
+
+
+def _load_user_summary(user_id: str):
+    resp = _sb_request(
+        "GET",
+        USER_SUMMARY_TABLE,
+        _sb_table_url(USER_SUMMARY_TABLE),
+        headers=_sb_json_headers(),
+        params={"user_id": f"eq.{user_id}", "select": "last_id,summary"},
+        timeout=5,
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    if not data:
         return None
+    return int(data[0]["last_id"]), data[0]["summary"]
+
+
+def _save_user_summary(user_id: str, summary: dict, prev_id: int) -> bool:
+    """저장된 last_id 가 prev_id 일 때만 저장 (낙관적 동시성). 반영된 row 가 없으면 False."""
+    body = {"last_id": summary["last_id"], "summary": summary, "updated_at": datetime.utcnow().isoformat() + "Z"}
+    headers = _sb_json_headers(prefer_return=True)
+    if prev_id == 0:
+        # 신규: 같은 user_id 가 이미 있으면 무시되고 빈 응답 → 충돌
+        headers["Prefer"] = "return=representation,resolution=ignore-duplicates"
+        resp = _sb_request(
+            "POST", USER_SUMMARY_TABLE, _sb_table_url(USER_SUMMARY_TABLE),
+            headers=headers, params={"on_conflict": "user_id"}, json=[{"user_id": user_id, **body}], timeout=5,
+        )
+    else:
+        resp = _sb_request(
+            "PATCH", USER_SUMMARY_TABLE, _sb_table_url(USER_SUMMARY_TABLE),
+            headers=headers, params={"user_id": f"eq.{user_id}", "last_id": f"eq.{prev_id}"}, json=body, timeout=5,
+        )
+    resp.raise_for_status()
+    return bool(resp.json())
 
 
-def query_physical_age_assessments(user_id: str, limit: int = 1) -> List[dict]:
+def _load_user_assessments(user_id: str, page_size: int = USER_SUMMARY_BACKFILL_PAGE_SIZE) -> List[dict]:
+    """사용자 assessment 전체 (id 오름차순, 요약에 필요한 필드만). 늦게 도착한 row 로 요약을 다시 만들 때 사용."""
+    url = _sb_table_url("physical_age_assessments")
+    headers = {**_sb_json_headers(), "Range-Unit": "items", "Range": f"0-{page_size - 1}"}
+    fields = ["id", "user_id", "measured_at", "lo_age_value", "percentile", "detail_quantiles"]
+    rows: List[dict] = []
+    while True:
+        params = {"select": ",".join(fields), "user_id": f"eq.{user_id}", "order": "id.asc"}
+        if rows:
+            params["id"] = f"gt.{rows[-1]['id']}"
+        resp = _sb_request("GET", "physical_age_assessments", url, headers=headers, params=params, timeout=30)
+        resp.raise_for_status()
+        page = resp.json()
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+
+user_summaries = UserSummaryStore(
+    load=_load_user_summary,
+    save=_save_user_summary,
+    history=_load_user_assessments,
+    ttl=float(os.getenv("USER_SUMMARY_CACHE_TTL", "300")),
+    max_users=int(os.getenv("USER_SUMMARY_CACHE_MAX_USERS", "10000")),
+)
+# 요약이 저장되면 크루 리더보드(improvement) 갱신
+user_summaries.add_listener(crew.leaderboards.on_summary)
+
+
+def backfill_user_summaries(page_size: int = USER_SUMMARY_BACKFILL_PAGE_SIZE) -> int:
+    """
+    physical_age_assessments 전체를 (user_id, id) keyset 페이징으로 읽어 사용자 요약을 다시 만든다.
+        python -c "import main; main.backfill_user_summaries()"
+    사용자 단위로 끝나는 대로 upsert 하므로 메모리는 페이지 + 사용자 한 명분만 사용. 요약한 사용자 수 반환.
+    실행 중에 들어온 측정은 덮어써져 빠질 수 있으므로 트래픽이 적을 때 실행.
+    """
+    url = _sb_table_url("physical_age_assessments")
+    headers = {**_sb_json_headers(), "Range-Unit": "items", "Range": f"0-{page_size - 1}"}
+    upsert_headers = _sb_json_headers()
+    upsert_headers["Prefer"] = "resolution=merge-duplicates"
+    fields = ["id", "user_id", "measured_at", "lo_age_value", "percentile", "detail_quantiles"]
+
+    pending: List[dict] = []
+    users = 0
+
+    def flush_pending():
+        if pending:
+            resp = _sb_request(
+                "POST", USER_SUMMARY_TABLE, _sb_table_url(USER_SUMMARY_TABLE),
+                headers=upsert_headers, params={"on_conflict": "user_id"}, json=pending, timeout=30,
+            )
+            resp.raise_for_status()
+            pending.clear()
+
+    def finish(user_id: str, summary: dict):
+        pending.append({
+            "user_id": user_id,
+            "last_id": summary["last_id"],
+            "summary": summary,
+            "updated_at": datetime.utcnow().isoformat() + "Z",
+        })
+        if len(pending) >= page_size:
+            flush_pending()
+
+    cur_user, summary, last = None, None, None
+    while True:
+        params = {"select": ",".join(fields), "order": "user_id.asc,id.asc"}
+        if last is not None:
+            params["or"] = f"(user_id.gt.{last[0]},and(user_id.eq.{last[0]},id.gt.{last[1]}))"
+        resp = _sb_request("GET", "physical_age_assessments", url, headers=headers, params=params, timeout=30)
+        resp.raise_for_status()
+        rows = resp.json()
+        for row in rows:
+            if row["user_id"] != cur_user:
+                if summary is not None:
+                    finish(cur_user, summary)
+                    users += 1
+                cur_user, summary = row["user_id"], None
+            summary = user_summary.fold(summary, row)
+        if len(rows) < page_size:
+            break
+        last = (rows[-1]["user_id"], rows[-1]["id"])
+        log.info("사용자 요약 백필 중: 사용자 %d명", users)
+
+    if summary is not None:
+        finish(cur_user, summary)
+        users += 1
+    flush_pending()
+    log.info("사용자 요약 백필 완료: 사용자 %d명", users)
+    return users
+
+
+# =========================================
+# 앱 사용자 코호트 분포 (/cohort/percentile)
+# =========================================
+# 워커별 sketch 저장 / 병합 위치. 빈 값이면 이 프로세스 관측치만 사용
+COHORT_STATS_DIR = os.getenv("COHORT_STATS_DIR", str(BASE_DIR / "data" / "cohort"))
+COHORT_SYNC_INTERVAL = float(os.getenv("COHORT_SYNC_INTERVAL", "60"))
+# 연령대 코호트 표본이 이보다 적으면 같은 성별 전체(all) 분포로 응답
+COHORT_MIN_COUNT = int(os.getenv("COHORT_MIN_COUNT", "30"))
+COHORT_REBUILD_PAGE_SIZE = int(os.getenv("COHORT_REBUILD_PAGE_SIZE", "1000"))
+
+cohort_stats = CohortStats(Path(COHORT_STATS_DIR) if COHORT_STATS_DIR else None)
+_cohort_sync_stop = threading.Event()
+
+
+def _cohort_sync_loop() -> None:
+    """COHORT_SYNC_INTERVAL 마다 자기 관측치 저장 + 다른 워커 / 재구성 결과 병합."""
+    cohort_stats.sync()
+    while not _cohort_sync_stop.wait(COHORT_SYNC_INTERVAL):
+        cohort_stats.sync()
+
+
+def rebuild_cohort_stats(page_size: int = COHORT_REBUILD_PAGE_SIZE) -> int:
+    """
+    physical_age_assessments 전체를 id 순 keyset 페이징으로 읽어 코호트 분포를 다시 만든다.
+        python -c "import main; main.rebuild_cohort_stats()"
+    페이지 단위로 sketch 에 넣고 버리므로 메모리는 페이지 크기만큼만 사용. 처리한 행 수 반환.
+    """
+    url = _sb_table_url("physical_age_assessments")
+    headers = {**_sb_json_headers(), "Range-Unit": "items", "Range": f"0-{page_size - 1}"}
+    builder = cohort_stats.new_builder()
+    last_id = None
+    while True:
+        params = {"select": ",".join(["id", "sex", "age"] + ENGINE_METRICS), "order": "id.asc"}
+        if last_id is not None:
+            params["id"] = f"gt.{last_id}"
+        resp = _sb_request("GET", "physical_age_assessments", url, headers=headers, params=params, timeout=30)
+        resp.raise_for_status()
+        rows = resp.json()
+        for row in rows:
+            if row.get("sex") in ("Female", "Male"):
+                builder.add(row["sex"], row.get("age"), {m: row.get(m) for m in ENGINE_METRICS})
+        if len(rows) < page_size:
+            break
+        last_id = rows[-1]["id"]
+        log.info("코호트 분포 재구성 중: %d건", builder.rows)
+
+    generation = builder.publish()
+    log.info("코호트 분포 재구성 완료: %d건, generation=%s", builder.rows, generation)
+    return builder.rows
+
+
+def encode_history_cursor(row: dict) -> str:
+    """마지막 row 의 (measured_at, id) 를 불투명한 커서 문자열로 인코딩."""
+    raw = json.dumps([str(row["measured_at"]), int(row["id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> tuple:
+    """encode_history_cursor 의 역변환. 형식이 잘못되면 ValueError."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        measured_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        # 형식 검증 (PostgREST 필터에 그대로 들어가므로)
+        datetime.fromisoformat(str(measured_at).replace("Z", "+00:00"))
+        return str(measured_at), int(row_id)
+    except Exception:
+        raise ValueError("cursor 형식이 올바르지 않습니다.")
+
+
+def query_physical_age_assessments(
+    user_id: str,
+    limit: int = 1,
+    fields: Optional[List[str]] = None,
+    cursor: Optional[tuple] = None,
+) -> List[dict]:
     """
     Supabase physical_age_assessments 에서 user_id 기준으로
-    최근 measured_at 순으로 limit건 조회.
+    (measured_at, id) 내림차순으로 limit건 조회.
+    - fields : 가져올 컬럼 목록 (PostgREST select). 없으면 전체(*)
+    - cursor : decode_history_cursor 결과. 주어지면 그 row 보다 과거인 것만 (keyset)
+    OFFSET 을 쓰지 않으므로 얼마나 과거 페이지든 조회 비용이 일정하다.
     """
     if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
         raise RuntimeError("Supabase 환경변수가 설정되어 있지 않습니다.")
@@ -99,20 +570,28 @@ def query_physical_age_assessments(user_id: str, limit: int = 1) -> List[dict]:
         headers = {
             "apikey": SUPABASE_SERVICE_ROLE_KEY,
             "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+            "Range-Unit": "items",
+            "Range": f"0-{limit - 1}",
         }
         params = {
             "user_id": f"eq.{user_id}",
-            "order": "measured_at.desc",
-            "limit": str(limit),
+            "order": "measured_at.desc,id.desc",
+            "select": ",".join(fields) if fields else "*",
         }
-        resp = requests.get(url, headers=headers, params=params, timeout=5)
+        if cursor is not None:
+            measured_at, last_id = cursor
+            params["or"] = (
+                f'(measured_at.lt."{measured_at}",'
+                f'and(measured_at.eq."{measured_at}",id.lt.{last_id}))'
+            )
+        resp = _sb_request("GET", "physical_age_assessments", url, headers=headers, params=params, timeout=5)
         resp.raise_for_status()
         data = resp.json()
         if not isinstance(data, list):
             raise TypeError("Supabase 응답 형식이 리스트가 아닙니다.")
         return data
     except Exception as e:
-        print(f"[ERROR] Supabase select 실패: {e}")
+        log.error("Supabase select 실패: %s", e)
         raise
 
 
@@ -197,9 +676,18 @@ def grade_index_to_lo_age_value(idx: int) -> int:
 # =========================================
 # 2. 입력/출력 Pydantic 모델 정의
 # =========================================
+def normalize_sex_label(v: str) -> str:
+    """"M"/"F", "남"/"여" 등 → 엔진 컬럼명 "Male" / "Female"."""
+    label = SEX_ALIASES.get(v.strip().lower())
+    if label is not None:
+        return label
+    raise ValueError("sex 는 남/여(M/F) 형태로 입력해야 합니다.")
+
+
 class PhysicalAgeRequest(BaseModel):
     user_id: Optional[str] = None   # Supabase auth.users.id (uuid) / 없으면 None
     sex: str                        # "M"/"F", "남"/"여" 등
+    age: Optional[int] = None       # 실제 나이 (코호트 연령대용, 선택)
     flexibility: float              # 유연성
     jump_power: float               # 제자리멀리뛰기
     cardio_endurance: float         # 심폐지구력
@@ -208,12 +696,14 @@ class PhysicalAgeRequest(BaseModel):
     @field_validator("sex")
     @classmethod
     def normalize_sex(cls, v: str) -> str:
-        s = v.strip().lower()
-        if s in ["f", "female", "여", "여자", "woman", "girl"]:
-            return "Female"
-        if s in ["m", "male", "남", "남자", "man", "boy"]:
-            return "Male"
-        raise ValueError("sex 는 남/여(M/F) 형태로 입력해야 합니다.")
+        return normalize_sex_label(v)
+
+    @field_validator("age")
+    @classmethod
+    def check_age(cls, v: Optional[int]) -> Optional[int]:
+        if v is not None and not 0 < v < 120:
+            raise ValueError("age 는 1 ~ 119 사이여야 합니다.")
+        return v
 
 
 class PhysicalAgeResponse(BaseModel):
@@ -257,6 +747,20 @@ class PhysicalAgeRecord(BaseModel):
 class PhysicalAgeHistoryResponse(BaseModel):
     user_id: str
     records: List[PhysicalAgeRecord]
+    next_cursor: Optional[str] = None   # 다음(더 과거) 페이지 커서, 마지막 페이지면 None
+
+
+# 커서 페이징에 항상 필요한 컬럼 (응답 모델 필수값 + keyset 키)
+HISTORY_REQUIRED_FIELDS = ["id", "user_id", "measured_at"]
+# ?fields= 로 고를 수 있는 컬럼: PhysicalAgeRecord 필드 중 physical_age_assessments 에 실제로 있는 것만
+# (grade_index / grade_label / avg_quantile 은 응답 모델에만 있고 테이블 컬럼이 아님 → select 하면 PostgREST 400)
+HISTORY_SELECTABLE_FIELDS = frozenset(HISTORY_REQUIRED_FIELDS) | {
+    "percentile",
+    "weak_point",
+    "lo_age_value",
+    "lo_age_tier_label",
+    "detail_quantiles",
+}
 
 
 # =========================================
@@ -264,6 +768,33 @@ class PhysicalAgeHistoryResponse(BaseModel):
 # =========================================
 ENGINE_PATH = Path(__file__).parent / "models" / "model.pkl"
 _engine_cache: Optional[Dict[str, pd.DataFrame]] = None
+_goal_tables: Optional[GoalTables] = None
+
+# 엔진 / 시설 데이터 lazy 초기화를 워커 스레드 간에 한 번만 수행하기 위한 single-flight
+_init_flight = SingleFlight("lazy_init")
+
+# 기동 후 백그라운드 warm-up 상태 (/ready)
+warmup = WarmupTracker()
+
+# 엔진 / 시설 로딩 단계별 소요 시간 (source: 원본 읽기, load: 스냅샷 attach 포함 전체)
+DATA_LOAD_SECONDS = metrics.histogram(
+    "data_load_duration_seconds",
+    "엔진 / 시설 데이터 로딩 시간",
+    ("component", "stage"),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+# 워커 간 공유 스냅샷 저장소 (uvicorn --workers N 에서 엔진 / 시설 데이터를 한 벌만 로딩)
+# 빈 값으로 두면 예전처럼 워커마다 직접 로딩. /dev/shm 아래를 지정하면 디스크를 거치지 않음.
+SHARED_DATA_DIR = os.getenv("SHARED_DATA_DIR", str(BASE_DIR / "data" / "shared"))
+engine_store = SnapshotStore(Path(SHARED_DATA_DIR), "engine") if SHARED_DATA_DIR else None
+# 시설 스냅샷은 /facilities/delta 가 이전 버전과 비교할 수 있게 몇 버전 더 남겨 둔다
+FACILITY_SYNC_KEEP_VERSIONS = int(os.getenv("FACILITY_SYNC_KEEP_VERSIONS", "4"))
+facility_store = (
+    SnapshotStore(Path(SHARED_DATA_DIR), "facilities", keep=FACILITY_SYNC_KEEP_VERSIONS)
+    if SHARED_DATA_DIR
+    else None
+)
 
 
 def load_engine() -> Dict[str, pd.DataFrame]:
@@ -272,27 +803,71 @@ def load_engine() -> Dict[str, pd.DataFrame]:
     키: 'sit_ups', 'flexibility', 'jump_power', 'cardio_endurance'
     값: pandas.DataFrame (index = quantile, columns = ['Female', 'Male'])
     """
-    global _engine_cache
+    if _engine_cache is not None:
+        return _engine_cache
+    return _init_flight.do("engine", _load_engine_once)
+
+
+def _load_engine_once() -> Dict[str, pd.DataFrame]:
+    global _engine_cache, _goal_tables
+    # 앞선 single-flight 호출이 막 끝난 경우
     if _engine_cache is not None:
         return _engine_cache
 
     if not ENGINE_PATH.exists():
         raise FileNotFoundError(f"엔진 파일을 찾을 수 없습니다: {ENGINE_PATH}")
 
-    obj = joblib.load(str(ENGINE_PATH))
-    if not isinstance(obj, dict):
-        raise TypeError("엔진 파일 내용이 dict 형식이 아닙니다.")
-
-    for key in ["sit_ups", "flexibility", "jump_power", "cardio_endurance"]:
-        if key not in obj:
-            raise KeyError(f"엔진에 '{key}' 키가 없습니다.")
-        if not isinstance(obj[key], pd.DataFrame):
-            raise TypeError(f"엔진의 '{key}' 값이 DataFrame 이 아닙니다.")
+    with DATA_LOAD_SECONDS.timer(component="engine", stage="load"):
+        if engine_store is None:
+            engine = _read_engine_file()
+        else:
+            # model.pkl 이 바뀌면(mtime / 크기) 리더가 다시 빌드
+            st = ENGINE_PATH.stat()
+            _, arrays, meta = engine_store.load_or_build(
+                _build_engine_arrays, source=f"{st.st_mtime_ns}:{st.st_size}"
+            )
+            engine = _engine_from_arrays(arrays, meta)
+        # 목표 등급 계산용 역방향(quantile → 기록) 표. _engine_cache 보다 먼저 채워 둔다
+        _goal_tables = GoalTables(engine, ENGINE_METRICS, len(AGE_GRADES))
+        _engine_cache = engine
 
-    _engine_cache = obj
+    warmup.mark_ready("engine")
     return _engine_cache
 
 
+def _read_engine_file() -> Dict[str, pd.DataFrame]:
+    with DATA_LOAD_SECONDS.timer(component="engine", stage="source"):
+        obj = joblib.load(str(ENGINE_PATH))
+    # engine_build.py (오프라인 재생성)도 같은 검증을 거친다
+    return validate_engine(obj)
+
+
+def _build_engine_arrays():
+    """엔진 quantile 테이블을 공유 스냅샷용 float 배열로 변환 (index + 성별 컬럼)."""
+    obj = _read_engine_file()
+    arrays = {}
+    tables = {}
+    for key in ENGINE_METRICS:
+        df = obj[key]
+        cols = [c for c in ("Female", "Male") if c in df.columns]
+        arrays[f"{key}/index"] = df.index.to_numpy(dtype=float)
+        for col in cols:
+            arrays[f"{key}/{col}"] = df[col].to_numpy(dtype=float)
+        tables[key] = cols
+    return arrays, {"tables": tables}
+
+
+def _engine_from_arrays(arrays, meta) -> Dict[str, pd.DataFrame]:
+    return {
+        key: pd.DataFrame(
+            {col: arrays[f"{key}/{col}"] for col in cols},
+            index=pd.Index(arrays[f"{key}/index"]),
+            copy=False,
+        )
+        for key, cols in meta["tables"].items()
+    }
+
+
 def get_quantile_from_table(df: pd.DataFrame, sex_col: str, value: float) -> float:
     """
     DataFrame(quantile table)과 입력값(value)으로부터 quantile 추정.
@@ -335,18 +910,103 @@ def compute_physical_age_quantiles(req: PhysicalAgeRequest) -> Dict[str, float]:
 # 4. 공공체육시설 Supabase + 근처 조회 로직
 # =========================================
 FACILITIES_TABLE = os.getenv("FACILITIES_TABLE", "facilities")
+# 공유 스냅샷을 Supabase 에서 다시 만드는 주기(초). 0 이면 갱신하지 않음.
+FACILITIES_REFRESH_INTERVAL = float(os.getenv("FACILITIES_REFRESH_INTERVAL", "0"))
 _facilities_df: Optional[pd.DataFrame] = None
+_facilities_version: Optional[str] = None
+_facilities_refresh_stop = threading.Event()
 
 
 def load_facilities() -> pd.DataFrame:
     """
     Supabase facilities 테이블 전체를 페이징으로 읽어와
     하나의 DataFrame으로 캐싱해서 반환.
+    동시에 여러 요청이 첫 로딩을 일으켜도 Supabase 페이징은 한 번만 수행.
+    공유 스냅샷을 쓰면 다른 워커가 새 버전을 공개했을 때 다음 호출에서 새 버전으로 교체.
     """
-    global _facilities_df
-    if _facilities_df is not None:
+    if _facilities_df is not None and (
+        facility_store is None or facility_store.current_version() == _facilities_version
+    ):
         return _facilities_df
+    return _init_flight.do("facilities", _load_facilities_once)
+
+
+def _load_facilities_once() -> pd.DataFrame:
+    global _facilities_df, _facilities_version
+    if facility_store is None:
+        if _facilities_df is None:
+            with DATA_LOAD_SECONDS.timer(component="facilities", stage="load"):
+                _facilities_df = _fetch_facilities_df()
+            # 공유 스냅샷이 없으면 프로세스별 로딩 시점을 버전으로 사용 (ETag 용)
+            _facilities_version = f"local-{time.time_ns():x}"
+        warmup.mark_ready("facilities")
+        return _facilities_df
+
+    started = time.perf_counter()
+    version, arrays, meta = facility_store.load_or_build(
+        _build_facility_arrays, max_age=FACILITIES_REFRESH_INTERVAL
+    )
+    if version != _facilities_version:
+        # 숫자 컬럼은 mmap 배열을 복사 없이 그대로 사용 (문자열 컬럼만 워커별 object 로 변환)
+        df = pd.DataFrame({col: arrays[col] for col in meta["columns"]}, copy=False)
+        DATA_LOAD_SECONDS.observe(time.perf_counter() - started, component="facilities", stage="load")
+        replaced = _facilities_version is not None
+        _facilities_df = df
+        _facilities_version = version
+        if replaced:
+            favorites_cache.reset_materialized()
+            log.info("시설 스냅샷 교체: version=%s, 시설 수=%d", version, len(df))
+
+    warmup.mark_ready("facilities")
+    return _facilities_df
+
+
+def _facility_column_array(s: pd.Series) -> np.ndarray:
+    """
+    DataFrame 컬럼 → pickle 없이 저장 가능한 배열.
+    object 컬럼 중 bool/숫자(+null)만 있는 플래그 컬럼은 float, 나머지는 고정폭 문자열 (null → "").
+    """
+    if s.dtype != object:
+        return s.to_numpy()
+    non_null = s.dropna()
+    if non_null.map(lambda v: isinstance(v, (bool, int, float))).all():
+        return s.astype(float).to_numpy()
+    return s.fillna("").astype(str).to_numpy(dtype=str)
+
+
+def _build_facility_arrays():
+    with DATA_LOAD_SECONDS.timer(component="facilities", stage="source"):
+        df = _fetch_facilities_df()
+    arrays = {col: _facility_column_array(df[col]) for col in df.columns}
+    # 버전별 동기화 행 해시 (다른 워커가 이 버전 대비 델타를 만들 때 사용)
+    arrays[HASH_KEY] = row_hashes(_facility_sync_frame(pd.DataFrame(arrays, copy=False)))
+    return arrays, {"columns": list(df.columns), "rows": len(df)}
+
+
+def _facilities_refresh_loop() -> None:
+    """FACILITIES_REFRESH_INTERVAL 마다 스냅샷 갱신 시도 (lock 을 잡은 워커 하나만 Supabase 조회)."""
+    check_every = max(1.0, FACILITIES_REFRESH_INTERVAL / 10)
+    while not _facilities_refresh_stop.wait(check_every):
+        # 붙어 있는 버전이 최신이고 아직 max_age 안이면 다시 attach 하지 않음
+        if facility_store.is_current(_facilities_version, FACILITIES_REFRESH_INTERVAL):
+            continue
+        try:
+            _init_flight.do("facilities", _load_facilities_once)
+        except Exception as e:
+            log.error("시설 스냅샷 갱신 실패: %s", e)
+
 
+def prepare_shared_data() -> None:
+    """
+    uvicorn 기동 전(pre-fork)에 엔진 / 시설 스냅샷을 미리 만들어 둘 때 사용.
+        python -c "import main; main.prepare_shared_data()"
+    미리 만들지 않아도 첫 워커가 리더가 되어 만든다.
+    """
+    load_engine()
+    load_facilities()
+
+
+def _fetch_facilities_df() -> pd.DataFrame:
     if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
         raise RuntimeError("Supabase 환경변수가 설정되지 않았습니다.")
 
@@ -379,8 +1039,8 @@ def load_facilities() -> pd.DataFrame:
             )
         }
 
-        resp = requests.get(base_url, headers=headers, params=params, timeout=30)
-        print(f"[DEBUG] facilities page {start}-{end} status:", resp.status_code)
+        resp = _sb_request("GET", table_name, base_url, headers=headers, params=params, timeout=30)
+        log.debug("facilities page %d-%d status: %s", start, end, resp.status_code)
 
         resp.raise_for_status()
         data = resp.json()
@@ -405,9 +1065,8 @@ def load_facilities() -> pd.DataFrame:
     df["lat"] = df["lat"].astype(float)
     df["lon"] = df["lon"].astype(float)
 
-    print("[DEBUG] Supabase에서 시설 로딩 완료, 전체 시설 수:", len(df))
-    _facilities_df = df
-    return _facilities_df
+    log.info("Supabase에서 시설 로딩 완료, 전체 시설 수: %d", len(df))
+    return df
 
 
 def haversine_km(lat1, lon1, lat2, lon2) -> float:
@@ -442,6 +1101,45 @@ def infer_category(row) -> str:
     return "기타"
 
 
+def _facility_flag(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return (df[col] == 1).to_numpy()
+
+
+def _facility_sync_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    시설 DataFrame → FacilityOut 과 같은 값의 컬럼 (동기화 / 오프라인 조회용).
+    category / mission 은 infer_category 와 같은 규칙을 행 반복 없이 계산.
+    """
+    category = np.select(
+        [
+            _facility_flag(df, "is_cardio"),
+            _facility_flag(df, "is_muscular_endurance"),
+            _facility_flag(df, "is_flexibility"),
+        ],
+        ["심폐지구력", "근지구력", "유연성"],
+        default="기타",
+    )
+    if "detail_equip" in df.columns:
+        equip = pd.Series(df["detail_equip"]).map(lambda v: v if isinstance(v, str) else "")
+    else:
+        equip = pd.Series([""] * len(df))
+    equip = equip.reset_index(drop=True)
+    mission = equip.where(equip.str.strip() != "", pd.Series(category) + " 운동")
+    return pd.DataFrame(
+        {
+            "id": np.asarray(df["id"], dtype=np.int64),
+            "name": np.asarray(df["name"]).astype(str),
+            "lat": np.asarray(df["lat"], dtype=float),
+            "lon": np.asarray(df["lon"], dtype=float),
+            "address": np.asarray(df["address"]).astype(str),
+            "mission": mission.to_numpy(dtype=object),
+            "category": category.astype(object),
+        }
+    )
+
+
 def weak_point_to_category(weak_point: str) -> str:
     """
     weak_point 문자열을 시설 카테고리로 매핑.
@@ -474,36 +1172,236 @@ class RecommendedFacility(FacilityOut):
     match_category: bool         # 취약영역 카테고리와 맞는지 여부
 
 
+class RouteMatrixItem(BaseModel):
+    facility_id: int
+    status: str                          # ok / no_route / timeout / error / not_found
+    duration_min: Optional[float] = None # 예상 소요 시간(분)
+    distance_km: Optional[float] = None  # 도로 기준 거리(km)
+    error: Optional[str] = None
+
+
+class RouteMatrixResponse(BaseModel):
+    partial: bool                        # 하나라도 ok/no_route 가 아니면 True
+    items: List[RouteMatrixItem]
+
+
+ROUTE_MATRIX_MAX_FACILITIES = int(os.getenv("ROUTE_MATRIX_MAX_FACILITIES", "20"))
+ROUTE_MATRIX_CALL_TIMEOUT = float(os.getenv("ROUTE_MATRIX_CALL_TIMEOUT", "3"))
+ROUTE_MATRIX_DEADLINE = float(os.getenv("ROUTE_MATRIX_DEADLINE", "5"))
+
+# 응답 압축 / 조건부 GET 대상 경로 (하위 경로 포함)
+COMPRESS_PATHS = ("/facilities", "/recommend", "/route")
+ROUTE_ETAG_PATHS = ("/route",)
+
+# 수락 제어 (admission.py): 라우트별 호출자 token bucket "라우트=초당 rate:burst"
+# 기본은 꺼 둔다. 로그인하지 않은 호출자는 클라이언트 IP 로 묶이므로 리버스 프록시 뒤에서 켤 때는
+# TRUST_FORWARDED_FOR=true 도 같이 설정해야 한다 (아니면 모든 익명 호출자가 프록시 IP 하나의 bucket 을 나눠 씀)
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "false").lower() in ("1", "true", "yes")
+ADMISSION_RATE_LIMITS = parse_budgets(os.getenv(
+    "ADMISSION_RATE_LIMITS",
+    "/predict/physical-age=1:10,"
+    "/predict/physical-age/goals=2:10,"
+    "/route=1:10,"
+    "/route/matrix=0.2:3,"
+    "/recommend/facilities=1:10,"
+    "/facilities/near=2:20,"
+    "/facilities/popular=1:10",
+))
+# 네이버 / Supabase 를 부르는 라우트의 워커당 동시 처리 상한 (threadpool 40 보다 작게 두어 나머지 요청 몫을 남김)
+ADMISSION_UPSTREAM_ROUTES = tuple(
+    r.strip()
+    for r in os.getenv(
+        "ADMISSION_UPSTREAM_ROUTES",
+        "/route,/route/matrix,/recommend/facilities,"
+        "/favorites/toggle,/favorites/bulk,/favorites/by-user,"
+        "/users/{user_id}/physical-age/latest,/users/{user_id}/physical-age/history",
+    ).split(",")
+    if r.strip()
+)
+ADMISSION_MAX_UPSTREAM = int(os.getenv("ADMISSION_MAX_UPSTREAM", "32"))
+ADMISSION_MAX_KEYS = int(os.getenv("ADMISSION_MAX_KEYS", "50000"))
+# 리버스 프록시 뒤에서만 true (아니면 X-Forwarded-For 로 IP 를 바꿔 가며 제한을 피할 수 있음)
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() in ("1", "true", "yes")
+
+
+def _admission_user_id(scope) -> Optional[str]:
+    for name, value in scope.get("headers") or ():
+        if name == b"authorization":
+            return peek_user_id(value.decode("latin-1"))
+    return None
+
+
 # =========================================
 # 5. FastAPI 앱 및 엔드포인트
 # =========================================
 app = FastAPI(title="Fitness100 Physical Age 17-Grade API")
+# sync 엔드포인트를 요청 단위로 cProfile 할 수 있게 감싼다 (세션이 없으면 그대로 호출)
+app.router.route_class = profiling.ProfiledRoute
+# 경로 응답: 본문 해시 ETag + If-None-Match → 304
+app.add_middleware(ContentETagMiddleware, paths=ROUTE_ETAG_PATHS)
+# 큰 JSON 응답만 br / gzip (ETag 계산 뒤에 압축되도록 ETag 미들웨어보다 바깥)
+app.add_middleware(CompressionMiddleware, paths=COMPRESS_PATHS)
+if ADMISSION_ENABLED:
+    # 호출자별 rate limit(429) / 외부 호출 라우트 동시 처리 상한(503). 거절도 아래 지연 시간 메트릭에 잡히도록 안쪽에 둔다
+    app.add_middleware(
+        AdmissionMiddleware,
+        budgets=ADMISSION_RATE_LIMITS,
+        upstream_routes=ADMISSION_UPSTREAM_ROUTES,
+        max_upstream=ADMISSION_MAX_UPSTREAM,
+        max_keys=ADMISSION_MAX_KEYS,
+        identify=_admission_user_id,
+        trust_forwarded=TRUST_FORWARDED_FOR,
+    )
+# 엔드포인트별 지연 시간 / 처리 중 요청 수 (/metrics)
+app.add_middleware(MetricsMiddleware)
+if ADMIN_TOKEN:
+    # X-Profile 헤더 / 1-in-N 샘플링 프로파일링 (관리 기능이 꺼져 있으면 미들웨어도 없음)
+    app.add_middleware(profiling.ProfilingMiddleware, authorize=is_admin_token)
+
+# /signup, /login (bcrypt 는 별도 프로세스 풀에서 계산)
+app.include_router(auth.router)
+# /admin/profiles, /admin/memory (X-Admin-Token)
+app.include_router(admin.router)
+# /crews (크루원 관리 / 리더보드)
+app.include_router(crew.router)
+
+
+def _is_mmap_backed(arr) -> bool:
+    while arr is not None:
+        if isinstance(arr, (np.memmap, mmap.mmap)):
+            return True
+        arr = getattr(arr, "base", None)
+    return False
+
+
+def _facilities_memory() -> Optional[dict]:
+    df = _facilities_df
+    if df is None:
+        return None
+    # 공유 스냅샷을 그대로 참조하는 컬럼(워커끼리 같은 page cache)의 크기
+    mapped = sum(
+        arr.nbytes for arr in (df[c].to_numpy() for c in df.columns) if _is_mmap_backed(arr)
+    )
+    return {
+        "rows": len(df),
+        "version": _facilities_version,
+        "dataframe_bytes": int(df.memory_usage(deep=True).sum()),
+        "shared_mmap_bytes": int(mapped),
+    }
+
+
+def _engine_memory() -> Optional[dict]:
+    engine = _engine_cache
+    if engine is None:
+        return None
+    return {
+        "tables": len(engine),
+        "dataframe_bytes": int(sum(df.memory_usage(deep=True).sum() for df in engine.values())),
+    }
+
+
+profiling.register_memory_reporter("facilities", _facilities_memory)
+profiling.register_memory_reporter("engine", _engine_memory)
 
 
 @app.on_event("startup")
 def on_startup():
+    # 엔진 / 시설 로딩은 백그라운드에서 진행하고 워커는 바로 요청을 받는다.
+    # 로딩 중에 들어온 요청은 single-flight 로 진행 중인 로딩에 합류한다.
+    warmup.start("engine", load_engine)
+    warmup.start("facilities", load_facilities)
+    if facility_store is not None and FACILITIES_REFRESH_INTERVAL > 0:
+        threading.Thread(target=_facilities_refresh_loop, name="facilities-refresh", daemon=True).start()
+
+    write_queue.start()
+    write_spool.start()
+    user_summaries.start()
+    if _popularity_enabled:
+        threading.Thread(target=_popularity_loop, name="facility-popularity", daemon=True).start()
+    threading.Thread(target=_cohort_sync_loop, name="cohort-sync", daemon=True).start()
+    crew.start_refresh()
+    if cache_invalidations is not None:
+        threading.Thread(target=_cache_invalidation_loop, name="cache-invalidation", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    # 아직 flush 안 된 assessment / mission 로그를 모두 저장(실패분은 spool)하고 종료
+    _facilities_refresh_stop.set()
+    _cohort_sync_stop.set()
+    crew.stop_refresh()
+    _cache_invalidation_stop.set()
+    write_queue.close()
+    write_spool.close()
+    user_summaries.close()
+    cohort_stats.sync()
+    _popularity_stop.set()
     try:
-        load_engine()
-        print(f"[INFO] 엔진 로딩 완료: {ENGINE_PATH}")
-    except Exception as e:
-        print(f"[ERROR] 엔진 로딩 실패: {e}")
-
-    try:
-        load_facilities()
-        print(f"[INFO] 시설 데이터 로딩 완료 (Supabase)")
+        facility_popularity.flush()
     except Exception as e:
-        print(f"[ERROR] 시설 데이터 로딩 실패 (Supabase): {e}")
+        log.error("시설 인기도 병합 실패 (종료 시): %s", e)
 
 
 @app.get("/health")
 def health_check():
+    """프로세스 생존 확인 (warm-up 여부와 무관)."""
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def readiness_check():
+    """
+    트래픽을 받을 준비가 됐는지 확인. 엔진 / 시설 warm-up 이 모두 끝나야 200,
+    아니면 503 과 컴포넌트별 상태를 반환.
+    """
+    components = warmup.snapshot()
+    ready = warmup.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "warming_up", "components": components},
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text format 메트릭 (spool 깊이 / 재전송 지연 등)."""
+    return metrics.render()
+
+
+# spool 의 dead row 관리 (routers/admin 과 같은 X-Admin-Token, write_spool 이 여기 있어서 main 에 둠)
+@app.get("/admin/spool/dead", dependencies=[Depends(require_admin)], tags=["admin"])
+def list_dead_spool_rows(
+    table: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """재전송이 영구 실패해 격리된 row (오래된 순, 마지막 오류 포함)."""
+    return write_spool.list_dead(table=table, limit=limit)
+
+
+@app.post("/admin/spool/dead/requeue", dependencies=[Depends(require_admin)], tags=["admin"])
+def requeue_dead_spool_rows(
+    table: Optional[str] = Query(None),
+    seq: Optional[List[int]] = Query(None, description="특정 row 만 (여러 번 지정 가능)"),
+):
+    """원인을 고친 뒤 dead row 를 다시 재전송 대기로 돌림."""
+    return {"requeued": write_spool.requeue_dead(table=table, seqs=seq)}
+
+
+@app.delete("/admin/spool/dead", dependencies=[Depends(require_admin)], tags=["admin"])
+def purge_dead_spool_rows(
+    table: Optional[str] = Query(None),
+    seq: Optional[List[int]] = Query(None, description="특정 row 만 (여러 번 지정 가능)"),
+    older_than: float = Query(0, ge=0, description="적재 후 이 초보다 오래된 row 만"),
+):
+    return {"purged": write_spool.purge_dead(older_than=older_than, table=table, seqs=seq)}
+
+
 @app.post("/predict/physical-age", response_model=PhysicalAgeResponse)
-def predict_physical_age(req: PhysicalAgeRequest):
+def predict_physical_age(req: PhysicalAgeRequest, wait_for_id: bool = False):
     """
     신체나이 17등급 예측 + Supabase insert 엔드포인트.
+    - insert 는 write-behind 큐로 넘기고 바로 응답
+    - wait_for_id=true 면 저장이 끝날 때까지 기다려 assessment_id 를 채워 응답
     """
     try:
         q_dict = compute_physical_age_quantiles(req)
@@ -529,6 +1427,7 @@ def predict_physical_age(req: PhysicalAgeRequest):
         row = {
             "user_id": req.user_id,
             "sex": req.sex,
+            "age": req.age,
             "sit_ups": req.sit_ups,
             "flexibility": req.flexibility,
             "jump_power": req.jump_power,
@@ -541,7 +1440,9 @@ def predict_physical_age(req: PhysicalAgeRequest):
             "detail_quantiles": q_dict,
         }
 
-        saved_row = insert_physical_age_assessment(row)
+        saved_row = enqueue_physical_age_assessment(row, wait=wait_for_id)
+        # 저장되는 측정만 코호트 분포에 반영 (이력 재구성과 같은 모집단)
+        cohort_stats.observe(req.sex, req.age, {m: getattr(req, m) for m in ENGINE_METRICS})
 
     assessment_id = None
     if isinstance(saved_row, dict) and "id" in saved_row:
@@ -561,13 +1462,77 @@ def predict_physical_age(req: PhysicalAgeRequest):
     )
 
 
+class MetricGoal(BaseModel):
+    metric: str
+    current_value: float
+    required_quantile: float            # 이 항목만 올릴 때 필요한 항목 quantile
+    required_value: Optional[float]     # 필요한 기록 (이 항목만으로 도달할 수 없으면 None)
+    improvement: Optional[float]        # 현재 기록 대비 더 해야 하는 양 (작을수록 좋은 항목은 줄여야 하는 양)
+
+
+class GradeGoal(BaseModel):
+    grade_index: int
+    grade_label: str
+    lo_age_value: int
+    required_avg_quantile: float
+    metrics: List[MetricGoal]
+
+
+class PhysicalAgeGoalsResponse(BaseModel):
+    grade_index: int
+    grade_label: str
+    avg_quantile: float
+    detail_quantiles: Dict[str, float]
+    goals: List[GradeGoal]              # 바로 위 등급부터 최상위 등급까지
+
+
+@app.post("/predict/physical-age/goals", response_model=PhysicalAgeGoalsResponse)
+def predict_physical_age_goals(req: PhysicalAgeRequest, limit: int = Query(len(AGE_GRADES), ge=1)):
+    """
+    현재 기록으로 위 등급(최대 limit 개)마다, 한 항목만 올린다면 얼마나 더 해야 하는지.
+    엔진 로딩 때 만들어 둔 역방향 표로 계산 (저장 / 코호트 반영 없음).
+    """
+    try:
+        q_dict = compute_physical_age_quantiles(req)
+    except (KeyError, TypeError, FileNotFoundError) as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    tables = _goal_tables
+    if tables is None or not tables.has_sex(req.sex):
+        raise HTTPException(status_code=500, detail=f"엔진 테이블에 '{req.sex}' 컬럼이 없습니다.")
+
+    plan = tables.plan(req.sex, {m: getattr(req, m) for m in ENGINE_METRICS}, q_dict)
+    avg_q = float(np.mean(list(q_dict.values())))
+    grade_info = quantile_to_grade(avg_q)
+
+    goals = []
+    n_grades = len(AGE_GRADES)
+    for k, target in enumerate(plan["targets"][:limit]):
+        grade_index = (n_grades - 1) - int(target)
+        goals.append(GradeGoal(
+            grade_index=grade_index,
+            grade_label=grade_idx_to_label(grade_index),
+            lo_age_value=grade_index_to_lo_age_value(grade_index),
+            required_avg_quantile=round(float(plan["required_avg"][k]), 4),
+            metrics=[MetricGoal(**g) for g in metric_goals(plan, ENGINE_METRICS, k)],
+        ))
+
+    return PhysicalAgeGoalsResponse(
+        grade_index=int(grade_info["grade_index"]),
+        grade_label=str(grade_info["grade_label"]),
+        avg_quantile=avg_q,
+        detail_quantiles=q_dict,
+        goals=goals,
+    )
+
+
 @app.get("/users/{user_id}/physical-age/latest", response_model=PhysicalAgeRecord)
 def get_latest_physical_age(user_id: str):
     """
     특정 사용자(user_id)의 최근 신체나이 측정 1건 조회.
     """
     try:
-        rows = query_physical_age_assessments(user_id, limit=1)
+        rows = physical_age_cache.get(user_id, limit=1)
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
@@ -593,15 +1558,44 @@ def get_latest_physical_age(user_id: str):
 
 
 @app.get("/users/{user_id}/physical-age/history", response_model=PhysicalAgeHistoryResponse)
-def get_physical_age_history(user_id: str, limit: int = 20):
+def get_physical_age_history(
+    user_id: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
     """
     특정 사용자(user_id)의 최근 신체나이 측정 히스토리 조회.
+    - cursor : 이전 응답의 next_cursor. 주어지면 그보다 과거 기록을 이어서 조회
+    - fields : 쉼표로 구분한 컬럼 목록 (예: "lo_age_value,percentile").
+               id / user_id / measured_at 은 항상 포함
+    첫 페이지 + 전체 컬럼 요청은 사용자별 캐시에서 응답.
     """
     if limit <= 0:
         raise HTTPException(status_code=400, detail="limit 은 1 이상이어야 합니다.")
 
+    cursor_key = None
+    if cursor:
+        try:
+            cursor_key = decode_history_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    field_list = None
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in HISTORY_SELECTABLE_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"알 수 없는 fields: {', '.join(unknown)}")
+        field_list = HISTORY_REQUIRED_FIELDS + [f for f in requested if f not in HISTORY_REQUIRED_FIELDS]
+
     try:
-        rows = query_physical_age_assessments(user_id, limit=limit)
+        if cursor_key is None and field_list is None:
+            rows = physical_age_cache.get(user_id, limit=limit)
+        else:
+            rows = query_physical_age_assessments(
+                user_id, limit=limit, fields=field_list, cursor=cursor_key
+            )
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
@@ -624,22 +1618,146 @@ def get_physical_age_history(user_id: str, limit: int = 20):
         for row in rows
     ]
 
+    next_cursor = encode_history_cursor(rows[-1]) if len(rows) == limit else None
+
     return PhysicalAgeHistoryResponse(
         user_id=user_id,
         records=records,
+        next_cursor=next_cursor,
     )
 
 
+class SummaryPoint(BaseModel):
+    id: int
+    measured_at: Optional[datetime] = None
+    lo_age_value: Optional[int] = None
+    percentile: Optional[float] = None
+
+
+class PhysicalAgeSummaryResponse(BaseModel):
+    user_id: str
+    count: int                                  # 전체 측정 수
+    first: Optional[SummaryPoint] = None
+    latest: Optional[SummaryPoint] = None
+    best: Optional[SummaryPoint] = None         # 신체나이가 가장 낮았던 측정
+    rolling_window: int                         # 이동 평균에 쓴 최근 측정 수
+    rolling_avg_lo_age_value: Optional[float] = None
+    rolling_avg_percentile: Optional[float] = None
+    quantile_delta_from_previous: Dict[str, float] = {}
+    quantile_delta_from_first: Dict[str, float] = {}
+    current_week_streak: int                    # 이번 주 / 지난주까지 이어진 주 단위 연속 측정
+    longest_week_streak: int
+    current_improving_streak: int               # 직전보다 percentile 이 오른 연속 측정 수
+    longest_improving_streak: int
+
+
+@app.get("/users/{user_id}/physical-age/summary", response_model=PhysicalAgeSummaryResponse)
+def get_physical_age_summary(user_id: str):
+    """
+    진행 화면용 요약 (처음 / 최근 / 최고 기록, 이동 평균, 항목별 quantile 변화, streak).
+    저장 시점에 갱신해 둔 요약 한 행만 읽으며 측정 이력은 조회하지 않는다.
+    """
+    try:
+        summary = user_summaries.get(user_id)
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Supabase 조회 중 오류: {e}")
+
+    if summary is None:
+        raise HTTPException(status_code=404, detail="해당 사용자의 신체나이 기록이 없습니다.")
+    return PhysicalAgeSummaryResponse(user_id=user_id, **user_summary.present(summary))
+
+
+class CohortPercentileResponse(BaseModel):
+    metric: str
+    sex: str
+    age_band: str              # 실제로 사용한 코호트 (표본이 적으면 "all")
+    value: float
+    percentile: float          # 코호트에서 이 기록보다 못한 사람의 비율 (0~100)
+    count: int                 # 코호트 표본 수
+
+
+def _higher_is_better(metric: str, sex: str) -> bool:
+    """엔진 quantile 테이블 방향으로 판단 (값이 클수록 상위 quantile 이면 True)."""
+    try:
+        v = load_engine()[metric][sex].to_numpy(dtype=float)
+        return bool(v[-1] >= v[0])
+    except Exception:
+        return True
+
+
+@app.get("/cohort/percentile", response_model=CohortPercentileResponse)
+def get_cohort_percentile(metric: str, sex: str, value: float, age: Optional[int] = None):
+    """
+    앱 사용자(physical_age_assessments) 중 같은 성별 / 연령대에서 value 의 위치.
+    model.pkl 의 전국 기준표가 아니라 앱 사용자 분포(streaming sketch)로 계산하며 DB 를 조회하지 않는다.
+    """
+    if metric not in ENGINE_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric 은 {', '.join(ENGINE_METRICS)} 중 하나여야 합니다.")
+    try:
+        sex = normalize_sex_label(sex)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    band = age_band(age) or ALL_BAND
+    found = cohort_stats.cdf(metric, sex, band, value)
+    if band != ALL_BAND and (found is None or found[1] < COHORT_MIN_COUNT):
+        band = ALL_BAND
+        found = cohort_stats.cdf(metric, sex, band, value)
+    if found is None:
+        raise HTTPException(status_code=404, detail="해당 코호트의 측정 기록이 아직 없습니다.")
+
+    below, count = found
+    share = below if _higher_is_better(metric, sex) else 1.0 - below
+    return CohortPercentileResponse(
+        metric=metric,
+        sex=sex,
+        age_band=band,
+        value=value,
+        percentile=round(share * 100.0, 2),
+        count=int(count),
+    )
+
+
+_near_debug_sample = applog.sampler()
+
+
+def facility_etag(request: Request, response: Response) -> Optional[str]:
+    """
+    시설 스냅샷 버전 + 경로 + 정렬한 쿼리로 ETag 를 만들어
+    If-None-Match 가 같으면 엔드포인트를 실행하지 않고 304 (본문 없음).
+    """
+    try:
+        load_facilities()
+    except Exception:
+        return None  # 로딩 오류는 엔드포인트에서 500 으로 처리
+    if _facilities_version is None:
+        return None
+    etag = make_etag(_facilities_version, request.url.path, normalized_query(request.query_params.multi_items()))
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        NOT_MODIFIED.inc(route=request.url.path)
+        raise HTTPException(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return etag
+
+
 @app.get("/facilities/near", response_model=List[FacilityOut])
-def get_near_facilities(lat: float, lon: float, radius_km: float = 2.0):
+def get_near_facilities(
+    lat: float, lon: float, radius_km: float = 2.0, _etag: Optional[str] = Depends(facility_etag)
+):
     """
     lat/lon 기준 반경 radius_km 이내 공공체육시설 조회
     """
     try:
         df = load_facilities()
-        print("[DEBUG] 시설 개수:", len(df))
-        print("[DEBUG] lat range:", df["lat"].min(), " ~ ", df["lat"].max())
-        print("[DEBUG] lon range:", df["lon"].min(), " ~ ", df["lon"].max())
+        # DEBUG 가 꺼져 있으면 min/max 계산 없이 지나감
+        if log.isEnabledFor(logging.DEBUG) and _near_debug_sample():
+            log.debug(
+                "시설 개수: %d, lat range: %s ~ %s, lon range: %s ~ %s",
+                len(df), df["lat"].min(), df["lat"].max(), df["lon"].min(), df["lon"].max(),
+            )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -667,55 +1785,260 @@ def get_near_facilities(lat: float, lon: float, radius_km: float = 2.0):
     return results
 
 
+SYNC_VERSION_PATTERN = re.compile(r"[0-9A-Za-z][0-9A-Za-z-]{0,63}")
+
+
+def _facility_sync_index(version: str):
+    """공유 스냅샷에 남아 있는 이전 버전의 (id, 행 해시). 없거나 공유 스냅샷을 안 쓰면 None."""
+    if facility_store is None:
+        return None
+    try:
+        arrays, meta = facility_store.attach(version)
+    except (OSError, ValueError, KeyError):
+        return None
+    hashes = arrays.get(HASH_KEY)
+    if hashes is None:
+        # 행 해시를 저장하기 전에 만든 버전
+        df = pd.DataFrame({col: arrays[col] for col in meta["columns"]}, copy=False)
+        hashes = row_hashes(_facility_sync_frame(df))
+    return arrays["id"], hashes
+
+
+facility_sync = FacilitySync(_facility_sync_frame, _facility_sync_index)
+
+
+def _sync_response(request: Request, payload, etag: Optional[str]) -> Response:
+    # 버전별로 압축해 둔 본문을 그대로 보냄 (CompressionMiddleware 는 Content-Encoding 이 있으면 건너뜀)
+    body, encoding = payload.encoded(choose_encoding(request.headers.get("accept-encoding")))
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    if etag is not None:
+        headers["ETag"] = f'{etag[:-1]}-{encoding}"' if encoding else etag
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/facilities/snapshot")
+def get_facilities_snapshot(request: Request, etag: Optional[str] = Depends(facility_etag)):
+    """
+    전체 시설을 컬럼 단위 JSON 으로 (클라이언트 오프라인 반경 검색용).
+    {"version", "count", "columns": {"id": [...], "name": [...], "lat": [...], ...}}
+    version 을 보관했다가 /facilities/delta?since=<version> 으로 변경분만 받으면 된다.
+    """
+    try:
+        df = load_facilities()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return _sync_response(request, facility_sync.snapshot(_facilities_version, df), etag)
+
+
+@app.get("/facilities/delta")
+def get_facilities_delta(
+    request: Request,
+    since: str,
+    etag: Optional[str] = Depends(facility_etag),
+):
+    """
+    since 버전 이후 추가 / 변경된 시설(upserts, 스냅샷과 같은 컬럼 형식)과 삭제된 id(deleted).
+    since 버전을 서버가 더 이상 갖고 있지 않으면 410 → /facilities/snapshot 을 다시 받아야 함.
+    """
+    if not SYNC_VERSION_PATTERN.fullmatch(since):
+        raise HTTPException(status_code=400, detail="since 형식이 올바르지 않습니다.")
+    try:
+        df = load_facilities()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    payload = facility_sync.delta(since, _facilities_version, df)
+    if payload is None:
+        raise HTTPException(
+            status_code=410,
+            detail="since 버전 이후 변경분을 만들 수 없습니다. /facilities/snapshot 을 다시 받아 주세요.",
+        )
+    return _sync_response(request, payload, etag)
+
+
+class PopularFacility(FacilityOut):
+    score: float                        # 창(window) 기준 감쇠 횟수 (최근 창 길이 동안의 횟수 근사)
+    total: int                          # 누적 횟수
+    distance_km: Optional[float] = None
+
+
+# 반경 필터 전에 점수 순으로 뽑아 두는 후보 수
+POPULAR_MAX_CANDIDATES = int(os.getenv("POPULAR_MAX_CANDIDATES", "5000"))
+
+
+@app.get("/facilities/popular", response_model=List[PopularFacility])
+def get_popular_facilities(
+    status: str = "completed",
+    window: str = "7d",
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    radius_km: float = 5.0,
+    limit: int = 20,
+):
+    """
+    최근 많이 방문 / 완료된 이지팟 (메모리 카운터에서 응답, mission_logs 를 집계하지 않음).
+    lat / lon 을 주면 반경 radius_km 안의 시설만.
+    """
+    if status not in STATUSES:
+        raise HTTPException(status_code=400, detail=f"status 는 {', '.join(STATUSES)} 중 하나여야 합니다.")
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window 는 {', '.join(WINDOWS)} 중 하나여야 합니다.")
+    if not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="limit 은 1 ~ 100 사이여야 합니다.")
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="lat / lon 은 함께 지정해야 합니다.")
+
+    near = lat is not None
+    ranked = facility_popularity.top(status, window, POPULAR_MAX_CANDIDATES if near else limit)
+    if not ranked:
+        return []
+    try:
+        df = load_facilities()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    rows = {int(row["id"]): row for _, row in df[df["id"].isin([fid for fid, _, _ in ranked])].iterrows()}
+    results: List[PopularFacility] = []
+    for fid, score, total in ranked:
+        row = rows.get(fid)
+        if row is None:
+            continue
+        d = haversine_km(lat, lon, float(row["lat"]), float(row["lon"])) if near else None
+        if d is not None and d > radius_km:
+            continue
+        category = infer_category(row)
+        equip = row.get("detail_equip", "")
+        mission = str(equip) if (isinstance(equip, str) and equip.strip() != "") else f"{category} 운동"
+        results.append(
+            PopularFacility(
+                id=fid,
+                name=str(row["name"]),
+                lat=float(row["lat"]),
+                lon=float(row["lon"]),
+                address=str(row["address"]),
+                mission=mission,
+                category=category,
+                score=round(score, 3),
+                total=total,
+                distance_km=round(d, 3) if d is not None else None,
+            )
+        )
+        if len(results) >= limit:
+            break
+    return results
+
+
 @app.get("/route")
 def get_route(
     start_lat: float,
     start_lon: float,
     end_lat: float,
     end_lon: float,
+    encoding: str = "json",
+    tolerance_m: Optional[float] = None,
+    zoom: Optional[float] = None,
 ):
     """
     네이버 Driving Directions API 를 통해
     start -> end까지 도로 기반 경로를 받아와 polyline 좌표만 반환
     (현재 앱에서는 실제 길찾기 UI는 사용하지 않고, 경로 polyline만 사용 가능)
+    - 같은 출발/도착(좌표 반올림 기준) 경로는 캐시에서 응답
+    - encoding=polyline 이면 path 대신 encoded polyline 문자열(path_encoded)로 응답
+    - tolerance_m(미터) 또는 zoom(지도 줌 레벨)을 주면 화면 해상도에 맞게 단순화한 path 반환
     """
-    if not NAVER_CLIENT_ID or not NAVER_CLIENT_SECRET:
+    if encoding not in ("json", "polyline"):
+        raise HTTPException(status_code=400, detail="encoding 은 json 또는 polyline 이어야 합니다.")
+
+    if tolerance_m is None and zoom is not None:
+        if not 0 <= zoom <= 22:
+            raise HTTPException(status_code=400, detail="zoom 은 0 ~ 22 사이여야 합니다.")
+        tolerance_m = zoom_to_tolerance_m(zoom, (start_lat + end_lat) / 2)
+
+    try:
+        path = get_route_path(
+            (start_lon, start_lat), (end_lon, end_lat), "traoptimal", tolerance_m=tolerance_m
+        )
+    except DirectionsConfigError:
         raise HTTPException(status_code=500, detail="NAVER API 키가 설정되어 있지 않습니다.")
+    except NoRouteError:
+        raise HTTPException(status_code=404, detail="경로를 찾을 수 없습니다.")
+    except DirectionsError as e:
+        log.error("Navermap Directions response: %s", e.detail)
+        raise HTTPException(status_code=500, detail="네이버 길찾기 API 오류")
+    except Exception as e:
+        log.error("Navermap Directions exception: %s", e)
+        raise HTTPException(status_code=500, detail="경로 요청 실패")
 
-    url = "https://maps.apigw.ntruss.com/map-direction/v1/driving"
+    # path: [[lon, lat], ...]
+    if not path:
+        raise HTTPException(status_code=404, detail="경로를 찾을 수 없습니다.")
 
-    # 네이버는 "경도,위도" 순서!
-    params = {
-        "start": f"{start_lon},{start_lat}",
-        "goal": f"{end_lon},{end_lat}",
-        "option": "traoptimal",
-    }
+    if encoding == "polyline":
+        return {"path_encoded": encode_polyline(path), "encoding": "polyline5"}
+    return {"path": path}
 
-    headers = {
-        "X-NCP-APIGW-API-KEY-ID": NAVER_CLIENT_ID,
-        "X-NCP-APIGW-API-KEY": NAVER_CLIENT_SECRET,
-    }
+
+@app.get("/route/matrix", response_model=RouteMatrixResponse)
+def get_route_matrix(
+    lat: float,
+    lon: float,
+    facility_ids: List[int] = Query(..., description="facility_ids=1&facility_ids=2 ..."),
+):
+    """
+    사용자 위치 → 여러 이지팟까지 소요 시간/거리를 한 번에 조회 (추천 리스트의 "n분" 표시용).
+    - 시설 좌표는 facilities 캐시에서 조회
+    - 네이버 호출은 동시성 제한 + 호출별/전체 데드라인 적용, 경로 캐시 우선 사용
+    - 데드라인 안에 못 받은 항목은 status=timeout 으로 표시하고 partial=true
+    """
+    if not facility_ids:
+        raise HTTPException(status_code=400, detail="facility_ids 가 비어 있습니다.")
+    if len(facility_ids) > ROUTE_MATRIX_MAX_FACILITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"facility_ids 는 최대 {ROUTE_MATRIX_MAX_FACILITIES}개까지 가능합니다.",
+        )
 
     try:
-        res = requests.get(url, params=params, headers=headers, timeout=10)
-        if res.status_code != 200:
-            print("[ERROR] Navermap Directions response:", res.text)
-            raise HTTPException(status_code=500, detail="네이버 길찾기 API 오류")
+        df = load_facilities()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        data = res.json()
+    df_sel = df[df["id"].isin(facility_ids)]
+    coords = {
+        int(fid): (float(flon), float(flat))
+        for fid, flat, flon in zip(df_sel["id"], df_sel["lat"], df_sel["lon"])
+    }
 
-        routes = data.get("route", {}).get("traoptimal")
-        if not routes:
-            raise HTTPException(status_code=404, detail="경로를 찾을 수 없습니다.")
+    goals = [(fid, coords[fid]) for fid in facility_ids if fid in coords]
+    matrix = route_matrix(
+        (lon, lat),
+        goals,
+        "traoptimal",
+        call_timeout=ROUTE_MATRIX_CALL_TIMEOUT,
+        deadline=ROUTE_MATRIX_DEADLINE,
+    )
+    by_id = {r["id"]: r for r in matrix}
 
-        path = routes[0].get("path", [])  # [[lon, lat], ...]
+    items: List[RouteMatrixItem] = []
+    for fid in facility_ids:
+        r = by_id.get(fid)
+        if r is None:
+            items.append(RouteMatrixItem(facility_id=fid, status="not_found"))
+            continue
+        items.append(
+            RouteMatrixItem(
+                facility_id=fid,
+                status=r["status"],
+                duration_min=r.get("duration_min"),
+                distance_km=r.get("distance_km"),
+                error=r.get("error"),
+            )
+        )
 
-        return {"path": path}
-    except HTTPException:
-        raise
-    except Exception as e:
-        print("[ERROR] Navermap Directions exception:", e)
-        raise HTTPException(status_code=500, detail="경로 요청 실패")
+    partial = any(item.status not in ("ok", "no_route") for item in items)
+    return RouteMatrixResponse(partial=partial, items=items)
 
 
 @app.get("/recommend/facilities", response_model=List[RecommendedFacility])
@@ -724,6 +2047,7 @@ def recommend_facilities(
     lon: float,
     radius_km: float = 2.0,
     weak_point: Optional[str] = None,
+    _etag: Optional[str] = Depends(facility_etag),
 ):
     """
     위치 + 취약영역(weak_point)을 기준으로 시설 추천.
@@ -778,6 +2102,16 @@ class FavoriteToggleRequest(BaseModel):
     is_favorite: bool     # true면 추가, false면 제거
 
 
+class FavoriteBulkItem(BaseModel):
+    facility_id: int      # facilities.id
+    is_favorite: bool     # true면 추가, false면 제거
+
+
+class FavoriteBulkRequest(BaseModel):
+    user_id: str                  # auth.users.id (uuid)
+    items: List[FavoriteBulkItem] # 같은 facility_id 가 여러 번 오면 마지막 값 적용
+
+
 class MissionCompleteRequest(BaseModel):
     user_id: str          # auth.users.id
     facility_id: int      # facilities.id
@@ -790,12 +2124,13 @@ class MissionCompleteRequest(BaseModel):
 
 
 @app.post("/favorites/toggle")
-def toggle_favorite(req: FavoriteToggleRequest):
+def toggle_favorite(req: FavoriteToggleRequest, token_user_id: Optional[str] = Depends(current_user_id)):
     """
     즐겨찾기 ON/OFF 토글
     - is_favorite=True  → favorite_facilities 에 upsert(단순 insert, PK 충돌 시 무시)
     - is_favorite=False → favorite_facilities 에서 delete
     """
+    authorize_user(req.user_id, token_user_id)
     if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
         raise HTTPException(status_code=500, detail="Supabase 환경변수가 설정되지 않았습니다.")
 
@@ -809,7 +2144,7 @@ def toggle_favorite(req: FavoriteToggleRequest):
             "facility_id": req.facility_id,
         }
         try:
-            r = requests.post(url, headers=_sb_json_headers(), json=payload, timeout=5)
+            r = _sb_request("POST", table, url, headers=_sb_json_headers(), json=payload, timeout=5)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"즐겨찾기 추가 요청 실패: {e}")
 
@@ -818,6 +2153,7 @@ def toggle_favorite(req: FavoriteToggleRequest):
                 status_code=500,
                 detail=f"즐겨찾기 추가 실패: {r.status_code} {r.text}",
             )
+        _apply_favorites(req.user_id, added=[req.facility_id])
         return {"status": "ok", "is_favorite": True}
 
     else:
@@ -827,7 +2163,7 @@ def toggle_favorite(req: FavoriteToggleRequest):
             + f"?user_id=eq.{req.user_id}&facility_id=eq.{req.facility_id}"
         )
         try:
-            r = requests.delete(url, headers=_sb_json_headers(), timeout=5)
+            r = _sb_request("DELETE", table, url, headers=_sb_json_headers(), timeout=5)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"즐겨찾기 삭제 요청 실패: {e}")
 
@@ -836,46 +2172,91 @@ def toggle_favorite(req: FavoriteToggleRequest):
                 status_code=500,
                 detail=f"즐겨찾기 삭제 실패: {r.status_code} {r.text}",
             )
+        _apply_favorites(req.user_id, removed=[req.facility_id])
         return {"status": "ok", "is_favorite": False}
 
 
-@app.get("/favorites/by-user", response_model=List[FacilityOut])
-def get_favorite_facilities(user_id: str):
+@app.post("/favorites/bulk")
+def bulk_toggle_favorites(req: FavoriteBulkRequest, token_user_id: Optional[str] = Depends(current_user_id)):
     """
-    특정 유저의 즐겨찾기 이지팟 리스트
-    - favorite_facilities(user_id, facility_id) + facilities 캐시 DataFrame 활용
+    즐겨찾기 여러 건을 한 번에 반영
+    - 추가분은 PostgREST 배열 upsert 1회 (이미 있으면 무시)
+    - 제거분은 facility_id=in.(...) delete 1회
     """
+    authorize_user(req.user_id, token_user_id)
     if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
         raise HTTPException(status_code=500, detail="Supabase 환경변수가 설정되지 않았습니다.")
 
-    # 1) favorite_facilities 에서 facility_id 리스트 조회
+    # 같은 시설에 대한 토글이 여러 번이면 마지막 값만 반영
+    final: Dict[int, bool] = {}
+    for item in req.items:
+        final[item.facility_id] = item.is_favorite
+    added = sorted(fid for fid, fav in final.items() if fav)
+    removed = sorted(fid for fid, fav in final.items() if not fav)
+
+    url = _sb_table_url("favorite_facilities")
+
+    if added:
+        headers = _sb_json_headers()
+        headers["Prefer"] = "resolution=ignore-duplicates"
+        payload = [{"user_id": req.user_id, "facility_id": fid} for fid in added]
+        try:
+            r = _sb_request(
+                "POST",
+                "favorite_facilities",
+                url,
+                headers=headers,
+                params={"on_conflict": "user_id,facility_id"},
+                json=payload,
+                timeout=5,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"즐겨찾기 일괄 추가 요청 실패: {e}")
+        if r.status_code not in (200, 201, 204):
+            raise HTTPException(
+                status_code=500,
+                detail=f"즐겨찾기 일괄 추가 실패: {r.status_code} {r.text}",
+            )
+        _apply_favorites(req.user_id, added=added)
+
+    if removed:
+        params = {
+            "user_id": f"eq.{req.user_id}",
+            "facility_id": f"in.({','.join(str(fid) for fid in removed)})",
+        }
+        try:
+            r = _sb_request("DELETE", "favorite_facilities", url, headers=_sb_json_headers(), params=params, timeout=5)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"즐겨찾기 일괄 삭제 요청 실패: {e}")
+        if r.status_code not in (200, 204):
+            raise HTTPException(
+                status_code=500,
+                detail=f"즐겨찾기 일괄 삭제 실패: {r.status_code} {r.text}",
+            )
+        _apply_favorites(req.user_id, removed=removed)
+
+    return {"status": "ok", "added": added, "removed": removed}
+
+
+def _load_favorite_ids(user_id: str) -> List[int]:
+    """favorite_facilities 에서 user_id 의 facility_id 리스트 조회."""
     fav_url = (
         _sb_table_url("favorite_facilities")
         + f"?user_id=eq.{user_id}&select=facility_id"
     )
-    try:
-        r = requests.get(fav_url, headers=_sb_json_headers(), timeout=5)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"즐겨찾기 조회 실패: {e}")
-
+    r = _sb_request("GET", "favorite_facilities", fav_url, headers=_sb_json_headers(), timeout=5)
     if r.status_code != 200:
-        raise HTTPException(
-            status_code=500,
-            detail=f"즐겨찾기 조회 실패: {r.status_code} {r.text}",
-        )
+        raise RuntimeError(f"{r.status_code} {r.text}")
+    return [row["facility_id"] for row in r.json()]
+
 
-    rows = r.json()
-    facility_ids = [row["facility_id"] for row in rows]
+def _materialize_favorites(facility_ids) -> List[FacilityOut]:
+    """캐시된 facilities DataFrame 에서 facility_ids 에 해당하는 시설 응답 리스트 생성."""
     if not facility_ids:
         return []
 
-    # 2) 캐시된 facilities DataFrame 에서 해당 id들만 필터링
-    try:
-        df = load_facilities()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-    df_sel = df[df["id"].isin(facility_ids)]
+    df = load_facilities()
+    df_sel = df[df["id"].isin(list(facility_ids))]
 
     results: List[FacilityOut] = []
     for _, row in df_sel.iterrows():
@@ -893,21 +2274,58 @@ def get_favorite_facilities(user_id: str):
                 category=category,
             )
         )
-
     return results
 
 
+favorites_cache = FavoritesCache(
+    loader=_load_favorite_ids,
+    materialize=_materialize_favorites,
+    ttl=float(os.getenv("FAVORITES_CACHE_TTL", "600")),
+    max_users=int(os.getenv("FAVORITES_CACHE_MAX_USERS", "10000")),
+)
+if cache_invalidations is not None:
+    cache_invalidations.subscribe("favorites", favorites_cache.invalidate)
+
+
+def _apply_favorites(user_id: str, added=(), removed=()) -> None:
+    """즐겨찾기 변경을 이 워커 캐시에 write-through 하고 다른 워커에는 무효화를 알림."""
+    favorites_cache.apply(user_id, added=added, removed=removed)
+    _publish_invalidation("favorites", user_id)
+
+
+@app.get("/favorites/by-user", response_model=List[FacilityOut])
+def get_favorite_facilities(user_id: str, token_user_id: Optional[str] = Depends(current_user_id)):
+    """
+    특정 유저의 즐겨찾기 이지팟 리스트
+    - 사용자별 즐겨찾기 캐시에서 만들어 둔 시설 리스트를 그대로 반환
+    - 캐시에 없으면 favorite_facilities 를 한 번 읽고 facilities 캐시 DataFrame 으로 구성
+    """
+    authorize_user(user_id, token_user_id)
+    if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
+        raise HTTPException(status_code=500, detail="Supabase 환경변수가 설정되지 않았습니다.")
+
+    try:
+        return favorites_cache.get_facilities(user_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"즐겨찾기 조회 실패: {e}")
+
+
 @app.post("/mission/complete")
-def complete_mission(req: MissionCompleteRequest):
+def complete_mission(
+    req: MissionCompleteRequest,
+    wait: bool = False,
+    token_user_id: Optional[str] = Depends(current_user_id),
+):
     """
     미션 완료(또는 진행 상태) 기록 저장용 엔드포인트
-    - mission_logs 테이블에 1행 insert
+    - mission_logs 테이블에 1행 insert (write-behind 큐 경유)
+    - wait=true 면 저장이 끝날 때까지 기다려 삽입된 row 를 data 로 반환
+    - Supabase 장애 시에는 spool 에 보관하고 queued=true 로 응답 (요청은 실패시키지 않음)
     """
+    authorize_user(req.user_id, token_user_id)
     if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
         raise HTTPException(status_code=500, detail="Supabase 환경변수가 설정되지 않았습니다.")
 
-    url = _sb_table_url("mission_logs")
-
     # ✅ mission_id 는 일단 빼고 기본 필드만 넣기
     payload = {
         "user_id": req.user_id,
@@ -927,23 +2345,24 @@ def complete_mission(req: MissionCompleteRequest):
     if req.completed_at is not None:
         payload["completed_at"] = req.completed_at.isoformat()
 
+    fut = submit_write("mission_logs", payload)
+    facility_popularity.record(req.facility_id, req.status)
+    if req.status == "completed":
+        crew.leaderboards.add_score("missions", req.user_id)
+    if fut is None or not wait:
+        return {"status": "ok", "queued": True, "data": None}
+
     try:
-        r = requests.post(
-            url,
-            headers=_sb_json_headers(prefer_return=True),
-            json=payload,
-            timeout=5,
-        )
+        saved = fut.result(timeout=WRITE_BEHIND_WAIT_TIMEOUT)
+    except FutureTimeoutError:
+        raise HTTPException(status_code=504, detail="미션 로그 저장 대기 시간이 초과되었습니다.")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"미션 로그 저장 요청 실패: {e}")
-
-    if r.status_code not in (200, 201):
-        raise HTTPException(
-            status_code=500,
-            detail=f"미션 로그 저장 실패: {r.status_code} {r.text}",
-        )
+        raise HTTPException(status_code=500, detail=f"미션 로그 저장 실패: {e}")
 
-    return {"status": "ok", "data": r.json()}
+    if saved is None:
+        # flush 는 실패했지만 spool 에 보관됨
+        return {"status": "ok", "queued": True, "data": None}
+    return {"status": "ok", "data": [saved]}
 
 
 
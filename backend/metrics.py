@@ -0,0 +1,214 @@
+# backend/metrics.py
+# 프로세스 내 간단한 메트릭 레지스트리 (Prometheus text format 으로 노출)
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import applog
+
+log = applog.get_logger("metrics")
+
+# 요청 / 업스트림 지연 시간용 기본 버킷 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], float]]:
+        with self._lock:
+            return [(self.name, k, v) for k, v in self._values.items()]
+
+    def sample_labelnames(self, sample_name: str) -> Tuple[str, ...]:
+        return self.labelnames
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._fn: Optional[Callable[[], object]] = None
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], object]) -> None:
+        """
+        scrape 시점에 값을 계산하는 콜백 등록.
+        fn 은 float (라벨 없음) 또는 {라벨값 tuple: float} dict 를 반환.
+        """
+        self._fn = fn
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], float]]:
+        if self._fn is None:
+            return super().samples()
+        try:
+            value = self._fn()
+        except Exception as e:
+            log.warning("gauge %s 계산 실패: %s", self.name, e)
+            return []
+        if isinstance(value, dict):
+            return [(self.name, tuple(k), float(v)) for k, v in value.items()]
+        return [(self.name, (), float(value))]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        # 라벨 -> [버킷별 개수(비누적) ..., +Inf 개수], 합계
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[i] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def timer(self, **labels):
+        """with 블록 실행 시간(초)을 관측 (예외로 빠져나가도 기록)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def get(self, **labels) -> float:
+        """관측 횟수."""
+        with self._lock:
+            return float(sum(self._counts.get(self._key(labels), ())))
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], float]]:
+        with self._lock:
+            items = [(k, list(c), self._sums[k]) for k, c in self._counts.items()]
+        out = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                out.append((self.name + "_bucket", key + (le,), cumulative))
+            out.append((self.name + "_sum", key, total))
+            out.append((self.name + "_count", key, cumulative))
+        return out
+
+    def sample_labelnames(self, sample_name: str) -> Tuple[str, ...]:
+        if sample_name.endswith("_bucket"):
+            return self.labelnames + ("le",)
+        return self.labelnames
+
+
+_registry: Dict[str, _Metric] = {}
+_registry_lock = threading.Lock()
+
+
+def _register(metric: _Metric) -> _Metric:
+    with _registry_lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+    return _register(Counter(name, help_text, labelnames))
+
+
+def gauge(name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+    return _register(Gauge(name, help_text, labelnames))
+
+
+def histogram(
+    name: str,
+    help_text: str,
+    labelnames: Tuple[str, ...] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return _register(Histogram(name, help_text, labelnames, buckets))
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    parts = []
+    for n, v in zip(names, values):
+        v = v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{n}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render() -> str:
+    """등록된 모든 메트릭을 Prometheus text exposition 형식으로 직렬화."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+
+    lines: List[str] = []
+    for m in metrics:
+        lines.append(f"# HELP {m.name} {m.help}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        for name, label_values, value in m.samples():
+            labels = _format_labels(m.sample_labelnames(name), label_values)
+            lines.append(f"{name}{labels} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,196 @@
+# backend/popularity.py
+# 시설별 인기도 카운터 (/mission/complete 로 갱신, /facilities/popular 로 조회)
+#
+# - (facility_id, status) 마다 창(window)별 시간 감쇠 점수 + 누적 횟수
+#   점수는 지수 감쇠: score(t) = score(t0) * exp(-(t - t0) / τ) + 1, τ = 창 길이
+#   → "최근 τ 동안의 횟수" 를 지수 가중으로 근사 (24h / 7d 창을 따로 두지 않고 이벤트 하나로 갱신)
+# - 요청 경로에서는 메모리만 갱신 (lock 한 번, O(1))
+# - 워커마다 flush 이후 들어온 변화량(local)만 따로 모아 두었다가 주기적으로 Supabase 에 병합
+#   (merge 는 DB 함수가 as_of 기준으로 감쇠시켜 더하므로 워커 여러 개가 동시에 보내도 안전)
+# - 기동 시 / 주기적으로 Supabase 집계 테이블을 다시 읽어 base 로 삼는다 (다른 워커 기여분 포함)
+# - 조회 view = base + local (flush 에 성공한 local 은 base 에 접어 넣어 다음 reload 까지 빈틈 없음)
+
+import heapq
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import applog
+import metrics
+
+log = applog.get_logger("popularity")
+
+# 창 이름 → 감쇠 시간 상수(초)
+WINDOWS: Dict[str, float] = {"24h": 24 * 3600.0, "7d": 7 * 24 * 3600.0}
+STATUSES = ("started", "arrived", "completed")
+
+POPULARITY_EVENTS = metrics.counter(
+    "facility_popularity_events_total", "인기도 카운터에 반영한 미션 이벤트 수", ("status",)
+)
+POPULARITY_FLUSHES = metrics.counter(
+    "facility_popularity_flushes_total", "인기도 변화량 병합 / 스냅샷 로딩 결과", ("op", "result")
+)
+POPULARITY_TRACKED = metrics.gauge("facility_popularity_tracked", "인기도를 추적 중인 (시설, 상태) 수")
+
+Key = Tuple[int, str]  # (facility_id, status)
+
+
+class _Counter:
+    __slots__ = ("scores", "total", "as_of")
+
+    def __init__(self, as_of: float):
+        self.scores: Dict[str, float] = {w: 0.0 for w in WINDOWS}
+        self.total = 0
+        self.as_of = as_of
+
+    def decayed(self, window: str, now: float) -> float:
+        return self.scores[window] * math.exp(-max(0.0, now - self.as_of) / WINDOWS[window])
+
+    def advance(self, now: float) -> None:
+        if now > self.as_of:
+            for w, tau in WINDOWS.items():
+                self.scores[w] *= math.exp(-(now - self.as_of) / tau)
+            self.as_of = now
+
+    def add(self, other: "_Counter") -> None:
+        """other 를 더한다 (둘 중 늦은 as_of 기준으로 맞춘 뒤)."""
+        now = max(self.as_of, other.as_of)
+        self.advance(now)
+        for w in WINDOWS:
+            self.scores[w] += other.decayed(w, now)
+        self.total += other.total
+
+    def copy(self) -> "_Counter":
+        c = _Counter(self.as_of)
+        c.scores = dict(self.scores)
+        c.total = self.total
+        return c
+
+
+def _to_row(key: Key, c: _Counter) -> dict:
+    row = {
+        "facility_id": key[0],
+        "status": key[1],
+        "total": c.total,
+        "as_of": datetime.fromtimestamp(c.as_of, timezone.utc).isoformat(),
+    }
+    for w in WINDOWS:
+        row[f"score_{w}"] = c.scores[w]
+    return row
+
+
+def _from_row(row: dict) -> Tuple[Key, _Counter]:
+    as_of = datetime.fromisoformat(str(row["as_of"]).replace("Z", "+00:00")).timestamp()
+    c = _Counter(as_of)
+    for w in WINDOWS:
+        c.scores[w] = float(row.get(f"score_{w}") or 0.0)
+    c.total = int(row.get("total") or 0)
+    return (int(row["facility_id"]), str(row["status"])), c
+
+
+class PopularityCounters:
+    def __init__(
+        self,
+        merge: Optional[Callable[[List[dict]], None]] = None,
+        load: Optional[Callable[[], Iterable[dict]]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        merge(rows) : 변화량 row(_to_row 형식)를 집계 테이블에 병합. 실패하면 예외
+        load()      : 집계 테이블 전체 row
+        둘 다 없으면 이 프로세스 메모리에서만 센다.
+        """
+        self._merge = merge
+        self._load = load
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._base: Dict[Key, _Counter] = {}
+        self._local: Dict[Key, _Counter] = {}
+        self._view: Dict[Key, _Counter] = {}
+        POPULARITY_TRACKED.set_function(lambda: len(self._view))
+
+    # ---------- 요청 경로 ----------
+    def record(self, facility_id: int, status: str) -> None:
+        if status not in STATUSES:
+            return
+        now = self._clock()
+        key = (int(facility_id), status)
+        with self._lock:
+            for target in (self._local, self._view):
+                c = target.get(key)
+                if c is None:
+                    c = target[key] = _Counter(now)
+                c.advance(now)
+                for w in WINDOWS:
+                    c.scores[w] += 1.0
+                c.total += 1
+        POPULARITY_EVENTS.inc(status=status)
+
+    def top(
+        self,
+        status: str,
+        window: str,
+        limit: int,
+        accept: Optional[Callable[[int], bool]] = None,
+    ) -> List[Tuple[int, float, int]]:
+        """(facility_id, 감쇠 점수, 누적 횟수) 점수 내림차순 limit 개. accept 로 후보 시설 제한."""
+        now = self._clock()
+        with self._lock:
+            items = [(fid, c.decayed(window, now), c.total) for (fid, st), c in self._view.items() if st == status]
+        if accept is not None:
+            items = [it for it in items if accept(it[0])]
+        return heapq.nlargest(limit, (it for it in items if it[1] > 0), key=lambda it: it[1])
+
+    # ---------- 병합 / 스냅샷 ----------
+    def flush(self) -> int:
+        """local 변화량을 집계 테이블에 병합. 병합한 row 수 반환 (실패하면 local 로 되돌리고 예외)."""
+        if self._merge is None:
+            return 0
+        with self._lock:
+            pending, self._local = self._local, {}
+        if not pending:
+            return 0
+        try:
+            self._merge([_to_row(k, c) for k, c in pending.items()])
+        except Exception:
+            with self._lock:
+                for key, c in pending.items():
+                    cur = self._local.get(key)
+                    if cur is None:
+                        self._local[key] = c
+                    else:
+                        cur.add(c)
+            POPULARITY_FLUSHES.inc(op="flush", result="error")
+            raise
+        with self._lock:
+            for key, c in pending.items():
+                cur = self._base.get(key)
+                if cur is None:
+                    self._base[key] = c
+                else:
+                    cur.add(c)
+        POPULARITY_FLUSHES.inc(op="flush", result="ok")
+        return len(pending)
+
+    def reload(self) -> int:
+        """집계 테이블을 다시 읽어 base 교체 (+ 아직 flush 안 된 local). 읽은 row 수 반환."""
+        if self._load is None:
+            return 0
+        try:
+            base = dict(_from_row(row) for row in self._load())
+        except Exception:
+            POPULARITY_FLUSHES.inc(op="reload", result="error")
+            raise
+        with self._lock:
+            view = {k: c.copy() for k, c in base.items()}
+            for key, c in self._local.items():
+                cur = view.get(key)
+                if cur is None:
+                    view[key] = c.copy()
+                else:
+                    cur.add(c)
+            self._base, self._view = base, view
+        POPULARITY_FLUSHES.inc(op="reload", result="ok")
+        return len(base)
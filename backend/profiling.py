@@ -0,0 +1,382 @@
+# backend/profiling.py
+# 운영 중인 워커를 위한 on-demand 프로파일링
+#
+# - 요청 단위: 관리자 토큰과 함께 `X-Profile: 1` 헤더를 보내면 그 요청의 엔드포인트 함수를
+#   cProfile 로 감싸 실행하고, 응답 헤더 X-Profile-Id 로 결과 id 를 돌려준다.
+#   결과는 /admin/profiles/{id}?format=text|pstats|collapsed 로 조회
+#   (pstats: snakeviz / gprof2dot 입력, collapsed: flamegraph.pl / speedscope 입력)
+# - 샘플링: PROFILE_SAMPLE_EVERY=N 이면 N 번에 1번 요청을 자동으로 프로파일링해 링 버퍼에 보관
+# - 메모리: tracemalloc 스냅샷 + 등록된 데이터(시설 / 엔진)별 메모리 사용량
+#
+# 비활성(ADMIN_TOKEN 미설정)일 때는 미들웨어 자체를 붙이지 않고, 엔드포인트 래퍼는
+# contextvar 조회 한 번만 한다.
+#
+# 한계: cProfile 은 스레드 단위라 "엔드포인트 함수 본문"(sync 엔드포인트, 워커 스레드)만 측정한다.
+# 요청 body 파싱 / 응답 모델 검증 / async 엔드포인트는 포함되지 않으며, 그 구간은
+# http_request_duration_seconds 와 비교해서 본다.
+
+import cProfile
+import functools
+import inspect
+import io
+import itertools
+import marshal
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+
+import applog
+import metrics
+
+log = applog.get_logger("profiling")
+
+PROFILE_SAMPLE_EVERY = int(os.getenv("PROFILE_SAMPLE_EVERY", "0"))   # 0 이면 샘플링 안 함
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "50"))
+TRACEMALLOC_START = os.getenv("TRACEMALLOC_START", "false").lower() in ("1", "true", "yes")
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "10"))
+
+PROFILED_REQUESTS = metrics.counter(
+    "profiled_requests_total", "cProfile 로 측정한 요청 수", ("kind",)
+)
+
+if TRACEMALLOC_START and not tracemalloc.is_tracing():
+    # 엔진 / 시설 로딩 시점의 할당까지 잡으려면 import 시점에 시작해야 함
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+
+
+class _Session:
+    """한 요청의 프로파일링 상태 (엔드포인트가 실행된 스레드에서 profile 이 추가됨)."""
+
+    __slots__ = ("id", "kind", "profiles")
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind              # request (헤더) / sample (1-in-N)
+        self.profiles: List[cProfile.Profile] = []
+
+
+_current: ContextVar[Optional[_Session]] = ContextVar("profile_session", default=None)
+
+
+class _RawStats:
+    """marshal 된 stats dict 를 pstats.Stats 에 넘기기 위한 홀더."""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class ProfileRecord:
+    __slots__ = ("id", "kind", "method", "path", "route", "status", "duration", "created_at", "stats")
+
+    def __init__(self, session: _Session, scope, status: str, duration: float, stats: Optional[bytes]):
+        self.id = session.id
+        self.kind = session.kind
+        self.method = scope.get("method")
+        self.path = scope.get("path")
+        route = scope.get("route")
+        self.route = getattr(route, "path", None)
+        self.status = status
+        self.duration = duration
+        self.created_at = time.time()
+        self.stats = stats            # marshal(pstats dict), 엔드포인트가 실행되지 않았으면 None
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "duration_ms": round(self.duration * 1000, 3),
+            "created_at": self.created_at,
+            "has_stats": self.stats is not None,
+        }
+
+    def load_stats(self) -> pstats.Stats:
+        if self.stats is None:
+            raise LookupError("이 요청은 프로파일 데이터가 없습니다 (async 엔드포인트 / 라우트 없음).")
+        return pstats.Stats(_RawStats(marshal.loads(self.stats)))
+
+
+class ProfileBuffer:
+    def __init__(self, maxlen: int):
+        self._records: Deque[ProfileRecord] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, record: ProfileRecord) -> None:
+        with self._lock:
+            self._records.append(record)
+
+    def list(self) -> List[ProfileRecord]:
+        with self._lock:
+            return list(self._records)
+
+    def get(self, record_id: str) -> Optional[ProfileRecord]:
+        with self._lock:
+            for r in self._records:
+                if r.id == record_id:
+                    return r
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+
+profile_buffer = ProfileBuffer(PROFILE_BUFFER_SIZE)
+
+
+# =========================
+# 엔드포인트 래핑 (route_class)
+# =========================
+def _wrap_endpoint(call: Callable) -> Callable:
+    @functools.wraps(call)
+    def wrapped(*args, **kwargs):
+        session = _current.get()
+        if session is None:
+            return call(*args, **kwargs)
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError as e:
+            # 다른 프로파일러가 이미 켜져 있음 (동시에 여러 요청을 프로파일링하는 경우 등)
+            log.warning("프로파일링 건너뜀 (%s): %s", session.id, e)
+            return call(*args, **kwargs)
+        try:
+            return call(*args, **kwargs)
+        finally:
+            prof.disable()
+            session.profiles.append(prof)
+
+    return wrapped
+
+
+class ProfiledRoute(APIRoute):
+    """
+    sync 엔드포인트 함수를 프로파일링 가능한 래퍼로 바꾸는 route class.
+    (FastAPI 는 요청 시점에 dependant.call 을 호출하므로 생성 후 교체하면 된다)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        call = self.dependant.call
+        if call is not None and not inspect.iscoroutinefunction(call):
+            self.dependant.call = _wrap_endpoint(call)
+
+
+# =========================
+# 미들웨어
+# =========================
+def _merge_profiles(profiles: List[cProfile.Profile]) -> Optional[bytes]:
+    if not profiles:
+        return None
+    stats = pstats.Stats(profiles[0])
+    for p in profiles[1:]:
+        stats.add(p)
+    return marshal.dumps(stats.stats)
+
+
+class ProfilingMiddleware:
+    """
+    X-Profile 헤더(관리자 토큰 필요) 또는 1-in-N 샘플링으로 선택된 요청에 프로파일링 세션을 건다.
+    authorize(token) 은 X-Admin-Token 헤더 값이 맞는지 확인하는 함수.
+    """
+
+    def __init__(self, app, authorize: Callable[[Optional[str]], bool], sample_every: int = PROFILE_SAMPLE_EVERY):
+        self.app = app
+        self.authorize = authorize
+        self.sample_every = sample_every
+        self._counter = itertools.count()
+
+    def _select(self, scope) -> Optional[_Session]:
+        profile_header = admin_token = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                profile_header = value
+            elif name == b"x-admin-token":
+                admin_token = value.decode("latin-1")
+        if profile_header and profile_header not in (b"0", b"false"):
+            if self.authorize(admin_token):
+                return _Session("request")
+            return None
+        if self.sample_every > 0 and next(self._counter) % self.sample_every == 0:
+            return _Session("sample")
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        session = self._select(scope)
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                if session.kind == "request":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-id", session.id.encode("ascii")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current.set(session)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            duration = time.perf_counter() - started
+            stats = _merge_profiles(session.profiles)
+            if stats is not None or session.kind == "request":
+                profile_buffer.add(ProfileRecord(session, scope, status, duration, stats))
+                PROFILED_REQUESTS.inc(kind=session.kind)
+
+
+# =========================
+# 출력 형식
+# =========================
+def render_text(stats: pstats.Stats, sort: str = "cumulative", limit: int = 40) -> str:
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def render_collapsed(stats: pstats.Stats, max_depth: int = 64) -> str:
+    """
+    pstats 의 호출 관계로 재구성한 collapsed stack ("a;b;c 마이크로초").
+    cProfile 은 caller→callee 한 단계만 기록하므로, 각 함수의 시간을 호출자별 비율로 나눠 내려가는 근사치.
+    """
+    raw = stats.stats
+    children: Dict[tuple, Dict[tuple, float]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, {})[func] = edge[3]   # 그 호출 경로의 누적 시간
+
+    def label(func: tuple) -> str:
+        filename, line, name = func
+        return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ",")
+
+    folded: Dict[str, float] = {}
+
+    def walk(func: tuple, share: float, stack: List[str], seen: set) -> None:
+        _, _, tt, ct, _ = raw[func]
+        if ct <= 0 or share <= 0:
+            return
+        ratio = share / ct
+        stack.append(label(func))
+        key = ";".join(stack)
+        folded[key] = folded.get(key, 0.0) + tt * ratio
+        if len(stack) < max_depth:
+            for child, edge_ct in children.get(func, {}).items():
+                if child not in seen and child in raw:
+                    seen.add(child)
+                    walk(child, edge_ct * ratio, stack, seen)
+                    seen.discard(child)
+        stack.pop()
+
+    roots = [f for f, v in raw.items() if not v[4]]
+    for root in roots:
+        walk(root, raw[root][3], [], {root})
+
+    lines = [f"{k} {int(v * 1e6)}" for k, v in folded.items() if v * 1e6 >= 1]
+    return "\n".join(sorted(lines)) + "\n"
+
+
+def dump_pstats(stats: pstats.Stats) -> bytes:
+    """pstats.Stats.dump_stats 와 같은 바이너리 (python -m pstats / snakeviz 로 열 수 있음)."""
+    return marshal.dumps(stats.stats)
+
+
+def aggregate(records: List[ProfileRecord]) -> Optional[pstats.Stats]:
+    merged = None
+    for r in records:
+        if r.stats is None:
+            continue
+        if merged is None:
+            merged = r.load_stats()
+        else:
+            merged.add(_RawStats(marshal.loads(r.stats)))
+    return merged
+
+
+# =========================
+# 메모리 (tracemalloc + 데이터별 사용량)
+# =========================
+_memory_reporters: Dict[str, Callable[[], Optional[dict]]] = {}
+_baseline: Optional[tracemalloc.Snapshot] = None
+
+
+def register_memory_reporter(name: str, fn: Callable[[], Optional[dict]]) -> None:
+    """/admin/memory 에 표시할 데이터별 메모리 사용량 함수 등록 (로드 전이면 None 반환)."""
+    _memory_reporters[name] = fn
+
+
+def set_tracing(enable: bool, frames: int = TRACEMALLOC_FRAMES) -> bool:
+    global _baseline
+    if enable and not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    elif not enable and tracemalloc.is_tracing():
+        tracemalloc.stop()
+        _baseline = None
+    return tracemalloc.is_tracing()
+
+
+def take_baseline() -> None:
+    global _baseline
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc 이 꺼져 있습니다.")
+    _baseline = tracemalloc.take_snapshot()
+
+
+def memory_report(top: int = 20, key_type: str = "lineno", compare: bool = False) -> dict:
+    data = {}
+    for name, fn in _memory_reporters.items():
+        try:
+            data[name] = fn()
+        except Exception as e:
+            data[name] = {"error": str(e)}
+
+    report = {"data": data, "tracemalloc": {"tracing": tracemalloc.is_tracing()}}
+    if not tracemalloc.is_tracing():
+        return report
+
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),)
+    )
+    if compare and _baseline is not None:
+        stats = snapshot.compare_to(_baseline, key_type)[:top]
+        entries = [
+            {"where": str(s.traceback), "size_bytes": s.size, "size_diff_bytes": s.size_diff, "count": s.count}
+            for s in stats
+        ]
+    else:
+        stats = snapshot.statistics(key_type)[:top]
+        entries = [{"where": str(s.traceback), "size_bytes": s.size, "count": s.count} for s in stats]
+    report["tracemalloc"].update(
+        {
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "compared_to_baseline": compare and _baseline is not None,
+            "top": entries,
+        }
+    )
+    return report
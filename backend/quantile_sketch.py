@@ -0,0 +1,173 @@
+# backend/quantile_sketch.py
+# 병합 가능한 streaming quantile sketch (merging t-digest, Dunning 2019)
+#
+# - add(x) 는 버퍼에 쌓았다가 버퍼가 차면 한 번에 정렬 / 압축 → 관측 1건당 상수 비용
+# - 중심점(centroid) 수는 compression(δ) 에 비례 (δ=100 이면 대략 50~100개)
+#   양 끝(q≈0, q≈1)은 중심점을 잘게 유지해 꼬리 quantile 오차가 작다 (k1 scale function)
+# - merge(other) / to_dict / from_dict 로 워커 간 합치기, 파일 저장
+# - cdf / quantile 은 중심점 누적 가중치를 미리 계산해 두고 bisect 한 번으로 계산 (수 µs)
+
+import math
+from bisect import bisect_left, bisect_right
+from typing import List, Optional
+
+DEFAULT_COMPRESSION = 100.0
+
+
+class TDigest:
+    __slots__ = ("compression", "count", "min", "max", "_means", "_weights", "_buffer", "_centers")
+
+    def __init__(self, compression: float = DEFAULT_COMPRESSION):
+        self.compression = float(compression)
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means: List[float] = []
+        self._weights: List[float] = []
+        self._buffer: List[tuple] = []
+        # 중심점별 누적 가중치 (중심점 가운데 기준). 압축할 때마다 다시 계산
+        self._centers: Optional[List[float]] = None
+
+    # ---------- 입력 ----------
+    def add(self, x: float, w: float = 1.0) -> None:
+        x = float(x)
+        if math.isnan(x) or w <= 0:
+            return
+        self._buffer.append((x, float(w)))
+        self.count += w
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        if other.count <= 0:
+            return self
+        other._compress()
+        self._buffer.extend(zip(other._means, other._weights))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def copy(self) -> "TDigest":
+        return TDigest.from_dict(self.to_dict())
+
+    # ---------- 압축 ----------
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q_limit(self, q0: float) -> float:
+        k = self._k(q0) + 1.0
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self) -> None:
+        if not self._buffer and self._centers is not None:
+            return
+        items = sorted(list(zip(self._means, self._weights)) + self._buffer)
+        self._buffer = []
+        means: List[float] = []
+        weights: List[float] = []
+        if items:
+            total = sum(w for _, w in items)
+            so_far = 0.0
+            q_limit = self._q_limit(0.0)
+            cur_m, cur_w = items[0]
+            for m, w in items[1:]:
+                if (so_far + cur_w + w) / total <= q_limit:
+                    cur_w += w
+                    cur_m += (m - cur_m) * w / cur_w
+                else:
+                    means.append(cur_m)
+                    weights.append(cur_w)
+                    so_far += cur_w
+                    q_limit = self._q_limit(so_far / total)
+                    cur_m, cur_w = m, w
+            means.append(cur_m)
+            weights.append(cur_w)
+        self._means, self._weights = means, weights
+
+        centers = []
+        acc = 0.0
+        for w in weights:
+            centers.append(acc + w / 2)
+            acc += w
+        self._centers = centers
+
+    # ---------- 조회 ----------
+    def cdf(self, x: float) -> float:
+        """x 보다 작은 값의 비율 추정 (0~1). 비어 있으면 nan."""
+        if self.count <= 0:
+            return math.nan
+        self._compress()
+        if x < self.min:
+            return 0.0
+        if x >= self.max:
+            return 1.0
+        means, centers = self._means, self._centers
+        n = len(means)
+        if n == 1 or self.max == self.min:
+            return (x - self.min) / (self.max - self.min) if self.max > self.min else 0.5
+
+        i = bisect_right(means, x)
+        if i == 0:
+            # min ~ 첫 중심점 사이
+            span = means[0] - self.min
+            return centers[0] * ((x - self.min) / span if span > 0 else 1.0) / self.count
+        if i == n:
+            # 마지막 중심점 ~ max 사이
+            span = self.max - means[-1]
+            frac = (x - means[-1]) / span if span > 0 else 0.0
+            return (centers[-1] + (self.count - centers[-1]) * frac) / self.count
+        lo, hi = means[i - 1], means[i]
+        frac = (x - lo) / (hi - lo) if hi > lo else 0.5
+        return (centers[i - 1] + (centers[i] - centers[i - 1]) * frac) / self.count
+
+    def quantile(self, q: float) -> float:
+        """q(0~1) 위치의 값 추정. 비어 있으면 nan."""
+        if self.count <= 0:
+            return math.nan
+        self._compress()
+        q = min(1.0, max(0.0, float(q)))
+        target = q * self.count
+        means, centers = self._means, self._centers
+        if len(means) == 1:
+            return self.min + (self.max - self.min) * q
+        if target <= centers[0]:
+            return self.min + (means[0] - self.min) * (target / centers[0] if centers[0] > 0 else 0.0)
+        if target >= centers[-1]:
+            tail = self.count - centers[-1]
+            return means[-1] + (self.max - means[-1]) * ((target - centers[-1]) / tail if tail > 0 else 0.0)
+        i = bisect_left(centers, target)
+        c0, c1 = centers[i - 1], centers[i]
+        return means[i - 1] + (means[i] - means[i - 1]) * (target - c0) / (c1 - c0)
+
+    # ---------- 직렬화 ----------
+    def to_dict(self) -> dict:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "centroids": [[m, w] for m, w in zip(self._means, self._weights)],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TDigest":
+        d = cls(data.get("compression", DEFAULT_COMPRESSION))
+        centroids = data.get("centroids") or []
+        if centroids:
+            d._means = [float(m) for m, _ in centroids]
+            d._weights = [float(w) for _, w in centroids]
+            d.count = float(sum(d._weights))
+            d.min = float(data["min"])
+            d.max = float(data["max"])
+        d._centers = None
+        d._compress()
+        return d
@@ -0,0 +1,116 @@
+# backend/route_cache.py
+# 길찾기 결과 LRU + TTL 캐시 (선택적으로 로컬 디스크(SQLite)에 영속화)
+# 디스크 쪽은 열 때와 put purge_every 번마다 만료 항목을 지우고, max_disk_entries 를 넘으면 오래된 것부터 지운다
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable, Optional, Tuple
+
+import metrics
+
+ROUTE_CACHE_REQUESTS = metrics.counter(
+    "route_cache_requests_total", "경로 캐시 조회 수 (hit / disk_hit / miss)", ("result",)
+)
+
+
+class RouteCache:
+    def __init__(
+        self,
+        max_entries: int = 5000,
+        ttl: float = 6 * 3600,
+        path: Optional[Path] = None,
+        max_disk_entries: int = 50000,
+        purge_every: int = 500,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.purge_every = purge_every
+        self._puts = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if path is not None:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS routes (key TEXT PRIMARY KEY, stored_at REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS routes_stored_at ON routes (stored_at)")
+            self.purge_expired()
+
+    @staticmethod
+    def _disk_key(key: Hashable) -> str:
+        return json.dumps(key, separators=(",", ":"))
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    ROUTE_CACHE_REQUESTS.inc(result="hit")
+                    return entry[1]
+                del self._entries[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT stored_at, payload FROM routes WHERE key = ?", (self._disk_key(key),)
+                ).fetchone()
+                if row is not None and now - row[0] < self.ttl:
+                    value = json.loads(row[1])
+                    self._put_memory(key, row[0], value)
+                    ROUTE_CACHE_REQUESTS.inc(result="disk_hit")
+                    return value
+
+        ROUTE_CACHE_REQUESTS.inc(result="miss")
+        return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, now, value)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO routes (key, stored_at, payload) VALUES (?, ?, ?)",
+                    (self._disk_key(key), now, json.dumps(value, ensure_ascii=False)),
+                )
+                self._puts += 1
+                if self._puts % self.purge_every == 0:
+                    self._purge_locked()
+
+    def _put_memory(self, key: Hashable, stored_at: float, value: Any) -> None:
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def purge_expired(self) -> None:
+        """디스크에 남은 만료 항목 정리 + max_disk_entries 초과분(오래된 것부터) 삭제."""
+        if self._conn is None:
+            return
+        with self._lock:
+            self._purge_locked()
+
+    def _purge_locked(self) -> None:
+        self._conn.execute("DELETE FROM routes WHERE stored_at < ?", (time.time() - self.ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM routes").fetchone()
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM routes WHERE key IN (SELECT key FROM routes ORDER BY stored_at LIMIT ?)", (excess,)
+            )
+
+    def disk_entries(self) -> int:
+        if self._conn is None:
+            return 0
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM routes").fetchone()[0]
@@ -0,0 +1,148 @@
+# backend/route_geometry.py
+# 경로 polyline 관련 유틸 (압축 인코딩 / 줌 레벨별 단순화)
+
+from __future__ import annotations
+
+import math
+from typing import List, Optional, Sequence
+
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+POLYLINE_PRECISION = 5
+
+
+def _encode_value(v: int, out: List[str]) -> None:
+    v = ~(v << 1) if v < 0 else (v << 1)
+    while v >= 0x20:
+        out.append(chr((0x20 | (v & 0x1F)) + 63))
+        v >>= 5
+    out.append(chr(v + 63))
+
+
+def encode_polyline(path: Sequence[Sequence[float]], precision: int = POLYLINE_PRECISION) -> str:
+    """
+    네이버 path ([[lon, lat], ...]) 를 Google encoded polyline 문자열로 인코딩.
+    표준 알고리즘대로 (lat, lon) 순서로 이전 점과의 차이를 zigzag + 5bit varint 로 기록한다.
+    """
+    factor = 10 ** precision
+    out: List[str] = []
+    prev_lat = prev_lon = 0
+    for point in path:
+        lon, lat = point[0], point[1]
+        ilat = int(round(lat * factor))
+        ilon = int(round(lon * factor))
+        _encode_value(ilat - prev_lat, out)
+        _encode_value(ilon - prev_lon, out)
+        prev_lat, prev_lon = ilat, ilon
+    return "".join(out)
+
+
+def decode_polyline(encoded: str, precision: int = POLYLINE_PRECISION) -> List[List[float]]:
+    """encode_polyline 의 역변환. 결과는 [[lon, lat], ...] (네이버 path 와 같은 순서)."""
+    factor = 10 ** precision
+    path: List[List[float]] = []
+    index = 0
+    lat = lon = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = 0
+            result = 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1F) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else (result >> 1))
+        lat += deltas[0]
+        lon += deltas[1]
+        path.append([lon / factor, lat / factor])
+    return path
+
+
+# =========================
+# 경로 단순화 (Douglas–Peucker)
+# =========================
+EARTH_RADIUS_M = 6371000.0
+# Web Mercator 줌 0 에서 적도 기준 1픽셀 = 156543.03m
+_METERS_PER_PIXEL_Z0 = 156543.03392
+
+
+def zoom_to_tolerance_m(zoom: float, lat: float, pixels: float = 1.0) -> float:
+    """지도 줌 레벨에서 화면 pixels 픽셀에 해당하는 거리(m). 이보다 작은 굴곡은 화면에 안 보임."""
+    return pixels * _METERS_PER_PIXEL_Z0 * math.cos(math.radians(lat)) / (2 ** zoom)
+
+
+def _project_m(path: np.ndarray) -> np.ndarray:
+    """[[lon, lat], ...] → 첫 점 기준 equirectangular 평면 좌표(m). 도시 규모 경로엔 충분히 정확."""
+    lat0 = math.radians(float(path[0, 1]))
+    x = np.radians(path[:, 0]) * math.cos(lat0) * EARTH_RADIUS_M
+    y = np.radians(path[:, 1]) * EARTH_RADIUS_M
+    return np.column_stack((x - x[0], y - y[0]))
+
+
+def simplify_mask(xy: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Douglas–Peucker 로 남길 점의 bool 마스크 계산.
+    재귀 대신 스택을 쓰고, 구간마다 내부 점들의 선분 거리를 numpy 로 한 번에 계산한다.
+    """
+    n = len(xy)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    if n < 3:
+        return keep
+
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j - i < 2:
+            continue
+        a = xy[i]
+        b = xy[j]
+        pts = xy[i + 1 : j]
+        ab = b - a
+        ab_len2 = float(ab @ ab)
+        if ab_len2 == 0.0:
+            d = np.hypot(pts[:, 0] - a[0], pts[:, 1] - a[1])
+        else:
+            # 선분(a, b)까지의 거리 (투영점을 선분 안으로 clip)
+            t = np.clip(((pts - a) @ ab) / ab_len2, 0.0, 1.0)
+            proj = a + t[:, None] * ab
+            d = np.hypot(pts[:, 0] - proj[:, 0], pts[:, 1] - proj[:, 1])
+        k = int(np.argmax(d))
+        if d[k] > tolerance:
+            m = i + 1 + k
+            keep[m] = True
+            stack.append((i, m))
+            stack.append((m, j))
+    return keep
+
+
+def simplify_path(
+    path: Sequence[Sequence[float]],
+    tolerance_m: Optional[float] = None,
+    zoom: Optional[float] = None,
+) -> List[List[float]]:
+    """
+    네이버 path([[lon, lat], ...])를 허용 오차 tolerance_m(미터) 로 단순화.
+    tolerance_m 대신 zoom 을 주면 해당 줌의 1픽셀 크기를 허용 오차로 사용.
+    시작/끝 점은 항상 유지된다.
+    """
+    if len(path) < 3:
+        return [list(p) for p in path]
+
+    arr = np.asarray(path, dtype=float)
+    if tolerance_m is None:
+        if zoom is None:
+            return arr.tolist()
+        tolerance_m = zoom_to_tolerance_m(zoom, float(arr[:, 1].mean()))
+
+    keep = simplify_mask(_project_m(arr), float(tolerance_m))
+    return arr[keep].tolist()
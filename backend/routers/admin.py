@@ -0,0 +1,107 @@
+# routers/admin.py
+# 관리자 전용: 프로파일 결과 조회 / 메모리 스냅샷 (X-Admin-Token 필요, ADMIN_TOKEN 미설정 시 404)
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+import profiling
+from routers.auth import require_admin
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+)
+
+PROFILE_FORMATS = ("text", "pstats", "collapsed")
+
+
+def _render(stats, fmt: str, sort: str, limit: int, filename: str) -> Response:
+    if fmt == "pstats":
+        return Response(
+            content=profiling.dump_pstats(stats),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.pstats"'},
+        )
+    if fmt == "collapsed":
+        return PlainTextResponse(profiling.render_collapsed(stats))
+    try:
+        return PlainTextResponse(profiling.render_text(stats, sort=sort, limit=limit))
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 sort 입니다: {sort}")
+
+
+@router.get("/profiles")
+def list_profiles():
+    """링 버퍼에 남아 있는 프로파일 목록 (최근 순)."""
+    return [r.summary() for r in reversed(profiling.profile_buffer.list())]
+
+
+@router.get("/profiles/aggregate")
+def aggregate_profiles(
+    route: Optional[str] = Query(None, description="라우트 템플릿 (예: /facilities/near). 없으면 전체"),
+    format: str = Query("text", description="text / pstats / collapsed"),
+    sort: str = Query("cumulative"),
+    limit: int = Query(40, ge=1, le=500),
+):
+    """버퍼의 프로파일을 합쳐서 반환 (샘플링 모드에서 어디에 시간이 쓰이는지 보기용)."""
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format 은 {PROFILE_FORMATS} 중 하나여야 합니다.")
+    records = [r for r in profiling.profile_buffer.list() if route is None or r.route == route]
+    stats = profiling.aggregate(records)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="집계할 프로파일이 없습니다.")
+    return _render(stats, format, sort, limit, "aggregate")
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(
+    profile_id: str,
+    format: str = Query("text", description="text / pstats / collapsed"),
+    sort: str = Query("cumulative"),
+    limit: int = Query(40, ge=1, le=500),
+):
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format 은 {PROFILE_FORMATS} 중 하나여야 합니다.")
+    record = profiling.profile_buffer.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="프로파일을 찾을 수 없습니다 (버퍼에서 밀려났을 수 있음).")
+    try:
+        stats = record.load_stats()
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _render(stats, format, sort, limit, profile_id)
+
+
+@router.delete("/profiles")
+def clear_profiles():
+    profiling.profile_buffer.clear()
+    return {"ok": True}
+
+
+@router.get("/memory")
+def get_memory(
+    top: int = Query(20, ge=1, le=200),
+    key_type: str = Query("lineno", description="lineno / filename / traceback"),
+    compare: bool = Query(False, description="baseline 스냅샷 대비 증가분"),
+):
+    """시설 / 엔진 데이터 메모리 사용량 + (켜져 있으면) tracemalloc 상위 할당 위치."""
+    if key_type not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="key_type 은 lineno / filename / traceback 중 하나여야 합니다.")
+    return profiling.memory_report(top=top, key_type=key_type, compare=compare)
+
+
+@router.post("/memory/tracing")
+def set_memory_tracing(enable: bool = True, frames: int = Query(10, ge=1, le=100)):
+    """tracemalloc 켜기 / 끄기 (켜져 있는 동안 모든 할당에 오버헤드가 있음)."""
+    return {"tracing": profiling.set_tracing(enable, frames)}
+
+
+@router.post("/memory/baseline")
+def take_memory_baseline():
+    try:
+        profiling.take_baseline()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"ok": True}
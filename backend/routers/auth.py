@@ -1,14 +1,192 @@
 # server/routers/auth.py
-from fastapi import APIRouter, HTTPException
+import asyncio
+import hmac
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
 from pydantic import BaseModel, EmailStr
 from passlib.hash import bcrypt
-from datetime import datetime
+
+import applog
+import metrics
+from session_tokens import InvalidToken, SessionTokens
 
 router = APIRouter()
+log = applog.get_logger("auth")
 
 # 실제로는 DB 세션 주입해서 써야 함
 fake_users = {}  # <- 일단 프론트 연동 테스트용
 
+# =========================
+# bcrypt 전용 프로세스 풀
+# =========================
+# bcrypt 1회 = 수백 ms CPU. 요청 워커(threadpool)에서 직접 돌리면 로그인 폭주 시
+# 다른 엔드포인트까지 굶게 되므로 코어 수만큼의 프로세스 풀로 넘기고 await 한다.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))              # work factor (2^rounds)
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", str(os.cpu_count() or 1)))
+# 풀에 동시에 걸려 있을 수 있는 해시 작업 수 상한 (넘으면 바로 503)
+AUTH_MAX_PENDING = int(os.getenv("AUTH_MAX_PENDING", str(AUTH_HASH_WORKERS * 4)))
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+AUTH_HASH_PENDING = metrics.gauge(
+    "auth_hash_pending", "bcrypt 프로세스 풀에 걸려 있는(대기 + 실행 중) 작업 수"
+)
+AUTH_HASH_REJECTED = metrics.counter(
+    "auth_hash_rejected_total", "대기열 상한으로 거절된 signup/login 수", ("op",)
+)
+
+
+def _hash_password(password: str, rounds: int) -> str:
+    return bcrypt.using(rounds=rounds).hash(password)
+
+
+def _verify_password(password: str, password_hash: str) -> bool:
+    return bcrypt.verify(password, password_hash)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=AUTH_HASH_WORKERS)
+    return _hash_pool
+
+
+async def _run_hash_job(op: str, fn, *args):
+    """
+    해시 작업을 프로세스 풀에서 실행하고 결과를 await.
+    대기 중인 작업이 AUTH_MAX_PENDING 이상이면 큐에 쌓지 않고 바로 503.
+    (이벤트 루프 스레드에서만 호출되므로 _pending 은 락 없이 갱신)
+    """
+    global _pending
+    if _pending >= AUTH_MAX_PENDING:
+        AUTH_HASH_REJECTED.inc(op=op)
+        raise HTTPException(
+            status_code=503,
+            detail="로그인 요청이 많습니다. 잠시 후 다시 시도해 주세요.",
+            headers={"Retry-After": "1"},
+        )
+
+    _pending += 1
+    AUTH_HASH_PENDING.set(_pending)
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_pool(), fn, *args)
+    finally:
+        _pending -= 1
+        AUTH_HASH_PENDING.set(_pending)
+
+
+# =========================
+# 세션 토큰 (HMAC 서명, DB 조회 없이 검증)
+# =========================
+# 모든 워커가 같은 키로 서명 / 검증해야 하므로 임의 키를 만들지 않는다.
+# 없으면 로그인 / 토큰 검증 / 로그아웃은 503 (토큰 없이 쓰는 엔드포인트는 그대로 동작)
+SESSION_SECRET = os.getenv("SESSION_SECRET") or None
+if not SESSION_SECRET:
+    log.error("SESSION_SECRET 이 설정되지 않아 로그인을 사용할 수 없습니다.")
+
+# 로그아웃(토큰 폐기)을 워커끼리 공유하는 SQLite 파일 (첫 검증 / 로그아웃 때 연다).
+# 워커들이 같은 디스크를 볼 때만 의미가 있고, 호스트가 여러 대면 호스트마다 따로 적용된다 (그 경우 SESSION_TTL 을 짧게 둘 것)
+SESSION_REVOCATION_PATH = Path(
+    os.getenv("SESSION_REVOCATION_PATH", str(Path(__file__).resolve().parent.parent / "data" / "session_revocations.sqlite3"))
+)
+
+session_tokens: Optional[SessionTokens] = (
+    SessionTokens(
+        SESSION_SECRET.encode("utf-8"),
+        ttl=float(os.getenv("SESSION_TTL", str(7 * 24 * 3600))),
+        revocation_path=SESSION_REVOCATION_PATH,
+        sync_interval=float(os.getenv("SESSION_REVOCATION_SYNC_INTERVAL", "1")),
+    )
+    if SESSION_SECRET
+    else None
+)
+
+
+def _tokens() -> SessionTokens:
+    if session_tokens is None:
+        raise HTTPException(status_code=503, detail="SESSION_SECRET 이 설정되지 않아 로그인을 사용할 수 없습니다.")
+    return session_tokens
+
+
+# true 면 인증이 필요한 엔드포인트에서 토큰 없는 요청을 401 로 거절
+AUTH_REQUIRED = os.getenv("AUTH_REQUIRED", "false").lower() in ("1", "true", "yes")
+
+
+# 관리자 전용 엔드포인트(/admin/*, X-Profile 헤더) 토큰. 비어 있으면 관리 기능 비활성
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """FastAPI dependency: X-Admin-Token 헤더 확인. 관리 기능이 꺼져 있으면 404."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다.")
+
+
+def _bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Authorization 헤더 형식이 올바르지 않습니다.")
+    return token.strip()
+
+
+def current_user_id(authorization: Optional[str] = Header(None)) -> Optional[str]:
+    """
+    FastAPI dependency: Bearer 토큰을 검증해 user_id 반환.
+    토큰이 없으면 None (AUTH_REQUIRED 면 401). 네트워크 I/O 없음.
+    """
+    token = _bearer_token(authorization)
+    if token is None:
+        if AUTH_REQUIRED:
+            raise HTTPException(status_code=401, detail="로그인이 필요합니다.")
+        return None
+    try:
+        return _tokens().verify(token)
+    except InvalidToken as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+
+def peek_user_id(authorization: Optional[str]) -> Optional[str]:
+    """Authorization 헤더의 user_id. 없거나 올바르지 않으면 None (예외 없음, 수락 제어 미들웨어용)."""
+    try:
+        token = _bearer_token(authorization)
+        return _tokens().verify(token) if token else None
+    except Exception:
+        # 형식 오류 / 서명 불일치 / 깨진 헤더 바이트 등 무엇이든 IP 기준으로 넘어간다
+        return None
+
+
+def authorize_user(user_id: str, token_user_id: Optional[str]) -> None:
+    """요청 대상 user_id 가 토큰 주인과 같은지 확인 (토큰이 있을 때만)."""
+    if token_user_id is not None and token_user_id != user_id:
+        raise HTTPException(status_code=403, detail="다른 사용자의 데이터에 접근할 수 없습니다.")
+
+
+@router.on_event("shutdown")
+def _shutdown_hash_pool():
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+
 class SignUpIn(BaseModel):
     nickname: str
     email: EmailStr
@@ -19,11 +197,15 @@ class LoginIn(BaseModel):
     password: str
 
 @router.post("/signup")
-def signup(payload: SignUpIn):
+async def signup(payload: SignUpIn):
+    if payload.email in fake_users:
+        raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다.")
+    password_hash = await _run_hash_job("signup", _hash_password, payload.password, BCRYPT_ROUNDS)
+    # 해시 계산 사이에 같은 이메일로 가입이 끝났을 수 있으므로 한 번 더 확인
     if payload.email in fake_users:
         raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다.")
-    password_hash = bcrypt.hash(payload.password)
     fake_users[payload.email] = {
+        "id": str(uuid.uuid4()),
         "nickname": payload.nickname,
         "password_hash": password_hash,
         "created_at": datetime.utcnow(),
@@ -31,9 +213,23 @@ def signup(payload: SignUpIn):
     return {"ok": True}
 
 @router.post("/login")
-def login(payload: LoginIn):
+async def login(payload: LoginIn):
+    tokens = _tokens()   # 키가 없으면 bcrypt 계산 전에 503
     user = fake_users.get(payload.email)
-    if not user or not bcrypt.verify(payload.password, user["password_hash"]):
+    if not user or not await _run_hash_job(
+        "login", _verify_password, payload.password, user["password_hash"]
+    ):
         raise HTTPException(status_code=401, detail="이메일 또는 비밀번호가 올바르지 않습니다.")
-    # 나중에 JWT 토큰으로 교체
-    return {"token": "dummy-session-token"}
+    token, exp = tokens.issue(user["id"])
+    return {"token": token, "user_id": user["id"], "expires_at": exp}
+
+@router.post("/logout")
+def logout(authorization: Optional[str] = Header(None)):
+    token = _bearer_token(authorization)
+    if token is None:
+        raise HTTPException(status_code=401, detail="로그인이 필요합니다.")
+    try:
+        _tokens().revoke(token)
+    except InvalidToken as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    return {"ok": True}
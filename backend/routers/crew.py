@@ -1,6 +1,291 @@
-from fastapi import APIRouter
-router = APIRouter()
+# routers/crew.py
+# 크루 / 크루원 관리와 크루 리더보드 (/crews/*)
+#
+# - 멤버십은 Supabase crews / crew_members 에 저장하고, 리더보드는 워커 메모리의 leaderboard.CrewLeaderboards
+#   (크루 × 보드마다 정렬 구조)에서 응답 → 순위 / top-K 조회 O(log n), 요청마다 정렬하지 않음
+# - 점수 갱신: 사용자 요약 저장 시 improvement, /mission/complete(status=completed) 시 missions +1 (main.py 에서 연결)
+# - 기동 시 + CREW_LEADERBOARD_REFRESH_INTERVAL 마다 Supabase 에서 다시 구성
+#   (다른 워커에서 들어온 가입 / 탈퇴 / 미션 완료는 다음 재구성 때 반영)
+#   재구성 스레드는 main.py on_startup / on_shutdown 에서 start_refresh() / stop_refresh() 로 관리
+#   (router.on_event 는 FastAPI 버전에 따라 두 번 불릴 수 있음)
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
-@router.get("/ping")
-def ping_user():
-    return {"message": "user router ok"}
+import requests
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, field_validator
+
+import applog
+import upstream
+from leaderboard import BOARDS, CrewLeaderboards
+from routers.auth import authorize_user, current_user_id
+
+router = APIRouter(prefix="/crews", tags=["crew"])
+log = applog.get_logger("crew")
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+CREW_LEADERBOARD_REFRESH_INTERVAL = float(os.getenv("CREW_LEADERBOARD_REFRESH_INTERVAL", "300"))  # 0 이면 기동 시 1회
+CREW_PAGE_SIZE = int(os.getenv("CREW_PAGE_SIZE", "1000"))
+# user_id=in.(...) 한 번에 넣는 개수 (URL 길이 제한)
+CREW_USER_CHUNK = 200
+LEADERBOARD_MAX_LIMIT = 100
+
+MISSION_COUNTS_VIEW = "user_completed_mission_counts"
+
+leaderboards = CrewLeaderboards()
+_refresh_stop = threading.Event()
+
+
+# =========================
+# Supabase
+# =========================
+def _enabled() -> bool:
+    return bool(SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY)
+
+
+def _require_supabase() -> None:
+    if not _enabled():
+        raise HTTPException(status_code=500, detail="Supabase 환경변수가 설정되지 않았습니다.")
+
+
+def _headers(prefer: Optional[str] = None) -> Dict[str, str]:
+    headers = {
+        "apikey": SUPABASE_SERVICE_ROLE_KEY,
+        "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+        "Content-Type": "application/json",
+    }
+    if prefer:
+        headers["Prefer"] = prefer
+    return headers
+
+
+def _sb(method: str, table: str, **kwargs) -> requests.Response:
+    kwargs.setdefault("timeout", 5)
+    return upstream.request("supabase", table, method, f"{SUPABASE_URL}/rest/v1/{table}", **kwargs)
+
+
+def _load_members() -> List[Tuple[int, str]]:
+    """crew_members 전체 (crew_id, user_id). Range 페이징."""
+    members: List[Tuple[int, str]] = []
+    start = 0
+    while True:
+        headers = {**_headers(), "Range-Unit": "items", "Range": f"{start}-{start + CREW_PAGE_SIZE - 1}"}
+        params = {"select": "crew_id,user_id", "order": "crew_id.asc,user_id.asc"}
+        resp = _sb("GET", "crew_members", headers=headers, params=params, timeout=30)
+        resp.raise_for_status()
+        data = resp.json()
+        members.extend((int(r["crew_id"]), str(r["user_id"])) for r in data)
+        if len(data) < CREW_PAGE_SIZE:
+            return members
+        start += CREW_PAGE_SIZE
+
+
+def _chunks(user_ids: Iterable[str]) -> Iterable[List[str]]:
+    ids = sorted(user_ids)
+    for i in range(0, len(ids), CREW_USER_CHUNK):
+        yield ids[i:i + CREW_USER_CHUNK]
+
+
+def _load_scores(user_ids: Set[str]) -> Dict[str, Dict[str, float]]:
+    """크루원들의 improvement(요약의 first / latest lo_age_value) 와 완료 미션 수."""
+    scores: Dict[str, Dict[str, float]] = {b: {} for b in BOARDS}
+    for chunk in _chunks(user_ids):
+        in_filter = f"in.({','.join(chunk)})"
+        # 요약 jsonb 전체 대신 필요한 두 값만
+        resp = _sb(
+            "GET", "physical_age_user_summaries", headers=_headers(), timeout=30,
+            params={
+                "select": "user_id,first:summary->first->lo_age_value,latest:summary->latest->lo_age_value",
+                "user_id": in_filter,
+            },
+        )
+        resp.raise_for_status()
+        for r in resp.json():
+            if r.get("first") is not None and r.get("latest") is not None:
+                scores["improvement"][str(r["user_id"])] = float(r["first"]) - float(r["latest"])
+
+        resp = _sb(
+            "GET", MISSION_COUNTS_VIEW, headers=_headers(), timeout=30,
+            params={"select": "user_id,missions", "user_id": in_filter},
+        )
+        resp.raise_for_status()
+        for r in resp.json():
+            scores["missions"][str(r["user_id"])] = float(r["missions"])
+    return scores
+
+
+def rebuild_leaderboards() -> int:
+    """Supabase 멤버십 / 점수로 리더보드 재구성. 멤버십 수 반환."""
+    return leaderboards.rebuild(_load_members, _load_scores)
+
+
+def _refresh_loop() -> None:
+    while True:
+        try:
+            rebuild_leaderboards()
+        except Exception as e:
+            log.error("크루 리더보드 재구성 실패: %s", e)
+        if CREW_LEADERBOARD_REFRESH_INTERVAL <= 0 or _refresh_stop.wait(CREW_LEADERBOARD_REFRESH_INTERVAL):
+            return
+
+
+def start_refresh() -> None:
+    if _enabled():
+        threading.Thread(target=_refresh_loop, name="crew-leaderboard", daemon=True).start()
+
+
+def stop_refresh() -> None:
+    _refresh_stop.set()
+
+
+def _crew_exists(crew_id: int) -> bool:
+    """리더보드에 없는 크루(크루원 0명 또는 없는 크루)가 실제로 있는지 Supabase 에서 확인."""
+    _require_supabase()
+    resp = _sb("GET", "crews", headers=_headers(), params={"select": "id", "id": f"eq.{crew_id}"})
+    resp.raise_for_status()
+    return bool(resp.json())
+
+
+def _require_crew(crew_id: int) -> None:
+    if not _crew_exists(crew_id):
+        raise HTTPException(status_code=404, detail="크루를 찾을 수 없습니다.")
+
+
+# =========================
+# 모델
+# =========================
+def _check_board(board: str) -> str:
+    if board not in BOARDS:
+        raise HTTPException(status_code=400, detail=f"board 는 {BOARDS} 중 하나여야 합니다.")
+    return board
+
+
+class CrewCreateRequest(BaseModel):
+    name: str
+
+    @field_validator("name")
+    @classmethod
+    def validate_name(cls, v: str) -> str:
+        v = v.strip()
+        if not v or len(v) > 50:
+            raise ValueError("크루 이름은 1~50자여야 합니다.")
+        return v
+
+
+class CrewJoinRequest(BaseModel):
+    user_id: str
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: str
+    score: float
+
+
+class LeaderboardResponse(BaseModel):
+    crew_id: int
+    board: str
+    total: int
+    entries: List[LeaderboardEntry]
+
+
+class LeaderboardRankResponse(BaseModel):
+    crew_id: int
+    board: str
+    user_id: str
+    rank: int
+    total: int
+    score: float
+
+
+# =========================
+# 엔드포인트
+# =========================
+@router.post("")
+def create_crew(req: CrewCreateRequest):
+    _require_supabase()
+    resp = _sb("POST", "crews", headers=_headers("return=representation"), json=[{"name": req.name}])
+    if resp.status_code >= 400:
+        raise HTTPException(status_code=500, detail=f"크루 생성 실패: {resp.text}")
+    return resp.json()[0]
+
+
+@router.post("/{crew_id}/members")
+def join_crew(crew_id: int, req: CrewJoinRequest, token_user_id: Optional[str] = Depends(current_user_id)):
+    """크루 가입 (이미 가입되어 있으면 그대로 성공)."""
+    authorize_user(req.user_id, token_user_id)
+    _require_supabase()
+    resp = _sb(
+        "POST", "crew_members",
+        headers=_headers("return=minimal,resolution=ignore-duplicates"),
+        params={"on_conflict": "crew_id,user_id"},
+        json=[{"crew_id": crew_id, "user_id": req.user_id}],
+    )
+    if resp.status_code == 409:
+        # crews FK 위반
+        raise HTTPException(status_code=404, detail="크루를 찾을 수 없습니다.")
+    if resp.status_code >= 400:
+        raise HTTPException(status_code=500, detail=f"크루 가입 실패: {resp.text}")
+    leaderboards.join(crew_id, req.user_id)
+    return {"status": "ok"}
+
+
+@router.delete("/{crew_id}/members/{user_id}")
+def leave_crew(crew_id: int, user_id: str, token_user_id: Optional[str] = Depends(current_user_id)):
+    authorize_user(user_id, token_user_id)
+    _require_supabase()
+    resp = _sb(
+        "DELETE", "crew_members", headers=_headers("return=minimal"),
+        params={"crew_id": f"eq.{crew_id}", "user_id": f"eq.{user_id}"},
+    )
+    if resp.status_code >= 400:
+        raise HTTPException(status_code=500, detail=f"크루 탈퇴 실패: {resp.text}")
+    leaderboards.leave(crew_id, user_id)
+    return {"status": "ok"}
+
+
+@router.get("/{crew_id}/members", response_model=List[str])
+def list_crew_members(crew_id: int):
+    members = leaderboards.members(crew_id)
+    if members is None:
+        _require_crew(crew_id)
+        return []
+    return members
+
+
+@router.get("/{crew_id}/leaderboard", response_model=LeaderboardResponse)
+def crew_leaderboard(
+    crew_id: int,
+    board: str = Query("improvement", description="improvement(신체나이 감소량) / missions(완료 미션 수)"),
+    limit: int = Query(10, ge=1, le=LEADERBOARD_MAX_LIMIT),
+):
+    """크루 상위 limit 명 (동점은 같은 순위)."""
+    _check_board(board)
+    found = leaderboards.top(crew_id, board, limit)
+    if found is None:
+        _require_crew(crew_id)
+        found = (0, [])
+    total, top = found
+    return LeaderboardResponse(
+        crew_id=crew_id,
+        board=board,
+        total=total,
+        entries=[LeaderboardEntry(rank=r, user_id=u, score=round(s, 3)) for r, u, s in top],
+    )
+
+
+@router.get("/{crew_id}/leaderboard/{user_id}", response_model=LeaderboardRankResponse)
+def crew_leaderboard_rank(crew_id: int, user_id: str, board: str = Query("improvement")):
+    _check_board(board)
+    found = leaderboards.rank(crew_id, board, user_id)
+    if found is None:
+        if leaderboards.members(crew_id) is None:
+            _require_crew(crew_id)
+        raise HTTPException(status_code=404, detail="크루원이 아닙니다.")
+    rank, total, score = found
+    return LeaderboardRankResponse(
+        crew_id=crew_id, board=board, user_id=user_id, rank=rank, total=total, score=round(score, 3)
+    )
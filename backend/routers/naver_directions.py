@@ -1,17 +1,27 @@
 # routers/naver_directions.py
 from fastapi import APIRouter, HTTPException, Query
-import requests
-import os
+
+from directions import DirectionsError, get_driving_route, parse_lonlat
+from route_geometry import encode_polyline
 
 router = APIRouter(
     prefix="/naver",
     tags=["naver-directions"],
 )
 
-NAVER_CLIENT_ID = os.getenv("NAVER_CLIENT_ID")
-NAVER_CLIENT_SECRET = os.getenv("NAVER_CLIENT_SECRET")
 
-BASE_URL = "https://maps.apigw.ntruss.com/map-direction/v1/driving"
+def _encode_paths(data: dict) -> dict:
+    """응답 안의 모든 경로 path 를 encoded polyline(path_encoded)으로 바꾼 사본 반환."""
+    encoded = dict(data)
+    encoded["route"] = {
+        option: [
+            {**{k: v for k, v in r.items() if k != "path"}, "path_encoded": encode_polyline(r.get("path", []))}
+            for r in routes
+        ]
+        for option, routes in (data.get("route") or {}).items()
+    }
+    encoded["encoding"] = "polyline5"
+    return encoded
 
 
 @router.get("/directions")
@@ -19,53 +29,29 @@ def get_directions(
     start: str = Query(..., description="경도,위도 (예: 126.9780,37.5665)"),
     goal: str = Query(..., description="경도,위도 (예: 126.9920,37.5700)"),
     option: str = Query("traoptimal", description="경로 옵션 (traoptimal / trafast / tracomfort 등)"),
+    encoding: str = Query("json", description="json (원본) / polyline (path 를 encoded polyline 으로)"),
 ):
     """
     네이버 Directions V1 Driving API 프록시 엔드포인트.
     Flutter → (내 서버) → Naver API 구조로 사용.
+    같은 출발/도착(좌표 반올림 기준) + 옵션 요청은 경로 캐시에서 응답.
     """
-    if not NAVER_CLIENT_ID or not NAVER_CLIENT_SECRET:
-        # .env 안 읽힌 경우
-        raise HTTPException(
-            status_code=500,
-            detail="NAVER_CLIENT_ID / NAVER_CLIENT_SECRET 환경변수가 설정되지 않았습니다.",
-        )
-
-    headers = {
-        "X-NCP-APIGW-API-KEY-ID": NAVER_CLIENT_ID,
-        "X-NCP-APIGW-API-KEY": NAVER_CLIENT_SECRET,
-    }
-
-    params = {
-        "start": start,
-        "goal": goal,
-        "option": option,
-    }
+    if encoding not in ("json", "polyline"):
+        raise HTTPException(status_code=400, detail="encoding 은 json 또는 polyline 이어야 합니다.")
 
     try:
-        resp = requests.get(BASE_URL, headers=headers, params=params, timeout=5)
-    except requests.RequestException as e:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Naver Directions 호출 실패: {e}",
-        )
+        start_lonlat = parse_lonlat(start)
+        goal_lonlat = parse_lonlat(goal)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start / goal 은 '경도,위도' 형식이어야 합니다.")
 
-    # 네이버 응답 코드 그대로 체크
-    if resp.status_code != 200:
-        raise HTTPException(
-            status_code=resp.status_code,
-            detail=f"Naver API error: {resp.text}",
-        )
-
-    data = resp.json()
+    try:
+        data = get_driving_route(start_lonlat, goal_lonlat, option, timeout=5)
+    except DirectionsError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
-    # 네이버 JSON 내부 code 체크 (0이 정상)
-    if isinstance(data, dict) and data.get("code") != 0:
-        # 네이버가 내부 에러코드를 줄 때
-        raise HTTPException(
-            status_code=400,
-            detail={"naver_code": data.get("code"), "naver_message": data.get("message")},
-        )
+    if encoding == "polyline":
+        return _encode_paths(data)
 
     # 정상일 때 네이버 JSON 그대로 프론트에 전달
     return data
@@ -0,0 +1,189 @@
+# backend/session_tokens.py
+# HMAC 서명 세션 토큰 (stateless)
+#
+# 형식: base64url(payload JSON) + "." + base64url(HMAC-SHA256(payload))
+#   payload = {"sub": user_id, "exp": 만료 unix time, "jti": 토큰 고유 id}
+# 서버 어느 워커에서든 SESSION_SECRET 만 같으면 DB 조회 없이 검증 가능.
+# 같은 토큰의 반복 검증은 작은 LRU 로 HMAC 계산도 생략하고,
+# 로그아웃한 토큰은 만료 시각까지 revocation set 에 보관한다.
+# revocation_path 를 주면 폐기 목록을 워커들이 같이 보는 SQLite(WAL) 파일에도 기록하고,
+# 검증 때 sync_interval 초마다 새로 추가된 항목만 읽어 온다 (다른 워커의 로그아웃은 최대 그만큼 늦게 반영).
+
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import applog
+import metrics
+
+log = applog.get_logger("session_tokens")
+
+TOKEN_VERIFICATIONS = metrics.counter(
+    "session_token_verifications_total", "세션 토큰 검증 결과 수", ("result",)
+)
+
+
+class InvalidToken(Exception):
+    """서명 불일치 / 형식 오류 / 만료 / 폐기된 토큰."""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class SessionTokens:
+    def __init__(
+        self,
+        secret: bytes,
+        ttl: float = 7 * 24 * 3600,
+        cache_size: int = 10000,
+        revocation_path: Optional[Path] = None,
+        sync_interval: float = 1.0,
+    ):
+        self._secret = secret
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.sync_interval = sync_interval
+        # token -> (sub, exp, jti)
+        self._verified: "OrderedDict[str, Tuple[str, float, str]]" = OrderedDict()
+        # jti -> exp (만료가 지나면 정리)
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        # 워커 간 공유 폐기 목록 (없으면 이 프로세스 안에서만 유효). 파일은 처음 필요할 때 연다
+        self.revocation_path = Path(revocation_path) if revocation_path is not None else None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._seen_seq = 0
+        self._synced_at = 0.0
+
+    def _sign(self, body: str) -> str:
+        return _b64encode(hmac.new(self._secret, body.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self, user_id: str) -> Tuple[str, float]:
+        """user_id 용 토큰 발급. (token, exp) 반환."""
+        exp = int(time.time() + self.ttl)
+        payload = {"sub": user_id, "exp": exp, "jti": secrets.token_urlsafe(8)}
+        body = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        return f"{body}.{self._sign(body)}", exp
+
+    def verify(self, token: str) -> str:
+        """토큰을 검증하고 user_id(sub) 반환. 실패 시 InvalidToken."""
+        now = time.time()
+        with self._lock:
+            self._sync_revoked(now)
+            cached = self._verified.get(token)
+            if cached is not None:
+                sub, exp, jti = cached
+                if exp <= now or jti in self._revoked:
+                    del self._verified[token]
+                else:
+                    self._verified.move_to_end(token)
+                    TOKEN_VERIFICATIONS.inc(result="cache_hit")
+                    return sub
+
+        sub, exp, jti = self._decode(token)
+        if exp <= now:
+            TOKEN_VERIFICATIONS.inc(result="expired")
+            raise InvalidToken("만료된 토큰입니다.")
+        with self._lock:
+            if jti in self._revoked:
+                TOKEN_VERIFICATIONS.inc(result="revoked")
+                raise InvalidToken("로그아웃된 토큰입니다.")
+            self._verified[token] = (sub, exp, jti)
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+        TOKEN_VERIFICATIONS.inc(result="ok")
+        return sub
+
+    def _decode(self, token: str) -> Tuple[str, float, str]:
+        # 정상 토큰은 base64url + "." 뿐. 비 ASCII 는 _sign(encode("ascii")) / compare_digest 에서
+        # InvalidToken 이 아닌 예외가 나므로 먼저 걸러낸다
+        if not isinstance(token, str) or not token.isascii():
+            TOKEN_VERIFICATIONS.inc(result="malformed")
+            raise InvalidToken("토큰 형식이 올바르지 않습니다.")
+        try:
+            body, sig = token.split(".", 1)
+            valid = hmac.compare_digest(sig, self._sign(body))
+        except (ValueError, TypeError):
+            TOKEN_VERIFICATIONS.inc(result="malformed")
+            raise InvalidToken("토큰 형식이 올바르지 않습니다.")
+        if not valid:
+            TOKEN_VERIFICATIONS.inc(result="bad_signature")
+            raise InvalidToken("토큰 서명이 올바르지 않습니다.")
+        try:
+            payload = json.loads(_b64decode(body))
+            return str(payload["sub"]), float(payload["exp"]), str(payload["jti"])
+        except Exception:
+            TOKEN_VERIFICATIONS.inc(result="malformed")
+            raise InvalidToken("토큰 형식이 올바르지 않습니다.")
+
+    def revoke(self, token: str) -> None:
+        """토큰 폐기 (로그아웃). 서명이 맞는 토큰만 등록."""
+        _, exp, jti = self._decode(token)
+        now = time.time()
+        with self._lock:
+            self._revoked[jti] = exp
+            self._verified.pop(token, None)
+            # 이미 만료된 항목 정리 (만료 토큰은 어차피 검증에서 걸러짐)
+            for k in [k for k, e in self._revoked.items() if e <= now]:
+                del self._revoked[k]
+            if self.revocation_path is not None:
+                try:
+                    conn = self._db()
+                    conn.execute("BEGIN")
+                    conn.execute("INSERT INTO revoked (jti, exp) VALUES (?, ?)", (jti, exp))
+                    conn.execute("DELETE FROM revoked WHERE exp <= ?", (now,))
+                    conn.execute("COMMIT")
+                except (sqlite3.Error, OSError) as e:
+                    # 공유 기록에 실패해도 이 워커에서는 폐기된 상태로 남는다
+                    if self._conn is not None and self._conn.in_transaction:
+                        self._conn.execute("ROLLBACK")
+                    log.error("토큰 폐기 공유 기록 실패: %s", e)
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """공유 폐기 목록 연결 (self._lock 안에서 호출). 처음 부를 때 파일 / 테이블 생성."""
+        if self._conn is None and self.revocation_path is not None:
+            self.revocation_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.revocation_path), check_same_thread=False, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS revoked (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    jti TEXT    NOT NULL,
+                    exp REAL    NOT NULL
+                )
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def _sync_revoked(self, now: float) -> None:
+        """다른 워커가 폐기한 토큰을 읽어 온다 (self._lock 안에서 호출). sync_interval 에 한 번만."""
+        if self.revocation_path is None or now - self._synced_at < self.sync_interval:
+            return
+        self._synced_at = now
+        try:
+            rows = self._db().execute(
+                "SELECT seq, jti, exp FROM revoked WHERE seq > ? ORDER BY seq", (self._seen_seq,)
+            ).fetchall()
+        except (sqlite3.Error, OSError) as e:
+            log.warning("토큰 폐기 목록 읽기 실패: %s", e)
+            return
+        for seq, jti, exp in rows:
+            self._seen_seq = seq
+            if exp > now:
+                self._revoked[jti] = exp
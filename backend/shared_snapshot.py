@@ -0,0 +1,188 @@
+# backend/shared_snapshot.py
+# uvicorn --workers N 에서 워커들이 같은 데이터(시설 컬럼 / 엔진 테이블)를 공유하기 위한 스냅샷 저장소
+#
+# 디렉터리 구조 (root/name/):
+#   CURRENT            {"version", "created_at", "source"} — 워커가 붙어야 할 최신 버전
+#   .lock              빌드 리더 선출용 flock
+#   v<version>/        컬럼별 .npy + meta.json (한 번 쓰고 바꾸지 않음)
+#
+# - 가장 먼저 lock 을 잡은 프로세스(리더)만 원본(Supabase / model.pkl)을 읽어 새 버전 디렉터리를 만들고
+#   CURRENT 를 원자적으로 교체한다. 나머지 워커는 np.load(mmap_mode="r") 로 읽기 전용 attach
+#   → 데이터는 OS page cache 한 벌만 사용 (root 를 /dev/shm 아래로 두면 디스크도 안 거침)
+# - 갱신 시 새 버전을 옆에 만들고 CURRENT 만 바꾸므로, 이전 버전을 보고 있던 워커는
+#   current_version() 이 바뀐 것을 보고 새 버전으로 갈아탄다. 이전 버전 디렉터리는 keep 개만 남기고
+#   지우는데, 이미 mmap 된 파일은 unlink 후에도 매핑이 끝날 때까지 유효하다 (POSIX).
+
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from lazy_imports import lazy_import
+import applog
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: 리더 선출 없이 각자 빌드 (rename 이 원자적이라 결과는 같음)
+    fcntl = None
+
+np = lazy_import("numpy")
+log = applog.get_logger("shared_snapshot")
+
+SNAPSHOT_BUILDS = metrics.counter(
+    "shared_snapshot_builds_total", "리더로서 새 스냅샷 버전을 만든 횟수", ("name",)
+)
+SNAPSHOT_ATTACHES = metrics.counter(
+    "shared_snapshot_attaches_total", "스냅샷 버전에 attach 한 횟수", ("name",)
+)
+
+Build = Callable[[], Tuple[Dict[str, "np.ndarray"], dict]]
+
+
+class SnapshotStore:
+    def __init__(self, root: Path, name: str, keep: int = 2, check_interval: float = 1.0):
+        self.name = name
+        self.dir = Path(root) / name
+        self.keep = keep
+        self.check_interval = check_interval
+        self._current_path = self.dir / "CURRENT"
+        # CURRENT 파일 확인 결과 캐시 (요청마다 파일을 읽지 않도록)
+        self._checked_at = 0.0
+        self._current_mtime: Optional[int] = None
+        self._current: Optional[dict] = None
+        self._check_lock = threading.Lock()
+
+    # ---------- 버전 확인 ----------
+    def current(self, force: bool = False) -> Optional[dict]:
+        """CURRENT 내용. check_interval 안에는 캐시된 값을 그대로 반환."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return self._current
+        with self._check_lock:
+            self._checked_at = now
+            try:
+                mtime = self._current_path.stat().st_mtime_ns
+            except FileNotFoundError:
+                self._current_mtime = self._current = None
+                return None
+            if mtime != self._current_mtime:
+                try:
+                    self._current = json.loads(self._current_path.read_text(encoding="utf-8"))
+                    self._current_mtime = mtime
+                except (OSError, ValueError):
+                    # 교체 중인 파일을 읽은 경우 다음 확인 때 다시 읽음
+                    pass
+            return self._current
+
+    def current_version(self, force: bool = False) -> Optional[str]:
+        info = self.current(force)
+        return info["version"] if info else None
+
+    def _is_fresh(self, info: Optional[dict], max_age: float, source: Optional[str]) -> bool:
+        if not info or not (self.dir / f"v{info['version']}").is_dir():
+            return False
+        if source is not None and info.get("source") != source:
+            return False
+        return max_age <= 0 or time.time() - float(info["created_at"]) < max_age
+
+    def is_current(self, version: Optional[str], max_age: float = 0.0, source: Optional[str] = None) -> bool:
+        """version 이 지금 CURRENT 이고 다시 빌드할 필요도 없으면 True (load_or_build 를 건너뛰어도 됨)."""
+        info = self.current(force=True)
+        return version is not None and info is not None and info["version"] == version and self._is_fresh(
+            info, max_age, source
+        )
+
+    # ---------- 빌드 / attach ----------
+    @contextmanager
+    def _leader_lock(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.dir / ".lock", "a+") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def load_or_build(
+        self,
+        build: Build,
+        max_age: float = 0.0,
+        source: Optional[str] = None,
+    ) -> Tuple[str, Dict[str, "np.ndarray"], dict]:
+        """
+        유효한 최신 버전이 있으면 attach, 없으면 (lock 을 잡은 한 프로세스만) build() 로 만들어 공개.
+        max_age > 0 이면 그보다 오래된 버전은 다시 빌드. source 가 다르면(원본 파일 변경 등) 다시 빌드.
+        반환: (version, {컬럼: 읽기 전용 배열}, meta)
+        """
+        info = self.current(force=True)
+        if not self._is_fresh(info, max_age, source):
+            with self._leader_lock():
+                # lock 을 기다리는 동안 다른 프로세스가 이미 만들었을 수 있음
+                info = self.current(force=True)
+                if not self._is_fresh(info, max_age, source):
+                    try:
+                        arrays, meta = build()
+                    except Exception as e:
+                        # 원본을 못 읽으면 오래된 버전이라도 있으면 그대로 사용
+                        if not info or not (self.dir / f"v{info['version']}").is_dir():
+                            raise
+                        log.warning("%s 스냅샷 갱신 실패, 기존 버전 사용: %s", self.name, e)
+                    else:
+                        self.publish(arrays, meta, source)
+                        info = self.current(force=True)
+        arrays, meta = self.attach(info["version"])
+        return info["version"], arrays, meta
+
+    def publish(self, arrays: Dict[str, "np.ndarray"], meta: dict, source: Optional[str] = None) -> str:
+        """새 버전 디렉터리를 쓰고 CURRENT 를 원자적으로 교체. 새 version 반환."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        version = f"{time.time_ns():x}-{os.getpid()}"
+        tmp_dir = self.dir / f".tmp-{version}"
+        tmp_dir.mkdir()
+
+        files = {}
+        for i, (key, arr) in enumerate(arrays.items()):
+            fname = f"{i:03d}.npy"
+            np.save(tmp_dir / fname, np.ascontiguousarray(arr), allow_pickle=False)
+            files[key] = fname
+        (tmp_dir / "meta.json").write_text(
+            json.dumps({**meta, "files": files}, ensure_ascii=False), encoding="utf-8"
+        )
+        os.replace(tmp_dir, self.dir / f"v{version}")
+
+        current_tmp = self.dir / f".CURRENT-{version}"
+        current_tmp.write_text(
+            json.dumps({"version": version, "created_at": time.time(), "source": source}),
+            encoding="utf-8",
+        )
+        os.replace(current_tmp, self._current_path)
+        SNAPSHOT_BUILDS.inc(name=self.name)
+        self._prune(version)
+        return version
+
+    def attach(self, version: str) -> Tuple[Dict[str, "np.ndarray"], dict]:
+        vdir = self.dir / f"v{version}"
+        meta = json.loads((vdir / "meta.json").read_text(encoding="utf-8"))
+        arrays = {
+            key: np.load(vdir / fname, mmap_mode="r", allow_pickle=False)
+            for key, fname in meta.pop("files").items()
+        }
+        SNAPSHOT_ATTACHES.inc(name=self.name)
+        return arrays, meta
+
+    def _prune(self, latest: str) -> None:
+        versions = sorted(
+            (p for p in self.dir.glob("v*") if p.is_dir() and p.name != f"v{latest}"),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for old in versions[max(0, self.keep - 1):]:
+            shutil.rmtree(old, ignore_errors=True)
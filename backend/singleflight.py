@@ -0,0 +1,69 @@
+# backend/singleflight.py
+# 같은 key 로 동시에 들어온 호출을 하나의 실제 호출로 합치는 single-flight
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import metrics
+
+SINGLEFLIGHT_CALLS = metrics.counter(
+    "singleflight_calls_total", "single-flight 로 실제 실행된 upstream 호출 수", ("name",)
+)
+SINGLEFLIGHT_COALESCED = metrics.counter(
+    "singleflight_coalesced_total", "진행 중인 호출에 합류해 upstream 호출을 생략한 요청 수", ("name",)
+)
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    do(key, fn):
+    - 같은 key 로 진행 중인 호출이 없으면 fn() 을 직접 실행 (leader)
+    - 있으면 그 호출이 끝나기를 기다렸다가 같은 결과/예외를 공유
+    결과를 저장해 두지는 않으므로 캐시와 함께 써야 한다.
+    name 은 메트릭 라벨로 쓰인다.
+    """
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            SINGLEFLIGHT_COALESCED.inc(name=self.name)
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        SINGLEFLIGHT_CALLS.inc(name=self.name)
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
@@ -0,0 +1,355 @@
+# backend/spool.py
+# Supabase 장애 시 쓰기를 잃지 않기 위한 로컬 append-only spool (SQLite WAL)
+#
+# - write-behind flush 가 재시도 끝에 실패했거나 대기열이 가득 찬 경우 row 를 여기에 적재
+# - 백그라운드 drainer 가 오래된 순서대로 꺼내 Supabase 로 재전송
+# - 각 row 에는 idempotency_key 가 들어 있어, 타임아웃 후 실제로는 저장됐던 row 를
+#   다시 보내도 Supabase 쪽 unique 제약(on_conflict)으로 중복 insert 가 막힘
+# - 4xx 로 영구 실패한 row 는 dead 로 격리. 원인을 고친 뒤 requeue_dead() 로 되살리거나
+#   purge_dead() 로 지운다 (관리자 API / python -c "import main; main.write_spool.requeue_dead()").
+#   dead_retention 이 있으면 그보다 오래된 dead row 는 drainer 가 한가할 때 지움
+
+import json
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import applog
+import metrics
+from write_behind import is_retryable_error
+
+log = applog.get_logger("spool")
+
+SPOOLED_ROWS = metrics.counter(
+    "write_spool_appended_rows_total", "spool 에 적재된 row 수", ("table",)
+)
+REPLAYED_ROWS = metrics.counter(
+    "write_spool_replayed_rows_total", "spool 에서 Supabase 로 재전송 성공한 row 수", ("table",)
+)
+DEAD_ROWS = metrics.counter(
+    "write_spool_dead_rows_total", "재전송이 영구 실패(4xx)해 격리된 row 수", ("table",)
+)
+SPOOL_DEPTH = metrics.gauge(
+    "write_spool_depth", "spool 에 남아 있는 재전송 대기 row 수", ("table",)
+)
+SPOOL_DEAD = metrics.gauge(
+    "write_spool_dead_rows", "spool 에 격리돼 있는(재전송하지 않는) dead row 수", ("table",)
+)
+PURGED_DEAD_ROWS = metrics.counter(
+    "write_spool_dead_purged_rows_total", "만료 / 관리자 요청으로 지운 dead row 수", ("table",)
+)
+SPOOL_LAG = metrics.gauge(
+    "write_spool_replay_lag_seconds", "가장 오래된 재전송 대기 row 의 적재 후 경과 시간"
+)
+
+
+class WriteSpool:
+    def __init__(
+        self,
+        path: Path,
+        post_batch: Callable[[str, List[dict]], List[dict]],
+        batch_size: int = 200,
+        idle_interval: float = 1.0,
+        max_backoff: float = 30.0,
+        dead_retention: Optional[float] = None,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._post_batch = post_batch
+        self.batch_size = batch_size
+        self.idle_interval = idle_interval
+        self.max_backoff = max_backoff
+        self.dead_retention = dead_retention
+        self._next_dead_purge = 0.0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS spool (
+                seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name  TEXT    NOT NULL,
+                payload     TEXT    NOT NULL,
+                enqueued_at REAL    NOT NULL,
+                attempts    INTEGER NOT NULL DEFAULT 0,
+                dead        INTEGER NOT NULL DEFAULT 0,
+                last_error  TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS spool_live ON spool (dead, table_name, seq)")
+
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._on_replayed: List[Callable[[str, List[dict]], None]] = []
+
+        SPOOL_DEPTH.set_function(self.depth_by_table)
+        SPOOL_DEAD.set_function(self.dead_by_table)
+        SPOOL_LAG.set_function(self.replay_lag)
+
+    # -------------------------
+    # 적재
+    # -------------------------
+    def append(self, table: str, rows: List[dict]) -> None:
+        """rows 를 spool 에 durable 하게 적재. (로컬 디스크 쓰기만 하므로 빠름)"""
+        if not rows:
+            return
+        now = time.time()
+        records = [(table, json.dumps(row, ensure_ascii=False, default=str), now) for row in rows]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO spool (table_name, payload, enqueued_at) VALUES (?, ?, ?)", records
+            )
+            self._conn.execute("COMMIT")
+        SPOOLED_ROWS.inc(len(rows), table=table)
+        self._wakeup.set()
+
+    def add_replay_listener(self, fn: Callable[[str, List[dict]], None]) -> None:
+        """재전송에 성공한 row(Supabase 응답)를 받아볼 콜백 등록."""
+        self._on_replayed.append(fn)
+
+    # -------------------------
+    # 상태 조회 (메트릭)
+    # -------------------------
+    def depth_by_table(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT table_name, COUNT(*) FROM spool WHERE dead = 0 GROUP BY table_name"
+            )
+            return {(table,): float(n) for table, n in cur.fetchall()}
+
+    def depth(self) -> int:
+        return int(sum(self.depth_by_table().values()))
+
+    def dead_by_table(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT table_name, COUNT(*) FROM spool WHERE dead = 1 GROUP BY table_name"
+            )
+            return {(table,): float(n) for table, n in cur.fetchall()}
+
+    def replay_lag(self) -> float:
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(enqueued_at) FROM spool WHERE dead = 0").fetchone()
+        if not row or row[0] is None:
+            return 0.0
+        return max(0.0, time.time() - row[0])
+
+    # -------------------------
+    # dead row 관리
+    # -------------------------
+    def list_dead(self, table: Optional[str] = None, limit: int = 100) -> List[dict]:
+        """격리된 row 목록 (오래된 순). payload 는 그대로 돌려줌."""
+        sql = "SELECT seq, table_name, payload, enqueued_at, attempts, last_error FROM spool WHERE dead = 1"
+        params: list = []
+        if table is not None:
+            sql += " AND table_name = ?"
+            params.append(table)
+        sql += " ORDER BY seq LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {
+                "seq": seq,
+                "table": table_name,
+                "row": json.loads(payload),
+                "enqueued_at": enqueued_at,
+                "attempts": attempts,
+                "last_error": last_error,
+            }
+            for seq, table_name, payload, enqueued_at, attempts, last_error in rows
+        ]
+
+    def requeue_dead(self, table: Optional[str] = None, seqs: Optional[List[int]] = None) -> int:
+        """
+        dead row 를 다시 재전송 대기로 돌림 (스키마 / 데이터 문제를 고친 뒤).
+        table / seqs 로 범위를 좁힐 수 있고, 되살린 row 수 반환.
+        """
+        where, params = self._dead_filter(table, seqs)
+        with self._lock:
+            cur = self._conn.execute(
+                f"UPDATE spool SET dead = 0, attempts = 0, last_error = NULL WHERE {where}", params
+            )
+            n = cur.rowcount
+        if n:
+            log.info("spool dead row %d건을 재전송 대기로 돌림 (table=%s)", n, table or "*")
+            self._wakeup.set()
+        return n
+
+    def purge_dead(
+        self,
+        older_than: float = 0.0,
+        table: Optional[str] = None,
+        seqs: Optional[List[int]] = None,
+    ) -> int:
+        """적재된 지 older_than 초가 지난 dead row 삭제. 지운 row 수 반환."""
+        where, params = self._dead_filter(table, seqs)
+        where += " AND enqueued_at <= ?"
+        params.append(time.time() - older_than)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            cur = self._conn.execute(
+                f"SELECT table_name, COUNT(*) FROM spool WHERE {where} GROUP BY table_name", params
+            )
+            counts = cur.fetchall()
+            self._conn.execute(f"DELETE FROM spool WHERE {where}", params)
+            self._conn.execute("COMMIT")
+        for table_name, n in counts:
+            PURGED_DEAD_ROWS.inc(n, table=table_name)
+            log.warning("spool dead row %d건 삭제 (%s)", n, table_name)
+        return sum(n for _, n in counts)
+
+    @staticmethod
+    def _dead_filter(table: Optional[str], seqs: Optional[List[int]]) -> Tuple[str, list]:
+        where = "dead = 1"
+        params: list = []
+        if table is not None:
+            where += " AND table_name = ?"
+            params.append(table)
+        if seqs is not None:
+            where += f" AND seq IN ({','.join('?' * len(seqs)) or 'NULL'})"
+            params.extend(seqs)
+        return where, params
+
+    def _expire_dead(self) -> None:
+        """dead_retention 이 지난 dead row 정리 (drainer 에서 최대 분당 1회)."""
+        if not self.dead_retention:
+            return
+        now = time.monotonic()
+        if now < self._next_dead_purge:
+            return
+        self._next_dead_purge = now + 60.0
+        try:
+            self.purge_dead(older_than=self.dead_retention)
+        except sqlite3.Error as e:
+            log.error("spool dead row 만료 정리 실패: %s", e)
+
+    # -------------------------
+    # drainer
+    # -------------------------
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="write-spool-drainer", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _next_batch(self) -> Tuple[Optional[str], List[Tuple[int, dict]]]:
+        with self._lock:
+            head = self._conn.execute(
+                "SELECT table_name FROM spool WHERE dead = 0 ORDER BY seq LIMIT 1"
+            ).fetchone()
+            if head is None:
+                return None, []
+            table = head[0]
+            cur = self._conn.execute(
+                "SELECT seq, payload FROM spool WHERE dead = 0 AND table_name = ? ORDER BY seq LIMIT ?",
+                (table, self.batch_size),
+            )
+            items = [(seq, json.loads(payload)) for seq, payload in cur.fetchall()]
+        # PostgREST 배열 insert 는 키 구성이 같아야 하므로 맨 앞 row 와 같은 모양만 보냄
+        keys = set(items[0][1].keys())
+        return table, [(seq, row) for seq, row in items if set(row.keys()) == keys]
+
+    def _delete(self, seqs: List[int]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("DELETE FROM spool WHERE seq = ?", [(s,) for s in seqs])
+            self._conn.execute("COMMIT")
+
+    def _mark_failed(self, seqs: List[int], error: str, dead: bool) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE spool SET attempts = attempts + 1, last_error = ?, dead = ? WHERE seq = ?",
+                [(error[:500], 1 if dead else 0, s) for s in seqs],
+            )
+            self._conn.execute("COMMIT")
+
+    def drain_once(self) -> int:
+        """
+        가장 오래된 테이블 배치 하나를 재전송. 보낸 row 수 반환.
+        일시적 오류는 예외를 그대로 올려 drainer 가 백오프하게 한다.
+        """
+        table, items = self._next_batch()
+        if not items:
+            return 0
+
+        seqs = [seq for seq, _ in items]
+        rows = [row for _, row in items]
+        try:
+            saved = self._post_batch(table, rows)
+        except Exception as e:
+            if is_retryable_error(e):
+                self._mark_failed(seqs, str(e), dead=False)
+                raise
+            if len(items) == 1:
+                log.error("spool row 재전송 영구 실패, 격리합니다 (%s): %s", table, e)
+                self._mark_failed(seqs, str(e), dead=True)
+                DEAD_ROWS.inc(1, table=table)
+                return 0
+            # 배치 안의 문제 row 를 찾기 위해 한 건씩 처리
+            sent = 0
+            for seq, row in items:
+                try:
+                    saved_one = self._post_batch(table, [row])
+                except Exception as e1:
+                    if is_retryable_error(e1):
+                        self._mark_failed([seq], str(e1), dead=False)
+                        raise
+                    log.error("spool row 재전송 영구 실패, 격리합니다 (%s): %s", table, e1)
+                    self._mark_failed([seq], str(e1), dead=True)
+                    DEAD_ROWS.inc(1, table=table)
+                    continue
+                self._delete([seq])
+                self._notify(table, saved_one)
+                sent += 1
+            REPLAYED_ROWS.inc(sent, table=table)
+            return sent
+
+        self._delete(seqs)
+        REPLAYED_ROWS.inc(len(seqs), table=table)
+        self._notify(table, saved)
+        return len(seqs)
+
+    def _notify(self, table: str, saved: List[dict]) -> None:
+        for fn in self._on_replayed:
+            try:
+                fn(table, saved)
+            except Exception as e:
+                log.warning("spool replay listener 오류: %s", e)
+
+    def _run(self) -> None:
+        backoff = 0.0
+        while not self._stopping.is_set():
+            try:
+                sent = self.drain_once()
+            except Exception as e:
+                # 지수 백오프 + jitter (최대 max_backoff)
+                backoff = min(self.max_backoff, max(1.0, backoff * 2))
+                delay = random.uniform(backoff / 2, backoff)
+                log.warning("spool 재전송 실패, %.1fs 후 재시도: %s", delay, e)
+                # 장애 중에는 새 적재(_wakeup)로 깨우지 않고 백오프를 지킨다
+                self._stopping.wait(delay)
+                continue
+
+            backoff = 0.0
+            if sent == 0:
+                self._expire_dead()
+                self._wakeup.wait(self.idle_interval)
+                self._wakeup.clear()
@@ -0,0 +1,14 @@
+-- write-behind / spool 재전송 중복 방지용 idempotency_key
+-- (_sb_bulk_insert 가 on_conflict=idempotency_key + resolution=ignore-duplicates 로 insert)
+
+alter table public.physical_age_assessments
+  add column if not exists idempotency_key uuid;
+
+create unique index if not exists physical_age_assessments_idempotency_key_uq
+  on public.physical_age_assessments (idempotency_key);
+
+alter table public.mission_logs
+  add column if not exists idempotency_key uuid;
+
+create unique index if not exists mission_logs_idempotency_key_uq
+  on public.mission_logs (idempotency_key);
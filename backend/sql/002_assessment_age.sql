@@ -0,0 +1,5 @@
+-- 코호트(성별 × 연령대) 분포용 실제 나이 (/predict/physical-age 의 age, 선택 입력)
+-- 코호트 분포 재구성(main.rebuild_cohort_stats)은 id 순 keyset 페이징 → 기본 키 인덱스만 사용
+
+alter table public.physical_age_assessments
+  add column if not exists age smallint;
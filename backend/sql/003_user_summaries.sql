@@ -0,0 +1,14 @@
+-- 사용자별 신체나이 진행 요약 (/users/{user_id}/physical-age/summary)
+-- 서버가 assessment 저장 직후 갱신 (last_id 조건 PATCH 로 낙관적 동시성)
+-- 백필: python -c "import main; main.backfill_user_summaries()"
+
+create table if not exists public.physical_age_user_summaries (
+  user_id uuid primary key,
+  last_id bigint not null,          -- 요약에 마지막으로 반영한 physical_age_assessments.id
+  summary jsonb not null,
+  updated_at timestamptz not null default now()
+);
+
+-- 백필의 (user_id, id) keyset 페이징용
+create index if not exists physical_age_assessments_user_id_id_idx
+  on public.physical_age_assessments (user_id, id);
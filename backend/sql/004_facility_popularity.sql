@@ -0,0 +1,38 @@
+-- 시설별 인기도 집계 (/facilities/popular)
+-- score_24h / score_7d : as_of 시점 기준 지수 감쇠 점수 (시간 상수 = 창 길이)
+-- 서버 워커들이 주기적으로 변화량을 merge_facility_popularity 로 보내고, 기동 시 전체를 읽어 카운터를 복원
+
+create table if not exists public.facility_popularity (
+  facility_id bigint not null,
+  status text not null,              -- started / arrived / completed
+  score_24h double precision not null default 0,
+  score_7d double precision not null default 0,
+  total bigint not null default 0,
+  as_of timestamptz not null,
+  primary key (facility_id, status)
+);
+
+-- 변화량 병합: 기존 점수와 변화량을 둘 중 늦은 as_of 로 감쇠시킨 뒤 더함 (워커 동시 호출에도 원자적)
+create or replace function public.merge_facility_popularity(deltas jsonb)
+returns void
+language sql
+as $$
+  insert into public.facility_popularity as p (facility_id, status, score_24h, score_7d, total, as_of)
+  select
+    (d->>'facility_id')::bigint,
+    d->>'status',
+    (d->>'score_24h')::double precision,
+    (d->>'score_7d')::double precision,
+    (d->>'total')::bigint,
+    (d->>'as_of')::timestamptz
+  from jsonb_array_elements(deltas) as d
+  on conflict (facility_id, status) do update set
+    score_24h =
+      p.score_24h * exp(-extract(epoch from greatest(p.as_of, excluded.as_of) - p.as_of) / 86400.0)
+      + excluded.score_24h * exp(-extract(epoch from greatest(p.as_of, excluded.as_of) - excluded.as_of) / 86400.0),
+    score_7d =
+      p.score_7d * exp(-extract(epoch from greatest(p.as_of, excluded.as_of) - p.as_of) / 604800.0)
+      + excluded.score_7d * exp(-extract(epoch from greatest(p.as_of, excluded.as_of) - excluded.as_of) / 604800.0),
+    total = p.total + excluded.total,
+    as_of = greatest(p.as_of, excluded.as_of);
+$$;
@@ -0,0 +1,29 @@
+-- 크루 / 크루원 (/crews/*)
+-- 리더보드 자체는 서버 워커 메모리에서 관리하고, 기동 시 + 주기적으로 아래 테이블 / 뷰에서 다시 구성
+
+create table if not exists public.crews (
+  id bigint generated by default as identity primary key,
+  name text not null,
+  created_at timestamptz not null default now()
+);
+
+create table if not exists public.crew_members (
+  crew_id bigint not null references public.crews (id) on delete cascade,
+  user_id uuid not null,
+  joined_at timestamptz not null default now(),
+  primary key (crew_id, user_id)
+);
+
+create index if not exists crew_members_user_id_idx
+  on public.crew_members (user_id);
+
+-- missions 리더보드 재구성용: 사용자별 완료 미션 수
+create index if not exists mission_logs_completed_user_id_idx
+  on public.mission_logs (user_id)
+  where status = 'completed';
+
+create or replace view public.user_completed_mission_counts as
+  select user_id, count(*) as missions
+  from public.mission_logs
+  where status = 'completed'
+  group by user_id;
@@ -0,0 +1,5 @@
+# tests 는 backend/ 의 평면 모듈(main, admission ...)을 그대로 import 한다
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,76 @@
+# admission.AdmissionMiddleware: 깨진 Authorization 헤더가 와도 500 이 아니라 IP 기준으로 처리되는지
+import asyncio
+
+from admission import AdmissionMiddleware
+from routers.auth import peek_user_id
+
+
+class _Route:
+    def __init__(self, path):
+        self.path = path
+
+    def matches(self, scope):
+        from starlette.routing import Match
+        return (Match.FULL if scope["path"] == self.path else Match.NONE), {}
+
+
+class _App:
+    router = type("Router", (), {"routes": [_Route("/predict/physical-age")]})()
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+
+def _identify(scope):
+    for name, value in scope.get("headers") or ():
+        if name == b"authorization":
+            return peek_user_id(value.decode("latin-1"))
+    return None
+
+
+def _call(mw, app, headers, ip="10.0.0.1"):
+    statuses = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/predict/physical-age",
+        "headers": headers,
+        "client": (ip, 1234),
+        "app": app,
+    }
+    asyncio.run(mw(scope, None, send))
+    return statuses[0]
+
+
+def test_peek_user_id_never_raises():
+    for header in ("Bearer \xe9.x", "Bearer x.\xe9", "Bearer", "Basic abc", "Bearer a.b", "\xff\xfe"):
+        assert peek_user_id(header) is None
+
+
+def test_malformed_authorization_falls_back_to_ip():
+    app = _App()
+    mw = AdmissionMiddleware(app, {"/predict/physical-age": (1.0, 2.0)}, identify=_identify)
+    bad = [(b"authorization", "Bearer \xe9\xff.\xe9".encode("latin-1"))]
+
+    # 같은 IP 로 burst(2) 까지는 통과, 그다음은 429 — 500 은 나오지 않음
+    assert _call(mw, app, bad) == 200
+    assert _call(mw, app, bad) == 200
+    assert _call(mw, app, bad) == 429
+    # 다른 IP 는 자기 bucket
+    assert _call(mw, app, bad, ip="10.0.0.2") == 200
+
+
+def test_identify_exception_does_not_fail_request():
+    app = _App()
+
+    def broken(scope):
+        raise UnicodeEncodeError("ascii", "\xe9", 0, 1, "boom")
+
+    mw = AdmissionMiddleware(app, {"/predict/physical-age": (1.0, 5.0)}, identify=broken)
+    assert _call(mw, app, []) == 200
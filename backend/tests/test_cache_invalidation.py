@@ -0,0 +1,35 @@
+# cache_invalidation.InvalidationLog: 다른 워커(인스턴스)가 남긴 무효화만 구독자에 전달
+from cache_invalidation import InvalidationLog
+
+
+def test_other_worker_invalidation_is_applied(tmp_path):
+    path = tmp_path / "inv.sqlite3"
+    a, b = InvalidationLog(path), InvalidationLog(path)
+    seen_a, seen_b = [], []
+    a.subscribe("favorites", seen_a.append)
+    b.subscribe("favorites", seen_b.append)
+    a.poll()
+    b.poll()
+
+    a.publish("favorites", "u1")
+    b.publish("physical_age", "u2")   # 구독자 없는 scope
+
+    assert b.poll() == 1
+    assert seen_b == ["u1"]
+    # 자기가 남긴 줄은 건너뜀
+    assert a.poll() == 1
+    assert seen_a == []
+    # 이미 읽은 줄은 다시 전달하지 않음
+    assert b.poll() == 0
+
+
+def test_rows_before_first_open_are_ignored(tmp_path):
+    path = tmp_path / "inv.sqlite3"
+    old = InvalidationLog(path)
+    old.publish("favorites", "u1")
+
+    fresh = InvalidationLog(path)
+    seen = []
+    fresh.subscribe("favorites", seen.append)
+    assert fresh.poll() == 0
+    assert seen == []
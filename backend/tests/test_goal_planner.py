@@ -0,0 +1,96 @@
+# goal_planner.GoalTables.plan: 계산한 필요 기록을 main.get_quantile_from_table 로 다시 넣으면
+# 목표 등급이 나오고, 한 단위 덜 하면 안 나오는지 (역방향 표가 정방향 보간과 맞는지)
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine_build import ENGINE_METRICS
+from goal_planner import METRIC_DECIMALS, GoalTables, metric_goals
+
+
+@pytest.fixture(scope="module")
+def main(tmp_path_factory):
+    # main 은 import 시 spool 파일을 연다 → 테스트용 경로로
+    mp = pytest.MonkeyPatch()
+    mp.setenv("WRITE_SPOOL_PATH", str(tmp_path_factory.mktemp("spool") / "write_spool.sqlite3"))
+    try:
+        yield importlib.import_module("main")
+    finally:
+        mp.undo()
+
+
+def _engine():
+    q = np.round(np.linspace(0.0, 1.0, 21), 2)
+    tables = {
+        "sit_ups": {"Female": 5 + 45 * q ** 1.2, "Male": 10 + 50 * q},
+        "flexibility": {"Female": -5 + 30 * q, "Male": -10 + 28 * q ** 0.8},
+        "jump_power": {"Female": 100 + 90 * q ** 1.5, "Male": 140 + 110 * q},
+        # 낮을수록 좋은 항목 (quantile 이 오르면 기록이 줄어듦), 위쪽 끝은 평평함
+        "cardio_endurance": {"Female": np.maximum(600 - 300 * q, 330), "Male": 540 - 260 * q},
+    }
+    return {m: pd.DataFrame({sex: np.round(v, 2) for sex, v in cols.items()}, index=q) for m, cols in tables.items()}
+
+
+def _level(main, engine, sex, values):
+    q = [main.get_quantile_from_table(engine[m], sex, values[m]) for m in ENGINE_METRICS]
+    n = len(main.AGE_GRADES)
+    return (n - 1) - main.quantile_to_grade(float(np.mean(q)))["grade_index"]
+
+
+CASES = [
+    ("Female", {"sit_ups": 12, "flexibility": 3.4, "jump_power": 120.0, "cardio_endurance": 560.0}),
+    ("Male", {"sit_ups": 31, "flexibility": 7.7, "jump_power": 201.3, "cardio_endurance": 430.2}),
+    ("Male", {"sit_ups": 0, "flexibility": -20.0, "jump_power": 50.0, "cardio_endurance": 900.0}),
+    ("Female", {"sit_ups": 48, "flexibility": 24.0, "jump_power": 185.0, "cardio_endurance": 335.0}),
+]
+
+
+@pytest.mark.parametrize("sex,values", CASES)
+def test_plan_agrees_with_forward_quantiles(main, sex, values):
+    engine = _engine()
+    tables = GoalTables(engine, ENGINE_METRICS, len(main.AGE_GRADES))
+    quantiles = {m: main.get_quantile_from_table(engine[m], sex, values[m]) for m in ENGINE_METRICS}
+    plan = tables.plan(sex, values, quantiles)
+
+    level = _level(main, engine, sex, values)
+    assert plan["level"] == level
+    assert list(plan["targets"]) == list(range(level + 1, len(main.AGE_GRADES)))
+
+    checked = 0
+    for i, metric in enumerate(ENGINE_METRICS):
+        step = 10.0 ** -METRIC_DECIMALS[metric]
+        better = plan["better"][i]
+        best = engine[metric][sex].max() if better > 0 else engine[metric][sex].min()
+        for k, target in enumerate(plan["targets"]):
+            need = plan["value"][i, k]
+            if np.isnan(need):
+                # 표의 가장 좋은 기록으로도 안 됨
+                assert _level(main, engine, sex, {**values, metric: best}) < target
+                continue
+            # 측정 단위로 떨어지고, 그 기록이면 목표 등급 이상
+            assert abs(need / step - round(need / step)) < 1e-6
+            assert _level(main, engine, sex, {**values, metric: need}) >= target
+            # 현재보다 나아져야 하는 경우 한 단위 덜 하면 목표에 못 미침 (최소 기록)
+            if better * (need - values[metric]) >= step - 1e-9:
+                assert _level(main, engine, sex, {**values, metric: need - better * step}) < target
+            checked += 1
+    assert checked or not len(plan["targets"])
+
+
+def test_metric_goals_shape(main):
+    engine = _engine()
+    tables = GoalTables(engine, ENGINE_METRICS, len(main.AGE_GRADES))
+    sex, values = CASES[0]
+    quantiles = {m: main.get_quantile_from_table(engine[m], sex, values[m]) for m in ENGINE_METRICS}
+    plan = tables.plan(sex, values, quantiles)
+
+    goals = metric_goals(plan, ENGINE_METRICS, 0)
+    assert [g["metric"] for g in goals] == ENGINE_METRICS
+    for g in goals:
+        if g["required_value"] is None:
+            assert g["improvement"] is None
+        else:
+            assert g["improvement"] >= 0
+    assert not tables.has_sex("Other")
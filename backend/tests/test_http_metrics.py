@@ -0,0 +1,53 @@
+# http_metrics.route_template: include_router 로 붙인 라우트도 템플릿으로 잡히는지
+from fastapi import APIRouter, FastAPI
+
+from http_metrics import route_template
+
+app = FastAPI()
+inner = APIRouter(prefix="/crews")
+
+
+@inner.get("/{crew_id}/leaderboard")
+def leaderboard(crew_id: int):
+    return {}
+
+
+@app.get("/health")
+def health():
+    return {}
+
+
+app.include_router(inner)
+
+
+def _scope(method, path):
+    return {"type": "http", "method": method, "path": path, "root_path": "", "headers": [], "app": app}
+
+
+def test_direct_route():
+    assert route_template(_scope("GET", "/health")) == "/health"
+
+
+def test_included_router_route():
+    assert route_template(_scope("GET", "/crews/7/leaderboard")) == "/crews/{crew_id}/leaderboard"
+
+
+def test_method_mismatch_keeps_template():
+    assert route_template(_scope("POST", "/crews/7/leaderboard")) == "/crews/{crew_id}/leaderboard"
+
+
+def test_unknown_path():
+    assert route_template(_scope("GET", "/nope")) == "unmatched"
+
+
+def test_include_router_prefix():
+    nested = FastAPI()
+    sub = APIRouter()
+
+    @sub.post("/login")
+    def login():
+        return {}
+
+    nested.include_router(sub, prefix="/auth")
+    scope = {"type": "http", "method": "POST", "path": "/auth/login", "root_path": "", "headers": [], "app": nested}
+    assert route_template(scope) == "/auth/login"
@@ -0,0 +1,84 @@
+# leaderboard: 동점 순위 / top-K / 크루 간 점수 공유 / 재구성 중 갱신 보존
+from leaderboard import CrewLeaderboards, Leaderboard, improvement_from_summary
+
+
+def _board(scores):
+    lb = Leaderboard()
+    for user_id, score in scores.items():
+        lb.set(user_id, score)
+    return lb
+
+
+def test_ties_share_rank():
+    lb = _board({"a": 5, "b": 3, "c": 5, "d": 1, "e": 3})
+    assert [lb.rank(u) for u in "abcde"] == [1, 3, 1, 5, 3]
+    assert lb.rank("zz") is None
+
+
+def test_top_k_orders_by_score_then_user():
+    lb = _board({"a": 5, "b": 3, "c": 5, "d": 1, "e": 3})
+    assert lb.top(3) == [(1, "a", 5), (1, "c", 5), (3, "b", 3)]
+    assert lb.top(10)[-1] == (5, "d", 1)
+    assert lb.top(0) == []
+
+
+def test_score_change_moves_user():
+    lb = _board({"a": 5, "b": 3})
+    lb.set("b", 7)
+    assert lb.top(2) == [(1, "b", 7), (2, "a", 5)]
+    lb.remove("b")
+    assert len(lb) == 1 and lb.top(5) == [(1, "a", 5)]
+    lb.remove("b")   # 없는 사용자 제거는 무시
+
+
+def test_score_applies_to_every_crew_of_user():
+    boards = CrewLeaderboards()
+    boards.join(1, "u1")
+    boards.join(2, "u1")
+    boards.join(1, "u2")
+    boards.add_score("missions", "u1")
+    boards.add_score("missions", "u1")
+    boards.set_score("missions", "u2", 2)
+
+    assert boards.rank(1, "missions", "u1") == (1, 2, 2.0)
+    assert boards.rank(1, "missions", "u2") == (1, 2, 2.0)
+    assert boards.rank(2, "missions", "u1") == (1, 1, 2.0)
+    assert boards.crews_of("u1") == [1, 2]
+
+    boards.leave(2, "u1")
+    assert boards.members(2) is None
+    assert boards.top(2, "missions", 10) is None
+    # 나갔다 다시 들어와도 점수는 사용자 단위로 유지
+    boards.join(2, "u1")
+    assert boards.rank(2, "missions", "u1") == (1, 1, 2.0)
+
+
+def test_on_summary_sets_improvement():
+    boards = CrewLeaderboards()
+    boards.join(1, "u1")
+    boards.on_summary("u1", {"first": {"lo_age_value": 40}, "latest": {"lo_age_value": 36.5}})
+    boards.on_summary("u1", {"first": {"lo_age_value": 40}})   # 계산 불가 → 그대로
+    assert boards.rank(1, "improvement", "u1") == (1, 1, 3.5)
+    assert improvement_from_summary(None) is None
+
+
+def test_rebuild_keeps_updates_made_while_loading():
+    boards = CrewLeaderboards()
+    boards.join(1, "old")
+
+    def load_members():
+        # DB 를 읽는 동안 들어온 갱신
+        boards.join(1, "late")
+        boards.add_score("missions", "late", 3)
+        return [(1, "u1"), (1, "u2")]
+
+    def load_scores(user_ids):
+        assert user_ids == {"u1", "u2"}
+        return {"missions": {"u1": 1, "u2": 5}}
+
+    assert boards.rebuild(load_members, load_scores) == 2
+    assert boards.members(1) == ["late", "u1", "u2"]
+    assert boards.top(1, "missions", 2) == (3, [(1, "u2", 5.0), (2, "late", 3.0)])
+    # 재구성이 끝난 뒤 갱신은 바로 반영
+    boards.add_score("missions", "u1", 10)
+    assert boards.rank(1, "missions", "u1") == (1, 3, 11.0)
@@ -0,0 +1,23 @@
+# route_cache.RouteCache: 디스크 영속화 시 만료 / 개수 상한 정리
+from route_cache import RouteCache
+
+
+def test_disk_rows_are_capped(tmp_path):
+    cache = RouteCache(max_entries=10, ttl=3600, path=tmp_path / "routes.sqlite3", max_disk_entries=30, purge_every=10)
+    for i in range(100):
+        cache.put(("k", i), {"v": i})
+
+    assert cache.disk_entries() == 30
+    # 최근 것은 남고 오래된 것부터 지워짐
+    assert cache.get(("k", 99)) == {"v": 99}
+    assert cache.get(("k", 0)) is None
+
+
+def test_expired_rows_purged_on_open(tmp_path):
+    path = tmp_path / "routes.sqlite3"
+    cache = RouteCache(ttl=3600, path=path)
+    cache.put(("k", 1), {"v": 1})
+    assert cache.disk_entries() == 1
+
+    reopened = RouteCache(ttl=0, path=path)
+    assert reopened.disk_entries() == 0
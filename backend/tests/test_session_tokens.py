@@ -0,0 +1,87 @@
+# session_tokens.SessionTokens: 서명 검증 / 만료 / 로그아웃(폐기)과 워커 간 공유
+import time
+
+import pytest
+
+import session_tokens
+from session_tokens import InvalidToken, SessionTokens
+
+SECRET = b"test-secret"
+
+
+def test_issued_token_verifies():
+    tokens = SessionTokens(SECRET)
+    token, exp = tokens.issue("user-1")
+    assert exp > time.time()
+    assert tokens.verify(token) == "user-1"
+    # 두 번째는 LRU 에서
+    assert tokens.verify(token) == "user-1"
+
+
+@pytest.mark.parametrize("mangle", [
+    lambda t: t[:-2] + ("AA" if not t.endswith("AA") else "BB"),   # 서명 변조
+    lambda t: "x" + t,                                               # payload 변조
+    lambda t: t.replace(".", ""),                                     # 구분자 없음
+    lambda t: t + "\xe9",                                             # 비 ASCII
+    lambda t: "",
+])
+def test_tampered_token_rejected(mangle):
+    tokens = SessionTokens(SECRET)
+    token, _ = tokens.issue("user-1")
+    with pytest.raises(InvalidToken):
+        tokens.verify(mangle(token))
+
+
+def test_other_secret_rejected():
+    token, _ = SessionTokens(b"other").issue("user-1")
+    with pytest.raises(InvalidToken):
+        SessionTokens(SECRET).verify(token)
+
+
+def test_expired_token_rejected_even_if_cached(monkeypatch):
+    tokens = SessionTokens(SECRET, ttl=60)
+    token, exp = tokens.issue("user-1")
+    assert tokens.verify(token) == "user-1"
+
+    monkeypatch.setattr(session_tokens.time, "time", lambda: exp + 1)
+    with pytest.raises(InvalidToken, match="만료"):
+        tokens.verify(token)
+    with pytest.raises(InvalidToken, match="만료"):
+        SessionTokens(SECRET).verify(token)
+
+
+def test_revoked_token_rejected():
+    tokens = SessionTokens(SECRET)
+    token, _ = tokens.issue("user-1")
+    other, _ = tokens.issue("user-1")
+    assert tokens.verify(token) == "user-1"
+
+    tokens.revoke(token)
+    with pytest.raises(InvalidToken, match="로그아웃"):
+        tokens.verify(token)
+    # 같은 사용자의 다른 토큰은 그대로
+    assert tokens.verify(other) == "user-1"
+
+
+def test_revocation_shared_between_workers(tmp_path):
+    path = tmp_path / "revocations.sqlite3"
+    a = SessionTokens(SECRET, revocation_path=path, sync_interval=0)
+    b = SessionTokens(SECRET, revocation_path=path, sync_interval=0)
+    token, _ = a.issue("user-1")
+    assert b.verify(token) == "user-1"
+
+    a.revoke(token)
+    with pytest.raises(InvalidToken, match="로그아웃"):
+        b.verify(token)
+    # 나중에 뜬 워커도 기존 폐기 목록을 읽음
+    with pytest.raises(InvalidToken, match="로그아웃"):
+        SessionTokens(SECRET, revocation_path=path, sync_interval=0).verify(token)
+
+
+def test_revocation_file_opened_lazily(tmp_path):
+    path = tmp_path / "sub" / "revocations.sqlite3"
+    tokens = SessionTokens(SECRET, revocation_path=path)
+    assert not path.exists()
+    token, _ = tokens.issue("user-1")
+    tokens.revoke(token)
+    assert path.exists()
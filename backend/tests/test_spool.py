@@ -0,0 +1,117 @@
+# spool.WriteSpool: 재전송 순서 / 일시 오류 보존 / 4xx row 격리와 requeue / 만료
+import pytest
+
+from spool import WriteSpool
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type("Response", (), {"status_code": status_code})()
+
+
+class _Backend:
+    def __init__(self):
+        self.batches = []
+        self.status = None        # 모든 요청 실패 (일시 장애 흉내)
+        self.bad = set()          # 이 n 이 들어 있으면 400
+
+    def __call__(self, table, rows):
+        self.batches.append((table, [r["n"] for r in rows]))
+        if self.status:
+            raise _HTTPError(self.status)
+        if any(r["n"] in self.bad for r in rows):
+            raise _HTTPError(400)
+        return [{**r, "id": r["n"]} for r in rows]
+
+
+def _spool(tmp_path, backend, **kwargs):
+    return WriteSpool(tmp_path / "spool.sqlite3", post_batch=backend, **kwargs)
+
+
+def test_replays_oldest_table_first(tmp_path):
+    backend = _Backend()
+    spool = _spool(tmp_path, backend, batch_size=2)
+    replayed = []
+    spool.add_replay_listener(lambda table, saved: replayed.extend((table, r["id"]) for r in saved))
+    spool.append("a", [{"n": 1}, {"n": 2}, {"n": 3}])
+    spool.append("b", [{"n": 4}])
+
+    while spool.drain_once():
+        pass
+
+    assert backend.batches == [("a", [1, 2]), ("a", [3]), ("b", [4])]
+    assert replayed == [("a", 1), ("a", 2), ("a", 3), ("b", 4)]
+    assert spool.depth() == 0
+
+
+def test_retryable_error_keeps_rows(tmp_path):
+    backend = _Backend()
+    backend.status = 503
+    spool = _spool(tmp_path, backend)
+    spool.append("a", [{"n": 1}])
+
+    with pytest.raises(_HTTPError):
+        spool.drain_once()
+    assert spool.depth() == 1 and spool.dead_by_table() == {}
+
+    backend.status = None
+    assert spool.drain_once() == 1
+    assert spool.depth() == 0
+
+
+def test_rows_survive_reopen(tmp_path):
+    _spool(tmp_path, _Backend()).append("a", [{"n": 1}, {"n": 2}])
+    backend = _Backend()
+    spool = _spool(tmp_path, backend)
+    assert spool.drain_once() == 2
+    assert backend.batches == [("a", [1, 2])]
+
+
+def test_bad_row_is_isolated_then_requeued(tmp_path):
+    backend = _Backend()
+    backend.bad = {2}
+    spool = _spool(tmp_path, backend)
+    spool.append("a", [{"n": 1}, {"n": 2}, {"n": 3}])
+
+    # 배치가 거절되면 한 건씩 보내 나머지는 저장, 문제 row 만 격리
+    assert spool.drain_once() == 2
+    assert spool.depth() == 0
+    assert spool.dead_by_table() == {("a",): 1.0}
+    [dead] = spool.list_dead()
+    assert dead["row"] == {"n": 2} and dead["attempts"] == 1 and "400" in dead["last_error"]
+    # 격리된 row 는 다시 보내지 않음
+    assert spool.drain_once() == 0
+
+    backend.bad = set()
+    assert spool.requeue_dead(table="b") == 0
+    assert spool.requeue_dead(table="a") == 1
+    assert spool.drain_once() == 1
+    assert spool.dead_by_table() == {} and spool.depth() == 0
+
+
+def test_purge_dead_respects_age_and_filters(tmp_path):
+    backend = _Backend()
+    backend.bad = {1, 2}
+    spool = _spool(tmp_path, backend)
+    spool.append("a", [{"n": 1}])
+    spool.append("b", [{"n": 2}])
+    spool.drain_once()
+    spool.drain_once()
+    assert spool.dead_by_table() == {("a",): 1.0, ("b",): 1.0}
+
+    assert spool.purge_dead(older_than=3600) == 0
+    assert spool.purge_dead(table="a") == 1
+    assert spool.dead_by_table() == {("b",): 1.0}
+
+
+def test_expire_dead_uses_retention(tmp_path):
+    backend = _Backend()
+    backend.bad = {1}
+    spool = _spool(tmp_path, backend, dead_retention=1e-9)
+    spool.append("a", [{"n": 1}])
+    spool.drain_once()
+    assert spool.dead_by_table() == {("a",): 1.0}
+
+    spool._expire_dead()
+    assert spool.dead_by_table() == {}
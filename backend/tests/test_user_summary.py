@@ -0,0 +1,129 @@
+# user_summary: fold 의 중복 / 순서 뒤바뀜 처리와 UserSummaryStore 의 재계산 / 충돌 재시도
+from datetime import datetime, timezone
+
+import pytest
+
+import user_summary
+from user_summary import OutOfOrderRow, UserSummaryStore, build, fold, present
+
+
+def _row(row_id, age, pct, measured_at, quantiles=None):
+    return {
+        "id": row_id,
+        "user_id": "u1",
+        "measured_at": measured_at,
+        "lo_age_value": age,
+        "percentile": pct,
+        "detail_quantiles": quantiles,
+    }
+
+
+ROWS = [
+    _row(1, 40, 50, "2024-01-01T01:00:00Z", {"grip": 0.5}),   # 월요일
+    _row(2, 38, 55, "2024-01-08T01:00:00Z", {"grip": 0.6}),   # 다음 주
+    _row(3, 39, 52, "2024-01-15T01:00:00Z", {"grip": 0.55}),  # 그다음 주
+    _row(4, 35, 60, "2024-01-29T01:00:00Z", {"grip": 0.7}),   # 한 주 건너뜀
+]
+
+
+def test_build_summary():
+    s = build(ROWS)
+    assert s["count"] == 4 and s["last_id"] == 4
+    assert s["first"]["id"] == 1 and s["latest"]["id"] == 4 and s["best"]["id"] == 4
+    assert s["week_streak"]["current"] == 1 and s["week_streak"]["longest"] == 3
+    assert s["improving_streak"] == {"current": 1, "longest": 1}
+
+    out = present(s, now=datetime(2024, 2, 1, tzinfo=timezone.utc))
+    assert out["rolling_avg_lo_age_value"] == 38.0
+    assert out["quantile_delta_from_previous"] == {"grip": 0.15}
+    assert out["quantile_delta_from_first"] == {"grip": 0.2}
+    assert out["current_week_streak"] == 1
+    # 2주 넘게 측정이 없으면 현재 streak 은 끊긴 것으로 봄
+    assert present(s, now=datetime(2024, 3, 1, tzinfo=timezone.utc))["current_week_streak"] == 0
+
+
+def test_fold_ignores_duplicates():
+    s = build(ROWS)
+    for row in ROWS:
+        assert fold(s, row) is s
+
+
+def test_fold_rejects_unseen_older_row():
+    s = build([ROWS[0], ROWS[2]])
+    with pytest.raises(OutOfOrderRow):
+        fold(s, ROWS[1])
+
+
+def test_recent_ids_are_bounded(monkeypatch):
+    monkeypatch.setattr(user_summary, "RECENT_IDS", 2)
+    s = build(ROWS)
+    assert s["recent_ids"] == [3, 4]
+    # 창 밖으로 밀려난 id 는 중복인지 알 수 없으므로 out-of-order 로 취급 → 이력 재계산
+    with pytest.raises(OutOfOrderRow):
+        fold(s, ROWS[0])
+
+
+class _Db:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.saved = None          # (last_id, summary)
+        self.conflicts = 0         # 남은 강제 충돌 수
+        self.saves = 0
+
+    def load(self, user_id):
+        return self.saved
+
+    def save(self, user_id, summary, prev_id):
+        self.saves += 1
+        if self.conflicts:
+            self.conflicts -= 1
+            return False
+        if (self.saved[0] if self.saved else 0) != prev_id:
+            return False
+        self.saved = (summary["last_id"], summary)
+        return True
+
+    def history(self, user_id):
+        return sorted(self.rows, key=lambda r: r["id"])
+
+
+def test_store_refolds_late_row_from_history():
+    db = _Db(ROWS)
+    store = UserSummaryStore(db.load, db.save, history=db.history)
+    notified = []
+    store.add_listener(lambda user_id, s: notified.append(s["count"]))
+
+    for row in (ROWS[0], ROWS[2], ROWS[3], ROWS[1]):   # 2 가 늦게 도착
+        store.apply(row)
+
+    assert db.saved[1] == build(ROWS)
+    assert notified == [1, 2, 3, 4]
+    assert store.get("u1") == build(ROWS)
+
+    # 같은 row 가 다시 와도(spool 재전송) 저장하지 않음
+    saves = db.saves
+    store.apply(ROWS[1])
+    assert db.saves == saves
+
+
+def test_store_drops_late_row_without_history():
+    db = _Db()
+    store = UserSummaryStore(db.load, db.save)
+    store.apply(ROWS[0])
+    store.apply(ROWS[2])
+    store.apply(ROWS[1])
+    assert db.saved[1]["count"] == 2
+
+
+def test_store_retries_on_conflict():
+    db = _Db()
+    store = UserSummaryStore(db.load, db.save, max_retries=3)
+    db.conflicts = 2
+    store.apply(ROWS[0])
+    assert db.saves == 3 and db.saved[0] == 1
+
+    # 계속 충돌하면 포기하고 캐시를 비움
+    db.conflicts = 5
+    store.apply(ROWS[1])
+    assert db.saved[0] == 1
+    assert store._entries.get("u1") is None
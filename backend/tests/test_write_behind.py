@@ -0,0 +1,118 @@
+# write_behind.WriteBehindQueue: 배치 / backpressure / 4xx 분할 재시도 / 장애 시 on_failure 인계
+import threading
+
+import pytest
+
+from write_behind import QueueFullError, WriteBehindQueue
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type("Response", (), {"status_code": status_code})()
+
+
+class _Backend:
+    """post_batch 대역: 받은 배치를 기록하고 id 를 붙여 돌려줌."""
+
+    def __init__(self, fail=None):
+        self.batches = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def __call__(self, table, rows):
+        with self._lock:
+            self.batches.append((table, [dict(r) for r in rows]))
+            if self.fail is not None:
+                status = self.fail(rows)
+                if status:
+                    raise _HTTPError(status)
+            return [{**r, "id": r["n"]} for r in rows]
+
+
+def _queue(backend, **kwargs):
+    kwargs.setdefault("key_field", "idempotency_key")
+    kwargs.setdefault("retry_base_delay", 0)
+    q = WriteBehindQueue(post_batch=backend, **kwargs)
+    q.start()
+    return q
+
+
+def test_rows_are_batched_per_table():
+    backend = _Backend()
+    q = _queue(backend, max_batch=3, flush_interval=10)
+    try:
+        futures = [q.submit("a", {"n": i}) for i in range(3)]
+        assert [f.result(timeout=2)["id"] for f in futures] == [0, 1, 2]
+        assert [(t, [r["n"] for r in rows]) for t, rows in backend.batches] == [("a", [0, 1, 2])]
+
+        # max_batch 에 못 미치는 row 는 flush_interval 이 지나야 나감 → close 가 남은 것을 flush
+        other = q.submit("b", {"n": 9})
+        assert not other.done()
+    finally:
+        q.close()
+    assert other.result(timeout=0)["id"] == 9
+    assert [t for t, _ in backend.batches] == ["a", "b"]
+
+
+def test_submit_blocks_then_raises_when_full():
+    release = threading.Event()
+
+    def slow(table, rows):
+        release.wait(5)
+        return rows
+
+    q = _queue(slow, max_pending=2, flush_interval=0, enqueue_timeout=0.05)
+    try:
+        q.submit("a", {"n": 1})
+        q.submit("a", {"n": 2})
+        with pytest.raises(QueueFullError):
+            q.submit("a", {"n": 3})
+
+        release.set()
+        # 자리가 나면 다시 받음
+        assert q.submit("a", {"n": 4}).result(timeout=2)["n"] == 4
+    finally:
+        release.set()
+        q.close()
+
+
+def test_bad_row_is_split_out_of_batch():
+    backend = _Backend(fail=lambda rows: 400 if any(r["n"] == 1 for r in rows) else None)
+    handed_off = []
+    q = _queue(backend, max_batch=3, flush_interval=10, on_failure=lambda t, rows: handed_off.extend(rows) or True)
+    try:
+        futures = [q.submit("a", {"n": i}) for i in range(3)]
+        assert futures[0].result(timeout=2)["id"] == 0
+        assert futures[2].result(timeout=2)["id"] == 2
+        with pytest.raises(_HTTPError):
+            futures[1].result(timeout=2)
+    finally:
+        q.close()
+    # 배치 한 번 + 한 건씩 세 번, 4xx 는 재시도 / spool 인계 없음
+    assert [len(rows) for _, rows in backend.batches] == [3, 1, 1, 1]
+    assert handed_off == []
+
+
+def test_retryable_failure_is_handed_off():
+    backend = _Backend(fail=lambda rows: 503)
+    handed_off = []
+    q = _queue(
+        backend, max_batch=2, flush_interval=10, max_retries=2,
+        on_failure=lambda t, rows: handed_off.extend(rows) or True,
+    )
+    try:
+        futures = [q.submit("a", {"n": i}) for i in range(2)]
+        assert [f.result(timeout=2) for f in futures] == [None, None]
+    finally:
+        q.close()
+    assert len(backend.batches) == 3   # 첫 시도 + 재시도 2회
+    assert [r["n"] for r in handed_off] == [0, 1]
+    assert all(r["idempotency_key"] for r in handed_off)
+
+
+def test_submit_after_close_raises():
+    q = _queue(_Backend())
+    q.close()
+    with pytest.raises(QueueFullError):
+        q.submit("a", {"n": 1})
@@ -0,0 +1,31 @@
+# backend/upstream.py
+# 외부 HTTP 호출(Supabase / 네이버) 공통 래퍼: 서비스 / 대상 / 상태 코드별 소요 시간 기록
+
+import time
+
+import requests
+
+import metrics
+
+UPSTREAM_SECONDS = metrics.histogram(
+    "upstream_request_duration_seconds",
+    "외부 API 호출 소요 시간 (status=error 는 연결 실패 / 타임아웃)",
+    ("service", "target", "method", "status"),
+)
+
+
+def request(service: str, target: str, method: str, url: str, **kwargs) -> requests.Response:
+    """
+    requests.request 와 같지만 소요 시간을 upstream_request_duration_seconds 에 기록.
+    target 은 Supabase 테이블명 / 네이버 API 이름처럼 개수가 정해진 값만 사용.
+    """
+    started = time.perf_counter()
+    status = "error"
+    try:
+        resp = requests.request(method, url, **kwargs)
+        status = str(resp.status_code)
+        return resp
+    finally:
+        UPSTREAM_SECONDS.observe(
+            time.perf_counter() - started, service=service, target=target, method=method, status=status
+        )
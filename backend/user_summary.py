@@ -0,0 +1,340 @@
+# backend/user_summary.py
+# 사용자별 신체나이 진행 요약 (materialized aggregate) — /users/{user_id}/physical-age/summary
+#
+# - fold(summary, row): 저장된 assessment 1건을 요약에 반영. 최근 ROLLING_WINDOW 건만 들고 있어 O(1)
+#   assessment id 순서를 기준 순서로 보고, 최근 반영한 id(recent_ids)에 있는 row 는 건너뜀
+#   (spool 재전송 / 백필과 겹쳐도 두 번 세지 않음)
+#   last_id 보다 오래된데 반영한 적 없는 row(다른 워커 flush / spool 재전송이 늦게 도착)는
+#   OutOfOrderRow → UserSummaryStore 가 그 사용자의 이력 전체로 다시 계산
+# - 저장: Supabase physical_age_user_summaries (user_id, last_id, summary jsonb)
+#   last_id 를 조건으로 PATCH 하는 낙관적 동시성 → 다른 워커가 먼저 바꿨으면 다시 읽고 fold
+# - UserSummaryStore: 요약 read-through 캐시 + 갱신용 백그라운드 스레드 (flush 콜백을 막지 않도록)
+#   저장에 성공한 요약은 add_listener 로 등록한 콜백에 넘긴다 (크루 리더보드 등)
+# - present(summary): 응답용 파생 값 (이동 평균, quantile 변화량, 현재 기준 streak)
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import applog
+import metrics
+from singleflight import SingleFlight
+
+log = applog.get_logger("user_summary")
+
+ROLLING_WINDOW = 5
+# 중복 판단용으로 요약에 남겨 두는 최근 반영 id 수
+RECENT_IDS = 32
+# streak 의 주 경계는 한국 시간 월요일 0시
+KST = timezone(timedelta(hours=9))
+
+SUMMARY_UPDATES = metrics.counter(
+    "user_summary_updates_total", "사용자 요약 갱신 결과", ("result",)
+)
+SUMMARY_REQUESTS = metrics.counter(
+    "user_summary_cache_requests_total", "사용자 요약 캐시 조회 수 (hit / miss)", ("result",)
+)
+SUMMARY_PENDING = metrics.gauge("user_summary_pending_rows", "요약 반영 대기 중인 assessment 수")
+
+# (last_id, summary) — 요약이 없으면 None
+Loaded = Optional[Tuple[int, dict]]
+
+
+class OutOfOrderRow(Exception):
+    """last_id 보다 오래된, 아직 반영하지 않은 row. 순서에 의존하는 값이 있어 이력으로 다시 계산해야 함."""
+
+
+# =========================
+# 요약 계산
+# =========================
+def _parse_time(value) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def week_index(value) -> Optional[int]:
+    """월요일 시작 주 번호 (KST). 0001-01-01 이 월요일이라 (ordinal - 1) // 7."""
+    dt = _parse_time(value)
+    if dt is None:
+        return None
+    return (dt.astimezone(KST).date().toordinal() - 1) // 7
+
+
+def _point(row: dict) -> dict:
+    return {
+        "id": int(row["id"]),
+        "measured_at": str(row.get("measured_at")) if row.get("measured_at") is not None else None,
+        "lo_age_value": row.get("lo_age_value"),
+        "percentile": row.get("percentile"),
+    }
+
+
+def _is_better(row: dict, best: Optional[dict]) -> bool:
+    """신체나이가 더 낮으면 더 좋은 기록 (같으면 percentile 이 높은 쪽)."""
+    age = row.get("lo_age_value")
+    if age is None:
+        return False
+    if best is None or best.get("lo_age_value") is None:
+        return True
+    if age != best["lo_age_value"]:
+        return age < best["lo_age_value"]
+    return (row.get("percentile") or 0) > (best.get("percentile") or 0)
+
+
+def fold(summary: Optional[dict], row: dict) -> dict:
+    """
+    summary 에 row(저장 완료된 assessment) 반영한 새 요약. 이미 반영된 row 면 그대로 반환.
+    last_id 이하인데 recent_ids 에 없으면 OutOfOrderRow.
+    """
+    row_id = int(row["id"])
+    if summary is not None and row_id <= summary.get("last_id", 0):
+        if row_id in (summary.get("recent_ids") or ()):
+            return summary
+        raise OutOfOrderRow(row_id)
+
+    s = dict(summary) if summary is not None else {"count": 0, "last_id": 0}
+    s["recent_ids"] = (list(s.get("recent_ids") or []) + [row_id])[-RECENT_IDS:]
+    point = _point(row)
+    quantiles = row.get("detail_quantiles") or None
+
+    s["count"] = s.get("count", 0) + 1
+    s["last_id"] = row_id
+    if s.get("first") is None:
+        s["first"] = point
+        s["first_quantiles"] = quantiles
+    previous = s.get("latest")
+    s["previous_quantiles"] = s.get("latest_quantiles")
+    s["latest"] = point
+    s["latest_quantiles"] = quantiles
+    if _is_better(row, s.get("best")):
+        s["best"] = point
+
+    recent = list(s.get("recent") or [])
+    recent.append({"lo_age_value": point["lo_age_value"], "percentile": point["percentile"]})
+    s["recent"] = recent[-ROLLING_WINDOW:]
+
+    # 주 단위 연속 측정
+    week = week_index(point["measured_at"])
+    streak = dict(s.get("week_streak") or {"current": 0, "longest": 0, "last_week": None})
+    if week is not None:
+        last_week = streak.get("last_week")
+        if last_week is None or week > last_week + 1:
+            streak["current"] = 1
+        elif week == last_week + 1:
+            streak["current"] += 1
+        streak["last_week"] = max(week, last_week) if last_week is not None else week
+        streak["longest"] = max(streak["longest"], streak["current"])
+    s["week_streak"] = streak
+
+    # 직전 측정보다 percentile 이 오른 연속 횟수
+    improving = dict(s.get("improving_streak") or {"current": 0, "longest": 0})
+    prev_pct = previous.get("percentile") if previous else None
+    cur_pct = point["percentile"]
+    if prev_pct is not None and cur_pct is not None and cur_pct > prev_pct:
+        improving["current"] += 1
+    else:
+        improving["current"] = 0
+    improving["longest"] = max(improving["longest"], improving["current"])
+    s["improving_streak"] = improving
+    return s
+
+
+def build(rows: Iterable[dict], summary: Optional[dict] = None) -> Optional[dict]:
+    """rows(id 오름차순) 전체를 fold (백필용)."""
+    for row in rows:
+        summary = fold(summary, row)
+    return summary
+
+
+def _mean(values) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return round(sum(values) / len(values), 3) if values else None
+
+
+def _delta(now: Optional[dict], before: Optional[dict]) -> Dict[str, float]:
+    if not now or not before:
+        return {}
+    return {
+        k: round(float(now[k]) - float(before[k]), 4)
+        for k in now
+        if k in before and now[k] is not None and before[k] is not None
+    }
+
+
+def present(summary: dict, now: Optional[datetime] = None) -> dict:
+    """저장된 요약 → 응답용 값. 주 streak 은 지난주까지 측정이 이어졌을 때만 유효."""
+    recent = summary.get("recent") or []
+    streak = summary.get("week_streak") or {}
+    this_week = week_index(now or datetime.now(timezone.utc))
+    last_week = streak.get("last_week")
+    alive = last_week is not None and this_week - last_week <= 1
+    improving = summary.get("improving_streak") or {}
+    return {
+        "count": summary.get("count", 0),
+        "first": summary.get("first"),
+        "latest": summary.get("latest"),
+        "best": summary.get("best"),
+        "rolling_window": len(recent),
+        "rolling_avg_lo_age_value": _mean(r.get("lo_age_value") for r in recent),
+        "rolling_avg_percentile": _mean(r.get("percentile") for r in recent),
+        "quantile_delta_from_previous": _delta(summary.get("latest_quantiles"), summary.get("previous_quantiles")),
+        "quantile_delta_from_first": _delta(summary.get("latest_quantiles"), summary.get("first_quantiles")),
+        "current_week_streak": streak.get("current", 0) if alive else 0,
+        "longest_week_streak": streak.get("longest", 0),
+        "current_improving_streak": improving.get("current", 0),
+        "longest_improving_streak": improving.get("longest", 0),
+    }
+
+
+# =========================
+# 캐시 + 갱신
+# =========================
+class UserSummaryStore:
+    def __init__(
+        self,
+        load: Callable[[str], Loaded],
+        save: Callable[[str, dict, int], bool],
+        ttl: float = 300.0,
+        max_users: int = 10000,
+        max_retries: int = 3,
+        history: Optional[Callable[[str], Iterable[dict]]] = None,
+    ):
+        """
+        load(user_id)                     : 저장된 (last_id, summary) 또는 None
+        save(user_id, summary, prev_id)   : 저장된 last_id 가 prev_id 일 때만 저장 (prev_id=0 이면 신규).
+                                            다른 쪽이 먼저 바꿨으면 False
+        history(user_id)                  : 사용자 assessment 전체 (id 오름차순). 늦게 도착한 row 재계산용
+        """
+        self._load = load
+        self._save = save
+        self._history = history
+        self.ttl = ttl
+        self.max_users = max_users
+        self.max_retries = max_retries
+
+        self._entries: "OrderedDict[str, Tuple[float, Optional[dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight("user_summary")
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[str, dict], None]] = []
+        SUMMARY_PENDING.set_function(self._queue.qsize)
+
+    # ---------- 조회 ----------
+    def get(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(user_id)
+                SUMMARY_REQUESTS.inc(result="hit")
+                return entry[1]
+        SUMMARY_REQUESTS.inc(result="miss")
+        return self._flight.do(user_id, lambda: self._refresh(user_id))
+
+    def _refresh(self, user_id: str) -> Optional[dict]:
+        loaded = self._load(user_id)
+        summary = loaded[1] if loaded else None
+        self._remember(user_id, summary)
+        return summary
+
+    def _remember(self, user_id: str, summary: Optional[dict]) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), summary)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    # ---------- 갱신 ----------
+    def add_listener(self, fn: Callable[[str, dict], None]) -> None:
+        """fn(user_id, summary): 요약이 새로 저장될 때마다 갱신 스레드에서 호출."""
+        self._listeners.append(fn)
+
+    def _notify(self, user_id: str, summary: dict) -> None:
+        for fn in self._listeners:
+            try:
+                fn(user_id, summary)
+            except Exception as e:
+                log.error("사용자 요약 listener 실패: user_id=%s, %s", user_id, e)
+
+    def submit(self, row: dict) -> None:
+        """저장 완료된 assessment row 를 요약 갱신 대기열에 넣는다 (바로 반환)."""
+        if isinstance(row, dict) and row.get("user_id") and row.get("id") is not None:
+            self._queue.put(row)
+
+    def apply(self, row: dict) -> None:
+        user_id = str(row["user_id"])
+        with self._lock:
+            entry = self._entries.get(user_id)
+        # 첫 시도는 캐시된 요약으로, 충돌하면 DB 에서 다시 읽는다
+        fresh = entry is not None and time.monotonic() - entry[0] < self.ttl
+        for attempt in range(self.max_retries):
+            if attempt == 0 and fresh:
+                current = entry[1]
+            else:
+                loaded = self._load(user_id)
+                current = loaded[1] if loaded else None
+            prev_id = current["last_id"] if current else 0
+            try:
+                updated = fold(current, row)
+            except OutOfOrderRow:
+                if self._history is None:
+                    SUMMARY_UPDATES.inc(result="out_of_order_dropped")
+                    log.warning("사용자 요약: 늦게 도착한 row 를 반영하지 못함 user_id=%s, id=%s", user_id, row.get("id"))
+                    return
+                # 이력에는 이 row 도 이미 저장되어 있으므로 처음부터 다시 fold
+                SUMMARY_UPDATES.inc(result="refold")
+                updated = build(self._history(user_id))
+                if updated is None:
+                    return
+            if updated is current:
+                SUMMARY_UPDATES.inc(result="duplicate")
+                self._remember(user_id, current)
+                return
+            if self._save(user_id, updated, prev_id):
+                SUMMARY_UPDATES.inc(result="ok")
+                self._remember(user_id, updated)
+                self._notify(user_id, updated)
+                return
+            SUMMARY_UPDATES.inc(result="conflict")
+        # 계속 충돌하면 포기 (다음 assessment 나 백필 때 맞춰짐)
+        SUMMARY_UPDATES.inc(result="gave_up")
+        log.warning("사용자 요약 갱신 포기 (충돌 반복): user_id=%s, id=%s", user_id, row.get("id"))
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="user-summary", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 10.0) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            row = self._queue.get()
+            if row is None:
+                return
+            try:
+                self.apply(row)
+            except Exception as e:
+                SUMMARY_UPDATES.inc(result="error")
+                log.error("사용자 요약 갱신 실패: user_id=%s, %s", row.get("user_id"), e)
+                with self._lock:
+                    self._entries.pop(str(row["user_id"]), None)
@@ -0,0 +1,86 @@
+# backend/warmup.py
+# 서버 기동 후 백그라운드에서 무거운 초기화(엔진 / 시설 데이터 로딩)를 수행하고
+# 컴포넌트별 상태를 /ready 로 보여 주기 위한 트래커
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import applog
+import metrics
+
+log = applog.get_logger("warmup")
+
+WARMUP_SECONDS = metrics.gauge(
+    "warmup_duration_seconds", "컴포넌트별 warm-up 소요 시간", ("component",)
+)
+
+
+class _Component:
+    __slots__ = ("status", "started_at", "finished_at", "error")
+
+    def __init__(self):
+        self.status = "pending"       # pending / loading / ready / failed
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+class WarmupTracker:
+    def __init__(self):
+        self._components: Dict[str, _Component] = {}
+        self._lock = threading.Lock()
+        self._created_at = time.monotonic()
+
+    def register(self, name: str) -> None:
+        with self._lock:
+            self._components.setdefault(name, _Component())
+
+    def start(self, name: str, fn: Callable[[], object]) -> threading.Thread:
+        """fn 을 데몬 스레드에서 실행하고 결과 상태를 기록."""
+        self.register(name)
+        thread = threading.Thread(target=self._run, args=(name, fn), name=f"warmup-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self, name: str, fn: Callable[[], object]) -> None:
+        comp = self._components[name]
+        comp.status = "loading"
+        comp.started_at = time.monotonic()
+        try:
+            fn()
+        except Exception as e:
+            comp.error = str(e)
+            comp.status = "failed"
+            log.error("warm-up 실패 (%s): %s", name, e)
+        else:
+            comp.status = "ready"
+        finally:
+            comp.finished_at = time.monotonic()
+            WARMUP_SECONDS.set(comp.finished_at - comp.started_at, component=name)
+
+    def mark_ready(self, name: str) -> None:
+        """다른 경로(요청 처리 중 lazy 로딩 등)로 이미 준비된 경우."""
+        self.register(name)
+        comp = self._components[name]
+        if comp.status != "ready":
+            comp.status = "ready"
+            comp.error = None
+            comp.finished_at = comp.finished_at or time.monotonic()
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(c.status == "ready" for c in self._components.values())
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            items = list(self._components.items())
+        out = {}
+        for name, c in items:
+            entry = {"status": c.status}
+            if c.started_at is not None and c.finished_at is not None:
+                entry["seconds"] = round(c.finished_at - c.started_at, 3)
+            if c.error:
+                entry["error"] = c.error
+            out[name] = entry
+        return out
@@ -0,0 +1,291 @@
+# backend/write_behind.py
+# Supabase insert 를 요청 경로에서 떼어내는 write-behind 배치 큐
+#
+# - 테이블별로 row 를 모아 두었다가 PostgREST 배열 insert 한 번으로 저장
+# - 크기(max_batch) 또는 시간(flush_interval) 조건이 먼저 충족되면 flush
+# - 대기 row 수가 max_pending 을 넘으면 submit 이 잠깐 막히고(backpressure),
+#   그래도 자리가 안 나면 QueueFullError 를 던져 호출 측이 다른 경로(spool)로 우회
+# - 일시적 오류는 지수 백오프 + jitter 로 재시도
+# - submit 은 concurrent.futures.Future 를 돌려주므로, 생성된 id 가 필요한
+#   엔드포인트는 future.result() 로 자기 row 가 포함된 flush 를 기다릴 수 있음
+# - close() 이후의 submit 은 스레드를 다시 띄우지 않고 QueueFullError (종료 중 들어온 요청은 spool 로)
+# - 재시도 끝에 실패한 배치는 on_failure(예: 로컬 spool)로 넘겨 잃지 않게 함
+
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+import applog
+import metrics
+
+log = applog.get_logger("write_behind")
+
+PENDING_ROWS = metrics.gauge("write_behind_pending_rows", "flush 대기 중인 write-behind row 수")
+FLUSHED_ROWS = metrics.counter(
+    "write_behind_flushed_rows_total", "write-behind 로 저장 완료된 row 수", ("table",)
+)
+HANDED_OFF_ROWS = metrics.counter(
+    "write_behind_handed_off_rows_total", "flush 실패로 on_failure(spool)에 넘긴 row 수", ("table",)
+)
+
+
+class QueueFullError(RuntimeError):
+    """대기 row 가 가득 차서 enqueue 하지 못했을 때."""
+
+
+def is_retryable_error(exc: Exception) -> bool:
+    """
+    재시도할 가치가 있는 오류인지 판단.
+    - 응답이 없는 네트워크 오류 / 5xx / 408 / 429 → 재시도
+    - 그 외 4xx (스키마 불일치 등) → 재시도해도 같은 결과
+    """
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is None:
+        return True
+    return status >= 500 or status in (408, 429)
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        post_batch: Callable[[str, List[dict]], List[dict]],
+        max_batch: int = 200,
+        flush_interval: float = 0.2,
+        max_pending: int = 5000,
+        enqueue_timeout: float = 0.05,
+        max_retries: int = 3,
+        retry_base_delay: float = 0.2,
+        key_field: Optional[str] = None,
+        on_failure: Optional[Callable[[str, List[dict]], bool]] = None,
+    ):
+        """
+        post_batch(table, rows) 는 rows 를 한 번에 insert 하고,
+        삽입된 row 리스트를 반환해야 한다.
+        - key_field 가 주어지면 submit 시 row 에 uuid 를 채우고, 응답 row 를
+          이 키로 매칭한다 (중복 무시 insert 로 응답 개수가 줄어도 안전).
+          없으면 응답이 입력과 같은 순서라고 가정한다.
+        - on_failure(table, rows) 가 True 를 반환하면 해당 row 는 보관된 것으로
+          보고 future 를 None 으로 완료한다.
+        """
+        self._post_batch = post_batch
+        self.key_field = key_field
+        self._on_failure = on_failure
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+
+        # table -> [(enqueued_at, row, future), ...]
+        self._buffers: Dict[str, List[Tuple[float, dict, Future]]] = {}
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        # close() 가 불린 뒤로는 받지 않음 (다시 받으려면 start() 를 명시적으로 호출)
+        self._closed = False
+
+    # -------------------------
+    # 생명주기
+    # -------------------------
+    def start(self) -> None:
+        with self._cond:
+            self._closed = False
+            self._start_locked()
+
+    def _start_locked(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """남은 row 를 모두 flush 한 뒤 워커 스레드 종료."""
+        with self._cond:
+            self._stopping = True
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        # 스레드가 한 번도 안 떴거나 타임아웃으로 빠져나온 경우 남은 것 처리
+        self._flush_ready(force=True)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    # -------------------------
+    # enqueue
+    # -------------------------
+    def submit(self, table: str, row: dict) -> Future:
+        """
+        row 를 table 버퍼에 넣고 Future 반환.
+        Future 결과는 Supabase 가 돌려준 삽입 row(dict, id 포함).
+        close() 이후에는 QueueFullError (호출 측이 spool 로 우회).
+        """
+        if self.key_field and not row.get(self.key_field):
+            row = {**row, self.key_field: str(uuid.uuid4())}
+        fut: Future = Future()
+        deadline = time.monotonic() + self.enqueue_timeout
+
+        with self._cond:
+            if self._closed:
+                raise QueueFullError("write-behind 대기열이 종료되었습니다")
+            self._start_locked()
+            while self._pending >= self.max_pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopping:
+                    raise QueueFullError(
+                        f"write-behind 대기열이 가득 찼습니다 (pending={self._pending})"
+                    )
+                self._cond.wait(remaining)
+
+            buf = self._buffers.setdefault(table, [])
+            buf.append((time.monotonic(), row, fut))
+            self._pending += 1
+            PENDING_ROWS.set(self._pending)
+            if len(buf) >= self.max_batch:
+                self._cond.notify_all()
+        return fut
+
+    # -------------------------
+    # flush 루프
+    # -------------------------
+    def _next_wakeup(self) -> Optional[float]:
+        """
+        가장 오래된 row 가 flush_interval 에 도달하기까지 남은 시간.
+        이미 max_batch 만큼 찬 버퍼가 있으면 0 (워커가 wait 에 들어가기 전에 온 notify 를 놓치지 않도록).
+        """
+        oldest = None
+        for buf in self._buffers.values():
+            if len(buf) >= self.max_batch:
+                return 0.0
+            if buf and (oldest is None or buf[0][0] < oldest):
+                oldest = buf[0][0]
+        if oldest is None:
+            return None
+        return max(0.0, oldest + self.flush_interval - time.monotonic())
+
+    def _take_ready(self, force: bool) -> List[Tuple[str, List[Tuple[float, dict, Future]]]]:
+        """flush 조건을 만족한 테이블 배치를 버퍼에서 떼어낸다. (_cond 잡은 상태에서 호출)"""
+        now = time.monotonic()
+        batches = []
+        for table, buf in self._buffers.items():
+            if not buf:
+                continue
+            due = force or len(buf) >= self.max_batch or now - buf[0][0] >= self.flush_interval
+            if not due:
+                continue
+            batch = buf[: self.max_batch]
+            del buf[: self.max_batch]
+            batches.append((table, batch))
+        return batches
+
+    def _flush_ready(self, force: bool = False) -> None:
+        while True:
+            with self._cond:
+                batches = self._take_ready(force)
+            if not batches:
+                return
+            for table, batch in batches:
+                self._flush_batch(table, batch)
+            with self._cond:
+                self._pending -= sum(len(b) for _, b in batches)
+                PENDING_ROWS.set(self._pending)
+                self._cond.notify_all()
+            if not force:
+                return
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopping:
+                    break
+                wait = self._next_wakeup()
+                if wait is None or wait > 0:
+                    self._cond.wait(self.flush_interval if wait is None else wait)
+            self._flush_ready()
+
+    # -------------------------
+    # 실제 전송
+    # -------------------------
+    def _flush_batch(self, table: str, batch: List[Tuple[float, dict, Future]]) -> None:
+        # PostgREST 배열 insert 는 모든 객체의 키 구성이 같아야 하므로 키 셋별로 나눔
+        groups: Dict[frozenset, List[Tuple[dict, Future]]] = {}
+        for _, row, fut in batch:
+            groups.setdefault(frozenset(row.keys()), []).append((row, fut))
+
+        for items in groups.values():
+            rows = [row for row, _ in items]
+            futures = [fut for _, fut in items]
+            try:
+                saved = self._post_with_retry(table, rows)
+            except Exception as e:
+                if len(rows) > 1 and not is_retryable_error(e):
+                    # 배치 안의 row 하나 때문에 전체가 거절된 경우 → 한 건씩 다시 시도
+                    for row, fut in items:
+                        self._flush_single(table, row, fut)
+                    continue
+                log.error("write-behind flush 실패 (%s, %d건): %s", table, len(rows), e)
+                self._fail(table, rows, futures, e)
+                continue
+
+            FLUSHED_ROWS.inc(len(rows), table=table)
+            self._resolve(rows, futures, saved)
+
+    def _flush_single(self, table: str, row: dict, fut: Future) -> None:
+        try:
+            saved = self._post_with_retry(table, [row])
+        except Exception as e:
+            log.error("write-behind 단건 insert 실패 (%s): %s", table, e)
+            self._fail(table, [row], [fut], e)
+            return
+        FLUSHED_ROWS.inc(1, table=table)
+        self._resolve([row], [fut], saved)
+
+    def _resolve(self, rows: List[dict], futures: List[Future], saved: List[dict]) -> None:
+        if self.key_field:
+            by_key = {s.get(self.key_field): s for s in saved if isinstance(s, dict)}
+            for row, fut in zip(rows, futures):
+                fut.set_result(by_key.get(row.get(self.key_field)))
+            return
+        for i, fut in enumerate(futures):
+            fut.set_result(saved[i] if i < len(saved) else None)
+
+    def _fail(self, table: str, rows: List[dict], futures: List[Future], exc: Exception) -> None:
+        # 재시도해도 안 되는 4xx 는 보관해 봐야 같은 결과이므로 on_failure 로 넘기지 않음
+        handed_off = False
+        if self._on_failure is not None and is_retryable_error(exc):
+            try:
+                handed_off = bool(self._on_failure(table, rows))
+            except Exception as e:
+                log.error("write-behind on_failure 처리 실패 (%s): %s", table, e)
+        if handed_off:
+            HANDED_OFF_ROWS.inc(len(rows), table=table)
+        for fut in futures:
+            if handed_off:
+                fut.set_result(None)
+            else:
+                fut.set_exception(exc)
+
+    def _post_with_retry(self, table: str, rows: List[dict]) -> List[dict]:
+        attempt = 0
+        while True:
+            try:
+                saved = self._post_batch(table, rows)
+                return saved if isinstance(saved, list) else [saved]
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries or not is_retryable_error(e):
+                    raise
+                # full jitter: 0 ~ base * 2^attempt
+                delay = random.uniform(0, self.retry_base_delay * (2 ** attempt))
+                log.warning("write-behind 재시도 %d/%d (%s): %s", attempt, self.max_retries, table, e)
+                time.sleep(delay)
@@ -64,7 +64,7 @@ class MapApi {
     required double endLon,
   }) async {
     final uri = Uri.parse(
-      '$baseUrl/route?start_lat=$startLat&start_lon=$startLon&end_lat=$endLat&end_lon=$endLon',
+      '$baseUrl/route?start_lat=$startLat&start_lon=$startLon&end_lat=$endLat&end_lon=$endLon&encoding=polyline',
     );
 
     final res = await http.get(uri);
@@ -73,6 +73,10 @@ class MapApi {
     }
 
     final Map<String, dynamic> data = jsonDecode(res.body);
+    // 서버가 encoded polyline 으로 준 경우 (encoding=polyline)
+    if (data['path_encoded'] is String) {
+      return decodePolyline(data['path_encoded'] as String);
+    }
     final List<dynamic> rawPath = data['path'] ?? [];
     return rawPath
         .map<List<double>>((e) => [
@@ -82,3 +86,40 @@ class MapApi {
         .toList();
   }
 }
+
+/// Google encoded polyline(정밀도 5) 디코딩 -> [[lon, lat], ...]
+/// (서버 backend/route_geometry.py 의 encode_polyline 과 짝)
+List<List<double>> decodePolyline(String encoded, {int precision = 5}) {
+  final factor = _pow10(precision);
+  final path = <List<double>>[];
+  int index = 0;
+  int lat = 0;
+  int lon = 0;
+
+  int nextDelta() {
+    int shift = 0;
+    int result = 0;
+    int b;
+    do {
+      b = encoded.codeUnitAt(index++) - 63;
+      result |= (b & 0x1F) << shift;
+      shift += 5;
+    } while (b >= 0x20);
+    return (result & 1) != 0 ? ~(result >> 1) : (result >> 1);
+  }
+
+  while (index < encoded.length) {
+    lat += nextDelta();
+    lon += nextDelta();
+    path.add([lon / factor, lat / factor]);
+  }
+  return path;
+}
+
+double _pow10(int n) {
+  double v = 1;
+  for (int i = 0; i < n; i++) {
+    v *= 10;
+  }
+  return v;
+}